@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Size and throughput of the codec policies.
+
+Writes synthetic frames of each type with each policy, then reports the
+compression ratio and the write/read throughput of the raw data.
+
+    python benchmarks/bench_codec.py --frames 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+
+from h5datacreator import *
+from synthetic import make_bgr8, make_depth, make_points, make_semantic2d
+
+POLICIES = {
+    'none': CODEC_NONE,
+    'lzf': CODEC_LZF,
+    'gzip-1': CODEC_GZIP,
+    'gzip-9': CODEC_GZIP_MAX,
+    'default': None,
+}
+
+def writers():
+    bgr8 = make_bgr8()
+    depth = make_depth()
+    points = make_points()
+    semantic2d = make_semantic2d()
+    return {
+        TYPE_BGR8: (bgr8.nbytes, lambda g, p: set_bgr8(g, 'data', bgr8, 'camera', codec_policy=p)),
+        TYPE_DEPTH: (depth.nbytes, lambda g, p: set_depth(g, 'data', depth, 'camera', codec_policy=p)),
+        TYPE_POINTS: (points.nbytes, lambda g, p: set_points(g, 'data', points, 'lidar', codec_policy=p)),
+        TYPE_SEMANTIC2D: (semantic2d.nbytes, lambda g, p: set_semantic2d(g, 'data', semantic2d, 'camera', 'label', codec_policy=p)),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the codec policies.')
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    print('{:<12} {:<8} {:>8} {:>14} {:>14}'.format('type', 'policy', 'ratio', 'write[MB/s]', 'read[MB/s]'))
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        for type_, (nbytes, writer) in writers().items():
+            for name, policy in POLICIES.items():
+                path = os.path.join(tmpdir, '{}-{}.hdf5'.format(type_, name))
+                start = time.perf_counter()
+                h5file = H5Dataset(path)
+                for _ in range(args.frames):
+                    writer(h5file.get_next_data_group(), policy)
+                h5file.close()
+                write_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                with h5py.File(path, mode='r') as h5_root:
+                    for index in range(args.frames):
+                        h5_root['{}/{}/data'.format(H5_KEY_DATA, index)][()]
+                read_time = time.perf_counter() - start
+
+                report = get_storage_report(path)[type_]
+                total = nbytes * args.frames / 2**20
+                print('{:<12} {:<8} {:>8.2f} {:>14.1f} {:>14.1f}'.format(type_, name, report['ratio'], total / write_time, total / read_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Size and throughput of the encoded images.
+
+Writes synthetic frames with 'set_batch' for each image codec, then reports
+the bytes per frame and the read throughput of 'get' one frame at a time and
+of 'get_batch', which decodes the frames on a thread pool.
+
+    python benchmarks/bench_image.py --frames 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from h5datacreator import *
+from synthetic import make_bgr8, make_mono16
+
+CODECS = {
+    'raw-gzip': None,
+    'png': IMAGE_CODEC_PNG,
+    'jpeg-95': IMAGE_CODEC_JPEG,
+    'jpeg-80': H5ImageCodec(ENCODING_JPEG, 80),
+    'webp-95': IMAGE_CODEC_WEBP,
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the image codecs.')
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    images = {
+        TYPE_BGR8: np.stack([make_bgr8(seed=i) for i in range(args.frames)]),
+        TYPE_MONO16: np.stack([make_mono16(seed=i) for i in range(args.frames)]),
+    }
+
+    print('{:<8} {:<10} {:>14} {:>8} {:>12} {:>12} {:>12}'.format('type', 'codec', 'bytes/frame', 'ratio', 'write[fps]', 'get[fps]', 'batch[fps]'))
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        for type_, data in images.items():
+            for name, codec in CODECS.items():
+                if codec is not None and codec.encoding not in IMAGE_TYPES[type_]:
+                    continue
+                path = os.path.join(tmpdir, '{0}-{1}.hdf5'.format(type_, name))
+                h5file = H5Dataset(path)
+                start = time.perf_counter()
+                h5file.set_batch('image', type_, data, 'camera', image_codec=codec)
+                h5file.close()
+                write_elapsed = time.perf_counter() - start
+                size = os.path.getsize(path)
+
+                reader = H5DatasetReader(path, cache_bytes=0)
+                start = time.perf_counter()
+                for index in range(args.frames):
+                    reader.get(index, 'image')
+                get_elapsed = time.perf_counter() - start
+                start = time.perf_counter()
+                reader.get_batch(list(range(args.frames)), 'image')
+                batch_elapsed = time.perf_counter() - start
+                reader.close()
+
+                print('{:<8} {:<10} {:>14.0f} {:>8.2f} {:>12.1f} {:>12.1f} {:>12.1f}'.format(
+                    type_, name, size / args.frames, data.nbytes / size,
+                    args.frames / write_elapsed, args.frames / get_elapsed, args.frames / batch_elapsed))
+
+if __name__ == '__main__':
+    main()
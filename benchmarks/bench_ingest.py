@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Compare a serial conversion loop with 'ingest_files'.
+
+Writes a corpus of PNG images, 16-bit PNG depth maps and KITTI-style '.bin'
+scans, then converts it to an H5Dataset with a loop that reads each file and
+calls 'set_*', and with 'ingest_files' on threads and processes. Reports the
+frame rate, the time the writer waited for the workers and the read-ahead queue.
+
+    python benchmarks/bench_ingest.py --frames 500 --workers 1 2 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from h5datacreator import *
+from synthetic import make_bgr8, make_mono16, make_points
+
+def make_corpus(root:str, frames:int, height:int, width:int, points:int) -> List[H5IngestSource]:
+    sources = []
+    for i in range(frames):
+        image_path = os.path.join(root, 'image_{0:06d}.png'.format(i))
+        depth_path = os.path.join(root, 'depth_{0:06d}.png'.format(i))
+        points_path = os.path.join(root, 'points_{0:06d}.bin'.format(i))
+        cv2.imwrite(image_path, make_bgr8(height, width, seed=i))
+        cv2.imwrite(depth_path, make_mono16(height, width, seed=i))
+        scan = np.hstack([make_points(points, seed=i), np.zeros((points, 1), dtype=np.float32)])
+        scan.astype(np.float32).tofile(points_path)
+        sources.append(H5IngestSource(i, 'image', TYPE_BGR8, image_path, 'camera', stamp_sec=i))
+        sources.append(H5IngestSource(i, 'depth', TYPE_DEPTH, depth_path, 'camera', stamp_sec=i, scale=0.001))
+        sources.append(H5IngestSource(i, 'points', TYPE_POINTS, points_path, 'lidar', stamp_sec=i))
+    return sources
+
+def convert_serial(path:str, sources:List[H5IngestSource], layout:str) -> float:
+    start = time.perf_counter()
+    h5file = H5Dataset(path, layout=layout)
+    index = -1
+    for source in sources:
+        if source.index != index:
+            h5_data = h5file.get_next_data_group()
+            index = source.index
+        data = read_source(source)
+        if source.type_ == TYPE_BGR8:
+            set_bgr8(h5_data, source.tag, data, source.frame_id, stamp_sec=source.stamp_sec)
+        elif source.type_ == TYPE_DEPTH:
+            set_depth(h5_data, source.tag, data, source.frame_id, stamp_sec=source.stamp_sec)
+        else:
+            set_points(h5_data, source.tag, data, source.frame_id, stamp_sec=source.stamp_sec)
+    h5file.close()
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the ingest pipeline.')
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--points', type=int, default=65536)
+    parser.add_argument('--layout', type=str, default=LAYOUT_STACKED, choices=[LAYOUT_GROUP, LAYOUT_STACKED])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--prefetch', type=int, default=INGEST_PREFETCH)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        sources = make_corpus(tmpdir, args.frames, args.height, args.width, args.points)
+        path = os.path.join(tmpdir, 'out.hdf5')
+
+        print('{:<10} {:>8} {:>10} {:>10} {:>10} {:>10}'.format('mode', 'workers', 'frame[Hz]', 'wait[s]', 'queue', 'ready'))
+        elapsed = convert_serial(path, sources, args.layout)
+        print('{:<10} {:>8} {:>10.1f} {:>10} {:>10} {:>10}'.format('serial', 1, args.frames / elapsed, '-', '-', '-'))
+        for processes in [False, True]:
+            for workers in args.workers:
+                h5file = H5Dataset(path, layout=args.layout)
+                stats = ingest_files(h5file, sources, workers=workers, prefetch=args.prefetch, processes=processes)
+                start = time.perf_counter()
+                h5file.close()
+                frame_rate = stats['frames'] / (stats['elapsed_s'] + time.perf_counter() - start)
+                print('{:<10} {:>8} {:>10.1f} {:>10.2f} {:>10.1f} {:>10.1f}'.format(
+                    'process' if processes else 'thread', workers, frame_rate, stats['wait_s'], stats['queue_mean'], stats['ready_mean']))
+
+if __name__ == '__main__':
+    main()
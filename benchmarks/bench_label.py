@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Size and read throughput of the label codecs.
+
+Writes synthetic 'semantic2d' masks with each label codec, then reports the
+bytes per frame and the read throughput including the decoding.
+
+    python benchmarks/bench_label.py --frames 50 --classes 20
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from h5datacreator import *
+from synthetic import make_semantic2d
+
+CODECS = {
+    'raw': None,
+    'packed': LABEL_CODEC_PACKED,
+    'rle': LABEL_CODEC_RLE,
+    'auto': LABEL_CODEC_AUTO,
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the label codecs.')
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--classes', type=int, default=20)
+    parser.add_argument('--block', type=int, default=32, help='size of the blocks of the same label [pixel]')
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    masks = [make_semantic2d(classes=args.classes, block=args.block, seed=i) for i in range(args.frames)]
+    raw_bytes = sum(mask.nbytes for mask in masks)
+
+    print('{:<8} {:<10} {:>14} {:>8} {:>12} {:>12}'.format('layout', 'codec', 'bytes/frame', 'ratio', 'write[fps]', 'read[fps]'))
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        for layout in (LAYOUT_GROUP, LAYOUT_STACKED):
+            for name, codec in CODECS.items():
+                path = os.path.join(tmpdir, '{0}-{1}.hdf5'.format(layout, name))
+                h5file = H5Dataset(path, layout=layout)
+                h5_label = h5file.get_label_group('label')
+                for index in range(args.classes):
+                    set_label_config(h5_label, index, 'class{0}'.format(index), index, index, index)
+                start = time.perf_counter()
+                for mask in masks:
+                    set_semantic2d(h5file.get_next_data_group(), 'label', mask, 'camera', 'label', label_codec=codec)
+                h5file.close()
+                write_elapsed = time.perf_counter() - start
+                size = os.path.getsize(path)
+
+                reader = H5DatasetReader(path, cache_bytes=0)
+                start = time.perf_counter()
+                for index in range(args.frames):
+                    reader.get(index, 'label')
+                read_elapsed = time.perf_counter() - start
+                reader.close()
+
+                print('{:<8} {:<10} {:>14.0f} {:>8.2f} {:>12.1f} {:>12.1f}'.format(
+                    layout, name, size / args.frames, raw_bytes / size, args.frames / write_elapsed, args.frames / read_elapsed))
+
+if __name__ == '__main__':
+    main()
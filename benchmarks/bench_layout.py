@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Compare the group-per-frame layout with the stacked layout.
+
+Measures write throughput, file open time and random-access read latency
+with synthetic depth maps, poses and scalars.
+
+    python benchmarks/bench_layout.py --frames 10000 --height 64 --width 64
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from h5datacreator import *
+
+def write(path:str, layout:str, frames:int, height:int, width:int) -> float:
+    depth = np.random.rand(height, width).astype(np.float32)
+    translation = np.zeros(3, dtype=np.float32)
+    quaternion = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float32)
+
+    start = time.perf_counter()
+    h5file = H5Dataset(path, layout=layout)
+    for i in range(frames):
+        h5_data = h5file.get_next_data_group()
+        set_depth(h5_data, 'depth', depth, 'camera', stamp_sec=i)
+        set_pose(h5_data, 'pose', translation, quaternion, 'map', 'camera', stamp_sec=i)
+        set_uint8(h5_data, 'flag', i % 256, stamp_sec=i)
+    h5file.close()
+    return time.perf_counter() - start
+
+def open_file(path:str, layout:str) -> float:
+    start = time.perf_counter()
+    with h5py.File(path, mode='r') as h5file:
+        if layout == LAYOUT_STACKED:
+            h5file[H5_KEY_META + '/depth/' + H5_KEY_INDEX][()]
+        else:
+            list(h5file[H5_KEY_DATA].keys())
+    return time.perf_counter() - start
+
+def random_read(path:str, layout:str, frames:int, reads:int) -> float:
+    indices = np.random.randint(0, frames, size=reads)
+    with h5py.File(path, mode='r') as h5file:
+        start = time.perf_counter()
+        if layout == LAYOUT_STACKED:
+            h5_depth = h5file[H5_KEY_DATA + '/depth']
+            for index in indices:
+                h5_depth[index]
+        else:
+            h5_data = h5file[H5_KEY_DATA]
+            for index in indices:
+                h5_data[str(index) + '/depth'][()]
+        return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the H5Dataset layouts.')
+    parser.add_argument('--frames', type=int, default=10000)
+    parser.add_argument('--height', type=int, default=64)
+    parser.add_argument('--width', type=int, default=64)
+    parser.add_argument('--reads', type=int, default=1000)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        print('{:<8} {:>12} {:>12} {:>12} {:>14}'.format('layout', 'write[fps]', 'size[MB]', 'open[ms]', 'random[us]'))
+        for layout in [LAYOUT_GROUP, LAYOUT_STACKED]:
+            path = os.path.join(tmpdir, layout + '.hdf5')
+            elapsed = write(path, layout, args.frames, args.height, args.width)
+            size = os.path.getsize(path) / 2**20
+            open_time = open_file(path, layout)
+            read_time = random_read(path, layout, args.frames, args.reads)
+            print('{:<8} {:>12.1f} {:>12.2f} {:>12.2f} {:>14.1f}'.format(
+                layout, args.frames / elapsed, size, open_time * 1e3, read_time / args.reads * 1e6
+            ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Compare 'merge_datasets' with a merge that decodes and encodes the data.
+
+Writes H5Datasets of compressed images and point clouds, then merges them with
+'merge_datasets', which copies the stored chunks, and with a loop that reads
+each frame with H5DatasetReader and writes it again with 'set_*'.
+
+    python benchmarks/bench_merge.py --files 4 --frames 200
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+from h5datacreator import *
+from synthetic import make_bgr8, make_points
+
+def make_sources(root:str, files:int, frames:int, height:int, width:int, points:int, layout:str, policies:dict) -> List[str]:
+    paths = []
+    for k in range(files):
+        path = os.path.join(root, 'src_{0:03d}.hdf5'.format(k))
+        h5file = H5Dataset(path, layout=layout, codec_policies=policies)
+        set_label_config(h5file.get_label_group('label'), 1, 'car', 255, 0, 0)
+        for i in range(frames):
+            h5_data = h5file.get_next_data_group()
+            set_bgr8(h5_data, 'image', make_bgr8(height, width, seed=k * frames + i), 'camera', stamp_sec=k * frames + i)
+            set_points(h5_data, 'points', make_points(points, seed=k * frames + i), 'lidar', stamp_sec=k * frames + i)
+        h5file.close()
+        paths.append(path)
+    return paths
+
+def merge_decoded(path:str, src_paths:List[str], layout:str, policies:dict) -> None:
+    h5file = H5Dataset(path, layout=layout, codec_policies=policies)
+    set_label_config(h5file.get_label_group('label'), 1, 'car', 255, 0, 0)
+    for src_path in src_paths:
+        with H5DatasetReader(src_path) as reader:
+            for i in range(len(reader)):
+                h5_data = h5file.get_next_data_group()
+                image = reader.get(i, 'image')
+                set_bgr8(h5_data, 'image', image.data, image.frame_id, stamp_sec=image.stamp_sec)
+                points = reader.get(i, 'points')
+                set_points(h5_data, 'points', points.data, points.frame_id, stamp_sec=points.stamp_sec)
+    h5file.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the merge of H5Datasets.')
+    parser.add_argument('--files', type=int, default=4)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--points', type=int, default=65536)
+    parser.add_argument('--layout', type=str, default=LAYOUT_STACKED, choices=[LAYOUT_GROUP, LAYOUT_STACKED])
+    parser.add_argument('--compression', type=str, default='gzip', choices=['gzip', 'lzf'])
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    policy = H5CodecPolicy(args.compression, shuffle=True)
+    policies = {TYPE_BGR8: policy, TYPE_POINTS: policy}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        src_paths = make_sources(tmpdir, args.files, args.frames, args.height, args.width, args.points, args.layout, policies)
+        frames = args.files * args.frames
+        path = os.path.join(tmpdir, 'merged.hdf5')
+
+        print('{:<10} {:>10} {:>12} {:>12}'.format('mode', 'frame[Hz]', 'raw[MiB]', 'decoded[MiB]'))
+        start = time.perf_counter()
+        merge_decoded(path, src_paths, args.layout, policies)
+        print('{:<10} {:>10.1f} {:>12} {:>12}'.format('decode', frames / (time.perf_counter() - start), '-', '-'))
+        stats = merge_datasets(path, src_paths)
+        print('{:<10} {:>10.1f} {:>12.1f} {:>12.1f}'.format('raw', stats['frames'] / stats['elapsed_s'],
+            stats['raw_bytes'] / (1 << 20), stats['decoded_bytes'] / (1 << 20)))
+
+if __name__ == '__main__':
+    main()
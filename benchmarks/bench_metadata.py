@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Compare the metadata stored as attributes with the metadata table.
+
+Measures write throughput and file size with small payloads, and the time
+to read the stamps and frame ids of a tag in all frames.
+
+    python benchmarks/bench_metadata.py --frames 10000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from h5datacreator import *
+
+def write(path:str, metadata:str, frames:int) -> float:
+    translation = np.zeros(3, dtype=np.float32)
+    quaternion = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float32)
+
+    start = time.perf_counter()
+    h5file = H5Dataset(path, metadata=metadata)
+    for i in range(frames):
+        h5_data = h5file.get_next_data_group()
+        set_translation(h5_data, 'translation', translation, stamp_sec=i)
+        set_pose(h5_data, 'pose', translation, quaternion, 'map', 'base_link', stamp_sec=i)
+        set_uint8(h5_data, 'flag', i % 256, stamp_sec=i)
+    h5file.close()
+    return time.perf_counter() - start
+
+def read_metadata(path:str) -> float:
+    with H5DatasetReader(path) as reader:
+        start = time.perf_counter()
+        metadata = reader.get_metadata('pose')
+        metadata[H5_ATTR_STAMPSEC], metadata[H5_ATTR_FRAMEID]
+        return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the metadata storage.')
+    parser.add_argument('--frames', type=int, default=10000)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        print('{:<8} {:>12} {:>12} {:>12}'.format('metadata', 'write[fps]', 'size[MB]', 'read[ms]'))
+        for metadata in [METADATA_ATTRS, METADATA_TABLE]:
+            path = os.path.join(tmpdir, metadata + '.hdf5')
+            elapsed = write(path, metadata, args.frames)
+            size = os.path.getsize(path) / 2**20
+            read_time = read_metadata(path)
+            print('{:<8} {:>12.1f} {:>12.2f} {:>12.2f}'.format(metadata, args.frames / elapsed, size, read_time * 1e3))
+
+if __name__ == '__main__':
+    main()
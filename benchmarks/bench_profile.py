@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Compare the HDF5 file profiles of H5Dataset and H5DatasetReader.
+
+Writes the same frames of images, depth maps and poses with each writing
+profile, then reads random frames with each reading profile. Reports the
+write throughput, the file size, the open time and the random read rate.
+The read pass is repeated, so the chunk cache and the page buffer of the
+'train-read' profile are warm in the second epoch.
+
+    python benchmarks/bench_profile.py --frames 2000 --layout stacked
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Tuple
+
+import numpy as np
+
+from h5datacreator import *
+from synthetic import make_bgr8, make_depth
+
+WRITE_PROFILES = ['default', 'record', 'convert']
+READ_PROFILES = ['default', 'train-read']
+
+def write(path:str, profile:str, layout:str, frames:int, height:int, width:int) -> float:
+    image = make_bgr8(height, width)
+    depth = make_depth(height, width)
+    translation = np.zeros(3, dtype=np.float64)
+    quaternion = np.array([0.0, 0.0, 0.0, 1.0])
+
+    start = time.perf_counter()
+    h5file = H5Dataset(path, layout=layout, profile=profile)
+    for i in range(frames):
+        h5_data = h5file.get_next_data_group()
+        set_bgr8(h5_data, 'image', image, 'camera', stamp_sec=i)
+        set_depth(h5_data, 'depth', depth, 'camera', stamp_sec=i)
+        set_pose(h5_data, 'pose', translation, quaternion, 'map', 'camera', stamp_sec=i)
+    h5file.close()
+    return time.perf_counter() - start
+
+def read(path:str, profile:str, indices:np.ndarray, epochs:int) -> Tuple[float, float]:
+    start = time.perf_counter()
+    # The cache of the reader is disabled to measure HDF5.
+    reader = H5DatasetReader(path, cache_bytes=0, profile=profile)
+    open_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(epochs):
+        for index in indices.tolist():
+            reader.get(index, 'image')
+            reader.get(index, 'depth')
+            reader.get(index, 'pose')
+    reader.close()
+    return open_time, time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the HDF5 file profiles.')
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--height', type=int, default=120)
+    parser.add_argument('--width', type=int, default=160)
+    parser.add_argument('--layout', type=str, default=LAYOUT_STACKED, choices=[LAYOUT_GROUP, LAYOUT_STACKED])
+    parser.add_argument('--reads', type=int, default=1000)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    indices = np.random.default_rng(0).integers(0, args.frames, size=args.reads)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        print('{:<10} {:>10} {:>10} | {:<10} {:>10} {:>10}'.format('write', 'write[Hz]', 'size[MB]', 'read', 'open[ms]', 'read[Hz]'))
+        for write_profile in WRITE_PROFILES:
+            path = os.path.join(tmpdir, write_profile + '.hdf5')
+            elapsed = write(path, write_profile, args.layout, args.frames, args.height, args.width)
+            size = os.path.getsize(path) / 2**20
+            for read_profile in READ_PROFILES:
+                open_time, read_time = read(path, read_profile, indices, args.epochs)
+                print('{:<10} {:>10.1f} {:>10.2f} | {:<10} {:>10.2f} {:>10.1f}'.format(
+                    write_profile, args.frames / elapsed, size, read_profile, open_time * 1e3, args.reads * args.epochs / read_time))
+
+if __name__ == '__main__':
+    main()
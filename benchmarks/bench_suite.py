@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite of the 'set_*' writers and the layouts.
+
+Writes synthetic frames of every 'set_*' type in each layout, and reports the
+write throughput (frames/s, MB/s), the bytes per frame, the peak RSS and the
+sequential and random read latency of H5DatasetReader. Each case runs in a new
+process, so that the peak RSS is that of the case. Then measures the open time
+and the 'get_maximum_data_index' latency against the number of frames.
+
+The results are written to a JSON file with the versions, so that two versions
+can be compared with '--compare'.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --quick --output new.json --compare results.json
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import h5py
+import numpy as np
+
+from h5datacreator import *
+from synthetic import make_bgr8, make_mono16, make_depth, make_points, make_labels, make_semantic2d
+
+# Layouts of '/data': name -> (layout, metadata)
+LAYOUTS:Dict[str, Tuple[str, str]] = {
+    'group': (LAYOUT_GROUP, METADATA_ATTRS),
+    'table': (LAYOUT_GROUP, METADATA_TABLE),
+    'stacked': (LAYOUT_STACKED, None),
+}
+
+# 200^3 voxels of 0.8 m around the sensor.
+VOXEL_SIZE:float = 0.8
+VOXELS_MIN:Tuple[float, float, float] = (-80.0, -80.0, -80.0)
+VOXELS_MAX:Tuple[float, float, float] = (80.0, 80.0, 80.0)
+
+Writer = Callable[[Any, int], None]
+
+def _scalar(setter:Callable, value:Any) -> Callable[[], Tuple[int, Writer]]:
+    return lambda: (np.asarray(value).nbytes, lambda g, i: setter(g, 'data', value, stamp_sec=i))
+
+def _image(setter:Callable, channels:int) -> Callable[[], Tuple[int, Writer]]:
+    def factory() -> Tuple[int, Writer]:
+        bgr8 = make_bgr8()
+        image = bgr8[:, :, 0].copy() if channels == 1 else bgr8 if channels == 3 else np.concatenate([bgr8, bgr8[:, :, :1]], axis=2)
+        return image.nbytes, lambda g, i: setter(g, 'data', image, 'camera', stamp_sec=i)
+    return factory
+
+def _mono16() -> Tuple[int, Writer]:
+    image = make_mono16()
+    return image.nbytes, lambda g, i: set_mono16(g, 'data', image, 'camera', stamp_sec=i)
+
+def _depth() -> Tuple[int, Writer]:
+    depth = make_depth()
+    return depth.nbytes, lambda g, i: set_depth(g, 'data', depth, 'camera', stamp_sec=i)
+
+def _disparity() -> Tuple[int, Writer]:
+    disparity = make_depth()
+    return disparity.nbytes, lambda g, i: set_disparity(g, 'data', disparity, 'camera', 0.12, stamp_sec=i)
+
+def _points() -> Tuple[int, Writer]:
+    points = make_points()
+    return points.nbytes, lambda g, i: set_points(g, 'data', points, 'lidar', stamp_sec=i)
+
+def _semantic1d() -> Tuple[int, Writer]:
+    labels = make_labels()
+    return labels.nbytes, lambda g, i: set_semantic1d(g, 'data', labels, 'label', stamp_sec=i)
+
+def _semantic2d() -> Tuple[int, Writer]:
+    mask = make_semantic2d()
+    return mask.nbytes, lambda g, i: set_semantic2d(g, 'data', mask, 'camera', 'label', stamp_sec=i)
+
+def _semantic3d() -> Tuple[int, Writer]:
+    points = make_points()
+    labels = make_labels()
+    return points.nbytes + labels.nbytes, lambda g, i: set_semantic3d(g, 'data', points, labels, 'lidar', 'label', stamp_sec=i)
+
+def _voxel_grid(semantic:bool) -> Callable[[], Tuple[int, Writer]]:
+    def factory() -> Tuple[int, Writer]:
+        points = make_points()
+        labels = make_labels()
+        grid, voxels_min, voxels_max = voxelize(points, VOXEL_SIZE, VOXELS_MIN, VOXELS_MAX, semantic1d=labels if semantic else None)
+        center = tuple(float(v) for v in (np.asarray(voxels_min) + np.asarray(voxels_max)) / 2.0)
+        origin = tuple(int(s) // 2 for s in grid.shape)
+        setter = set_voxel_semantic3d if semantic else set_voxel_points
+        nbytes = grid.points.nbytes + grid.offsets.nbytes + grid.counts.nbytes
+        return nbytes, lambda g, i: setter(g, 'data', grid, 'lidar', VOXEL_SIZE, voxels_min, voxels_max, center, origin, stamp_sec=i)
+    return factory
+
+def _voxelized(semantic:bool) -> Callable[[], Tuple[int, Writer]]:
+    def factory() -> Tuple[int, Writer]:
+        points = make_points()
+        labels = make_labels()
+        if semantic:
+            return points.nbytes + labels.nbytes, lambda g, i: set_voxelized_semantic3d(g, 'data', points, labels, 'lidar', VOXEL_SIZE, VOXELS_MIN, VOXELS_MAX, stamp_sec=i)
+        return points.nbytes, lambda g, i: set_voxelized_points(g, 'data', points, 'lidar', VOXEL_SIZE, VOXELS_MIN, VOXELS_MAX, stamp_sec=i)
+    return factory
+
+def _points_map() -> Tuple[int, Writer]:
+    points = make_points()
+    return points.nbytes, lambda g, i: set_points_map(g, 'data', points, 'map', 'map', stamp_sec=i)
+
+def _semantic3d_map() -> Tuple[int, Writer]:
+    points = make_points()
+    labels = make_labels()
+    return points.nbytes + labels.nbytes, lambda g, i: set_semantic3d_map(g, 'data', points, labels, 'map', 'label', 'map', stamp_sec=i)
+
+def _pose() -> Tuple[int, Writer]:
+    translation = np.array([1.0, 2.0, 3.0], dtype=np.float64)
+    quaternion = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float64)
+    return translation.nbytes + quaternion.nbytes, lambda g, i: set_pose(g, 'data', translation, quaternion, 'map', 'base_link', stamp_sec=i)
+
+def _translation() -> Tuple[int, Writer]:
+    translation = np.array([1.0, 2.0, 3.0], dtype=np.float64)
+    return translation.nbytes, lambda g, i: set_translation(g, 'data', translation, stamp_sec=i)
+
+def _quaternion() -> Tuple[int, Writer]:
+    quaternion = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float64)
+    return quaternion.nbytes, lambda g, i: set_quaternion(g, 'data', quaternion, stamp_sec=i)
+
+def _intrinsic() -> Tuple[int, Writer]:
+    return 4 * 8 + 2 * 4, lambda g, i: set_intrinsic(g, 'data', 500.0, 500.0, 320.0, 240.0, 480, 640, 'camera', stamp_sec=i)
+
+# Name -> factory of (bytes of the payload of a frame, writer of a frame)
+CASES:Dict[str, Callable[[], Tuple[int, Writer]]] = {
+    'uint8': _scalar(set_uint8, np.uint8(1)),
+    'int8': _scalar(set_int8, np.int8(1)),
+    'int16': _scalar(set_int16, np.int16(1)),
+    'int32': _scalar(set_int32, np.int32(1)),
+    'int64': _scalar(set_int64, np.int64(1)),
+    'float16': _scalar(set_float16, np.float16(1.0)),
+    'float32': _scalar(set_float32, np.float32(1.0)),
+    'float64': _scalar(set_float64, np.float64(1.0)),
+    'mono8': _image(set_mono8, 1),
+    'mono16': _mono16,
+    'bgr8': _image(set_bgr8, 3),
+    'rgb8': _image(set_rgb8, 3),
+    'bgra8': _image(set_bgra8, 4),
+    'rgba8': _image(set_rgba8, 4),
+    'depth': _depth,
+    'disparity': _disparity,
+    'points': _points,
+    'semantic1d': _semantic1d,
+    'semantic2d': _semantic2d,
+    'semantic3d': _semantic3d,
+    'voxel_points': _voxel_grid(False),
+    'voxel_semantic3d': _voxel_grid(True),
+    'voxelized_points': _voxelized(False),
+    'voxelized_semantic3d': _voxelized(True),
+    'points_map': _points_map,
+    'semantic3d_map': _semantic3d_map,
+    'pose': _pose,
+    'translation': _translation,
+    'quaternion': _quaternion,
+    'intrinsic': _intrinsic,
+}
+
+def _peak_rss_mb() -> float:
+    # 'ru_maxrss' is in KiB on Linux and in bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+def run_case(name:str, layout_name:str, target_bytes:int, max_frames:int, reads:int, tmpdir:str) -> Dict[str, Any]:
+    nbytes, writer = CASES[name]()
+    frames = int(min(max(target_bytes // max(nbytes, 1), 3), max_frames))
+    layout, metadata = LAYOUTS[layout_name]
+    path = os.path.join(tmpdir, '{0}-{1}.hdf5'.format(name, layout_name))
+    rss_before = _peak_rss_mb()
+
+    start = time.perf_counter()
+    h5file = H5Dataset(path, layout=layout, metadata=metadata)
+    h5_label = h5file.get_label_group('label')
+    for index in range(20):
+        set_label_config(h5_label, index, 'class{0}'.format(index), index, index, index)
+    for i in range(frames):
+        writer(h5file.get_next_data_group(), i)
+    h5file.close()
+    write_time = time.perf_counter() - start
+    size = os.path.getsize(path)
+
+    rng = np.random.default_rng(0)
+    with H5DatasetReader(path, cache_bytes=0) as reader:
+        sequential = list(range(min(reads, frames)))
+        start = time.perf_counter()
+        for index in sequential:
+            reader.get(index, 'data')
+        sequential_time = (time.perf_counter() - start) / len(sequential)
+        random = rng.integers(0, frames, size=len(sequential)).tolist()
+        start = time.perf_counter()
+        for index in random:
+            reader.get(index, 'data')
+        random_time = (time.perf_counter() - start) / len(random)
+    os.remove(path)
+
+    return {
+        'case': name,
+        'layout': layout_name,
+        'frames': frames,
+        'frame_bytes': nbytes,
+        'write_s': write_time,
+        'fps': frames / write_time,
+        'mb_per_s': nbytes * frames / write_time / 2**20,
+        'file_bytes': size,
+        'bytes_per_frame': size / frames,
+        'rss_before_mb': rss_before,
+        'peak_rss_mb': _peak_rss_mb(),
+        'read_sequential_us': sequential_time * 1e6,
+        'read_random_us': random_time * 1e6,
+    }
+
+def run_scaling(frames:int, layout_name:str, repeats:int, tmpdir:str) -> Dict[str, Any]:
+    layout, metadata = LAYOUTS[layout_name]
+    path = os.path.join(tmpdir, 'scaling-{0}-{1}.hdf5'.format(frames, layout_name))
+    h5file = H5Dataset(path, layout=layout, metadata=metadata)
+    h5file.set_batch('data', TYPE_UINT8, np.zeros(frames, dtype=np.uint8), stamp_sec=np.arange(frames))
+    h5file.close()
+
+    start = time.perf_counter()
+    h5file = H5Dataset(path, mode='a')
+    open_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        h5file.get_maximum_data_index()
+    max_index_time = (time.perf_counter() - start) / repeats
+    h5file.close()
+
+    start = time.perf_counter()
+    reader = H5DatasetReader(path)
+    reader_open_time = time.perf_counter() - start
+    reader.close()
+    os.remove(path)
+
+    return {
+        'frames': frames,
+        'layout': layout_name,
+        'open_ms': open_time * 1e3,
+        'get_maximum_data_index_us': max_index_time * 1e6,
+        'reader_open_ms': reader_open_time * 1e3,
+    }
+
+def _run_child(queue:multiprocessing.Queue, func:Callable, args:tuple) -> None:
+    try:
+        queue.put(func(*args))
+    except Exception as e:
+        queue.put({'error': '{0}: {1}'.format(type(e).__name__, e)})
+
+def run_isolated(func:Callable, *args) -> Dict[str, Any]:
+    # A new process per case, so that the peak RSS and the HDF5 caches are not shared between the cases.
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_child, args=(queue, func, args))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def get_environment() -> Dict[str, Any]:
+    try:
+        from importlib.metadata import version
+        package_version = version('h5datacreator')
+    except Exception:
+        package_version = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'h5datacreator': package_version,
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'h5py': h5py.__version__,
+        'hdf5': h5py.version.hdf5_version,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def compare(results:Dict[str, Any], baseline:Dict[str, Any]) -> None:
+    print('\nratio to {0} (> 1 is faster)'.format((baseline['environment'].get('commit') or 'baseline')[:12]))
+    base_cases = {(case['case'], case['layout']): case for case in baseline['cases'] if 'error' not in case}
+    print('{:<22} {:<8} {:>8} {:>10} {:>10} {:>8}'.format('case', 'layout', 'fps', 'seq read', 'rnd read', 'size'))
+    for case in results['cases']:
+        base = base_cases.get((case.get('case'), case.get('layout')))
+        if base is None or 'error' in case:
+            continue
+        print('{:<22} {:<8} {:>8.2f} {:>10.2f} {:>10.2f} {:>8.2f}'.format(
+            case['case'], case['layout'], case['fps'] / base['fps'],
+            base['read_sequential_us'] / case['read_sequential_us'], base['read_random_us'] / case['read_random_us'],
+            case['bytes_per_frame'] / base['bytes_per_frame']))
+    base_scaling = {(row['frames'], row['layout']): row for row in baseline['scaling'] if 'error' not in row}
+    for row in results['scaling']:
+        base = base_scaling.get((row.get('frames'), row.get('layout')))
+        if base is None or 'error' in row:
+            continue
+        print('{:<22} {:<8} open {:>8.2f} max_index {:>8.2f}'.format(
+            '{0} frames'.format(row['frames']), row['layout'], base['open_ms'] / row['open_ms'],
+            base['get_maximum_data_index_us'] / row['get_maximum_data_index_us']))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark suite of the writers and the layouts.')
+    parser.add_argument('--cases', type=str, nargs='*', default=list(CASES.keys()), choices=list(CASES.keys()))
+    parser.add_argument('--layouts', type=str, nargs='*', default=list(LAYOUTS.keys()), choices=list(LAYOUTS.keys()))
+    parser.add_argument('--target-mb', type=float, default=512.0, help='payload written per case [MiB]')
+    parser.add_argument('--max-frames', type=int, default=5000)
+    parser.add_argument('--reads', type=int, default=200)
+    parser.add_argument('--scaling-frames', type=int, nargs='*', default=[1000, 10000, 100000])
+    parser.add_argument('--repeats', type=int, default=1000, help='calls of "get_maximum_data_index"')
+    parser.add_argument('--quick', action='store_true', help='small sizes for a smoke test')
+    parser.add_argument('--output', type=str, default=None, help='path of the JSON results')
+    parser.add_argument('--compare', type=str, default=None, help='path of the JSON results to compare with')
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+    if args.quick is True:
+        args.target_mb = min(args.target_mb, 32.0)
+        args.max_frames = min(args.max_frames, 200)
+        args.reads = min(args.reads, 20)
+        args.scaling_frames = [frames for frames in args.scaling_frames if frames <= 10000]
+
+    results = {'environment': get_environment(), 'args': vars(args), 'cases': [], 'scaling': []}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        print('{:<22} {:<8} {:>7} {:>10} {:>9} {:>13} {:>9} {:>10} {:>10}'.format(
+            'case', 'layout', 'frames', 'fps', 'MB/s', 'bytes/frame', 'rss[MB]', 'seq[us]', 'rnd[us]'))
+        for name in args.cases:
+            for layout_name in args.layouts:
+                result = run_isolated(run_case, name, layout_name, int(args.target_mb * 2**20), args.max_frames, args.reads, tmpdir)
+                if 'error' in result:
+                    result.update({'case': name, 'layout': layout_name})
+                    print('{:<22} {:<8} {}'.format(name, layout_name, result['error']))
+                else:
+                    print('{:<22} {:<8} {:>7} {:>10.1f} {:>9.1f} {:>13.0f} {:>9.1f} {:>10.1f} {:>10.1f}'.format(
+                        name, layout_name, result['frames'], result['fps'], result['mb_per_s'], result['bytes_per_frame'],
+                        result['peak_rss_mb'], result['read_sequential_us'], result['read_random_us']))
+                results['cases'].append(result)
+
+        print('\n{:>10} {:<8} {:>10} {:>16} {:>16}'.format('frames', 'layout', 'open[ms]', 'max_index[us]', 'reader open[ms]'))
+        for frames in args.scaling_frames:
+            for layout_name in args.layouts:
+                result = run_isolated(run_scaling, frames, layout_name, args.repeats, tmpdir)
+                if 'error' in result:
+                    result.update({'frames': frames, 'layout': layout_name})
+                    print('{:>10} {:<8} {}'.format(frames, layout_name, result['error']))
+                else:
+                    print('{:>10} {:<8} {:>10.2f} {:>16.2f} {:>16.2f}'.format(
+                        frames, layout_name, result['open_ms'], result['get_maximum_data_index_us'], result['reader_open_ms']))
+                results['scaling'].append(result)
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
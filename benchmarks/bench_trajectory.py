@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Compare a trajectory stored by 'set_pose' per frame with 'set_trajectory'.
+
+Writes the same odometry with both, then reports the write throughput, the
+file size and the time to get the poses at the timestamps of the sweeps.
+The frames of 'set_pose' are found with the timestamp index and interpolated
+with the same 'interpolate_poses' as the trajectory.
+
+    python benchmarks/bench_trajectory.py --poses 10000 --sweeps 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from h5datacreator import *
+
+def make_odometry(n:int, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    translations = np.cumsum(rng.normal(0.0, 0.05, size=(n, 3)), axis=0)
+    yaw = np.cumsum(rng.normal(0.0, 0.01, size=n))
+    quaternions = np.stack([np.zeros(n), np.zeros(n), np.sin(yaw / 2.0), np.cos(yaw / 2.0)], axis=1)
+    return np.hstack([translations, quaternions])
+
+def write_poses(path:str, stamps:np.ndarray, poses:np.ndarray) -> float:
+    start = time.perf_counter()
+    h5file = H5Dataset(path)
+    for stamp, pose in zip(stamps.tolist(), poses):
+        set_pose(h5file.get_next_data_group(), 'odom', pose[:3], pose[3:], 'map', 'base_link', stamp // 1000000000, stamp % 1000000000)
+    h5file.close()
+    return time.perf_counter() - start
+
+def write_trajectory(path:str, stamps:np.ndarray, poses:np.ndarray) -> float:
+    start = time.perf_counter()
+    h5file = H5Dataset(path)
+    h5_common = h5file.get_common_group('trajectory')
+    set_trajectory(h5_common, 'odom', poses[:0], stamps[:0], 'map', 'base_link')
+    for i in range(stamps.shape[0]):
+        append_trajectory(h5_common, 'odom', poses[i:i + 1], stamps[i:i + 1])
+    # H5Dataset needs a frame in '/data'.
+    h5file.get_next_data_group()
+    h5file.close()
+    return time.perf_counter() - start
+
+def query_poses(path:str, query:np.ndarray) -> float:
+    with H5DatasetReader(path) as reader:
+        start = time.perf_counter()
+        timestamps = reader.get_timestamp_index()
+        poses = []
+        for stamp in query.tolist():
+            before, after = timestamps.get_interval_indices('odom', stamp)
+            if before < 0 or after < 0:
+                poses.append(np.full(7, np.nan))
+                continue
+            items = [reader.get(index, 'odom') for index in (before, after)]
+            item_stamps = np.array([get_stamp_ns(item.stamp_sec, item.stamp_nsec) for item in items])
+            item_poses = np.array([np.concatenate([item.data[SUBTYPE_TRANSLATION], item.data[SUBTYPE_ROTATION]]) for item in items])
+            poses.append(interpolate_poses(item_stamps, item_poses, np.array([stamp]))[0])
+        return time.perf_counter() - start
+
+def query_trajectory(path:str, query:np.ndarray) -> float:
+    with H5DatasetReader(path) as reader:
+        start = time.perf_counter()
+        reader.get_poses('trajectory/odom', query)
+        return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the trajectory storage.')
+    parser.add_argument('--poses', type=int, default=10000)
+    parser.add_argument('--sweeps', type=int, default=1000)
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    # 100 Hz odometry and the sweeps at random times in the trajectory.
+    stamps = np.arange(args.poses, dtype=np.int64) * 10000000
+    poses = make_odometry(args.poses)
+    query = np.sort(np.random.default_rng(1).integers(0, stamps[-1], size=args.sweeps))
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        print('{:<12} {:>12} {:>12} {:>12}'.format('storage', 'write[Hz]', 'size[MB]', 'query[ms]'))
+        for name, write, query_func in [('set_pose', write_poses, query_poses), ('trajectory', write_trajectory, query_trajectory)]:
+            path = os.path.join(tmpdir, name + '.hdf5')
+            elapsed = write(path, stamps, poses)
+            size = os.path.getsize(path) / 2**20
+            query_time = query_func(path, query)
+            print('{:<12} {:>12.1f} {:>12.2f} {:>12.2f}'.format(name, args.poses / elapsed, size, query_time * 1e3))
+
+if __name__ == '__main__':
+    main()
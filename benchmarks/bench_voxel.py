@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Measure the voxelization of a map-scale point cloud.
+
+Compares 'voxelize' with binning the points into an object grid with Python
+loops, and measures 'set_voxelized_semantic3d' including the write.
+
+    python benchmarks/bench_voxel.py --points 10000000 --voxel-size 0.5
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from h5datacreator import *
+from synthetic import make_points, make_labels
+
+def voxelize_loop(points:np.ndarray, voxel_size:float) -> np.ndarray:
+    voxels_min = points[:, ::-1].min(axis=0)
+    shape = tuple((np.floor((points[:, ::-1].max(axis=0) - voxels_min) / voxel_size) + 1).astype(int).tolist())
+    lists = {}
+    for point in points.tolist():
+        key = tuple(int((point[2 - axis] - voxels_min[axis]) // voxel_size) for axis in range(3))
+        lists.setdefault(key, []).append(tuple(point))
+    grid = np.empty(shape, dtype=object)
+    dtype = DTYPE_NUMPY[SUBTYPE_VOXEL_POINTS]
+    for index in np.ndindex(shape):
+        grid[index] = np.array(lists.get(index, []), dtype=dtype)
+    return grid
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark of the voxelization.')
+    parser.add_argument('--points', type=int, default=10000000)
+    parser.add_argument('--voxel-size', type=float, default=0.5)
+    parser.add_argument('--loop-points', type=int, default=200000, help='number of points for the Python loop')
+    parser.add_argument('--dir', type=str, default=None)
+    args = parser.parse_args()
+
+    points = make_points(args.points)
+    labels = make_labels(args.points)
+
+    print('{:<24} {:>12} {:>14}'.format('method', 'time[s]', 'points[M/s]'))
+    loop_points = points[:args.loop_points]
+    start = time.perf_counter()
+    voxelize_loop(loop_points, args.voxel_size)
+    elapsed = time.perf_counter() - start
+    print('{:<24} {:>12.3f} {:>14.2f}'.format('python loop', elapsed, loop_points.shape[0] / elapsed * 1e-6))
+
+    start = time.perf_counter()
+    grid, _, _ = voxelize(points, args.voxel_size, semantic1d=labels)
+    elapsed = time.perf_counter() - start
+    print('{:<24} {:>12.3f} {:>14.2f}'.format('voxelize', elapsed, points.shape[0] / elapsed * 1e-6))
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        h5file = H5Dataset(os.path.join(tmpdir, 'voxel.hdf5'))
+        start = time.perf_counter()
+        set_voxelized_semantic3d(h5file.get_next_data_group(), 'map', points, labels, 'map', args.voxel_size, map_id='map')
+        h5file.close()
+        elapsed = time.perf_counter() - start
+        print('{:<24} {:>12.3f} {:>14.2f}'.format('set_voxelized_semantic3d', elapsed, points.shape[0] / elapsed * 1e-6))
+    print('grid {0}, {1} voxels occupied'.format(grid.shape, int(np.count_nonzero(grid.counts))))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Synthetic data for the benchmarks.
+
+The generators produce smooth structures with noise, so that the compressibility
+is closer to the sensor data than uniform random numbers.
+"""
+
+import numpy as np
+
+def make_bgr8(height:int=1080, width:int=1920, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([x / width, y / height, (x + y) / (width + height)], axis=-1) * 200.0
+    noise = rng.normal(0.0, 4.0, size=base.shape)
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+def make_mono16(height:int=480, width:int=640, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = (x / width + y / height) * 20000.0
+    return np.clip(base + rng.normal(0.0, 50.0, size=base.shape), 0, 65535).astype(np.uint16)
+
+def make_depth(height:int=480, width:int=640, sparsity:float=0.0, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    depth = 2.0 + 30.0 * (y / height) + rng.normal(0.0, 0.01, size=(height, width))
+    depth = np.round(depth, 3).astype(np.float32)
+    if sparsity > 0.0:
+        depth[rng.random((height, width)) < sparsity] = 0.0
+    return depth
+
+def make_points(n:int=131072, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    azimuth = rng.uniform(-np.pi, np.pi, n)
+    elevation = rng.uniform(-0.4, 0.2, n)
+    distance = rng.uniform(2.0, 80.0, n)
+    points = np.stack([
+        distance * np.cos(elevation) * np.cos(azimuth),
+        distance * np.cos(elevation) * np.sin(azimuth),
+        distance * np.sin(elevation),
+    ], axis=-1)
+    return np.round(points, 3).astype(np.float32)
+
+def make_labels(n:int=131072, classes:int=20, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.integers(0, classes, n)).astype(np.uint8)
+
+def make_semantic2d(height:int=480, width:int=640, classes:int=20, block:int=32, seed:int=0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, classes, size=((height + block - 1) // block, (width + block - 1) // block))
+    return np.kron(blocks, np.ones((block, block), dtype=np.int64))[:height, :width].astype(np.uint8)
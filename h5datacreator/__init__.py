@@ -1,11 +1,91 @@
 # -*- coding: utf-8 -*-
 
-from typing import Union, Tuple
+from typing import Any, Callable, Dict, List, Union, Tuple
+import copy
+import functools
 import os
+import time
+import weakref
 import h5py
 import numpy as np
 
 from .structure import *
+from .codec import *
+from .stacked import H5StackedGroup, SWMR_STRING_BYTES, _H5StackedStore
+from .timestamp import H5TimestampIndex, get_stamp_ns
+from .metatable import _H5MetadataTable, TABLE_MEMBER_ATTRS, read_metadata_table
+from .dedup import _H5DedupIndex, DEDUP_MAX_BYTES
+from .stats import _H5WriteStats
+from .swmr import _H5SwmrHeader, SWMR_LIBVER, read_swmr_header
+from .checkpoint import _H5Checkpoint, _has_checkpoint, _recover, recover_h5dataset
+from .tuning import H5FileProfile, PROFILE_DEFAULT, PROFILE_RECORD, PROFILE_CONVERT, PROFILE_TRAIN_READ, FILE_PROFILES, get_file_profile, open_h5file
+from .ingest import H5IngestSource, INGEST_PREFETCH, read_source, load_manifest, ingest_files
+from .writer import H5AsyncWriter, BACKPRESSURE_BLOCK, BACKPRESSURE_DROP_OLDEST, BACKPRESSURE_ERROR
+from .shard import get_shard_path, finalize_shards, create_sharded_dataset, _has_virtual_dataset
+from .merge import merge_datasets
+from .reader import H5DatasetReader, H5Item, READER_CACHE_BYTES
+from .voxel import H5VoxelGrid, create_voxel_grid, voxelize
+from .spatial import MAP_TILE_SIZE, get_morton_code, get_tile_indices, sort_points_map
+from .quantize import ENCODING_QUANTIZED, quantize, dequantize
+from .depth import H5DepthCodec, ENCODING_DEPTH_DENSE, ENCODING_DEPTH_SPARSE, DEPTH_SPARSE_DENSITY, DEPTH_CODEC_LOSSLESS, DEPTH_CODEC_MM, decode_depth
+from .label import H5LabelCodec, ENCODING_LABEL_PACKED, ENCODING_LABEL_RLE, LABEL_CODEC_AUTO, LABEL_CODEC_PACKED, LABEL_CODEC_RLE, get_label_bits, pack_labels, unpack_labels, decode_labels
+from .trajectory import H5Trajectory, _H5TrajectoryWriter, _check_trajectory, _create_trajectory, slerp, interpolate_poses, read_trajectory
+from .image import H5ImageCodec, IMAGE_TYPES, ENCODING_PNG, ENCODING_JPEG, ENCODING_WEBP, IMAGE_CODEC_PNG, IMAGE_CODEC_JPEG, IMAGE_CODEC_WEBP, encode_images, decode_image, decode_images
+
+# Open H5Datasets by the file number of HDF5, so that the 'set_*' functions can find the settings of the H5Dataset from a group.
+_H5DATASETS:weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+# Number of open H5Datasets with 'stats', so that the 'set_*' functions skip the lookup of the statistics when it is 0.
+_WRITE_STATS_COUNT:int = 0
+
+# Shape of a frame and the attributes of the types written by 'H5Dataset.set_batch'. 'None' is any length.
+_BATCH_SHAPES:Dict[str, Tuple[Tuple[int, ...], str]] = {
+    TYPE_UINT8: ((), '(N,)'),
+    TYPE_INT8: ((), '(N,)'),
+    TYPE_INT16: ((), '(N,)'),
+    TYPE_INT32: ((), '(N,)'),
+    TYPE_INT64: ((), '(N,)'),
+    TYPE_FLOAT16: ((), '(N,)'),
+    TYPE_FLOAT32: ((), '(N,)'),
+    TYPE_FLOAT64: ((), '(N,)'),
+    TYPE_MONO8: ((None, None), '(N, H, W)'),
+    TYPE_MONO16: ((None, None), '(N, H, W)'),
+    TYPE_BGR8: ((None, None, 3), '(N, H, W, 3)'),
+    TYPE_RGB8: ((None, None, 3), '(N, H, W, 3)'),
+    TYPE_BGRA8: ((None, None, 4), '(N, H, W, 4)'),
+    TYPE_RGBA8: ((None, None, 4), '(N, H, W, 4)'),
+    TYPE_DEPTH: ((None, None), '(N, H, W)'),
+    TYPE_DISPARITY: ((None, None), '(N, H, W)'),
+    TYPE_SEMANTIC2D: ((None, None), '(N, H, W)'),
+    TYPE_TRANSLATION: ((3,), '(N, 3)'),
+    TYPE_QUATERNION: ((4,), '(N, 4)'),
+}
+_BATCH_SCALAR_TYPES:Tuple[str, ...] = (TYPE_UINT8, TYPE_INT8, TYPE_INT16, TYPE_INT32, TYPE_INT64, TYPE_FLOAT16, TYPE_FLOAT32, TYPE_FLOAT64)
+_BATCH_ARRAY_ATTRS:Dict[str, str] = {
+    TYPE_TRANSLATION: 'x,y,z',
+    TYPE_QUATERNION: 'x,y,z,w',
+}
+
+def _instrument(func:Callable) -> Callable:
+    # Count a call of a 'set_*' function or method in the statistics of its H5Dataset.
+    # The first two arguments are the group (or the H5Dataset) and the tag.
+    function = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _WRITE_STATS_COUNT < 1:
+            return func(*args, **kwargs)
+        h5_group = args[0] if len(args) > 0 else kwargs.get('h5_group', kwargs.get('h5group'))
+        tag = args[1] if len(args) > 1 else kwargs.get('tag')
+        h5dataset = h5_group if isinstance(h5_group, H5Dataset) else _get_h5dataset(h5_group)
+        stats = None if h5dataset is None else h5dataset._get_write_stats()
+        if stats is None or stats.begin(str(tag), function) is False:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.end(time.perf_counter() - start)
+    return wrapper
 
 class H5Dataset():
     """H5Dataset
@@ -16,12 +96,50 @@ class H5Dataset():
         path (str): path of H5Dataset
     """
 
-    def __init__(self, path:str, mode='w') -> None:
+    def __init__(self, path:str, mode='w', layout:str=None, codec_policies:Dict[str, H5CodecPolicy]=None, metadata:str=None, dedup:bool=False,
+        stats:bool=False, stats_callback:Callable[[Dict[str, Any]], None]=None, stats_interval:float=None, profile:Union[str, H5FileProfile]=None,
+        swmr:bool=False, swmr_interval:float=1.0, checkpoint_frames:int=None, checkpoint_interval:float=None) -> None:
         """__init__
 
+        In 'a' mode, editing resumes at the last frame, and 'get_next_data_group' appends after it.
+        If the file was written with checkpoints and not closed, the partial frames after the last checkpoint are removed first.
+
         Args:
             path (str): path of H5Dataset
             mode (str): File mode ['w', 'a']
+            layout (str, optional): Layout of '/data' [LAYOUT_GROUP, LAYOUT_STACKED].
+                LAYOUT_GROUP stores each frame as a group '/data/[index]'.
+                LAYOUT_STACKED stores each tag as a dataset '/data/[tag]' with a leading frame axis.
+                If None, LAYOUT_GROUP for a new file and the stored layout for an existing file. Defaults to None.
+            codec_policies (Dict[str, H5CodecPolicy], optional): Chunking and compression policies by TYPE_* constant.
+                They take precedence over the defaults registered by 'register_codec_policy'. Defaults to None.
+            metadata (str, optional): Storage of the metadata of LAYOUT_GROUP [METADATA_ATTRS, METADATA_TABLE].
+                METADATA_ATTRS writes the attributes of each dataset.
+                METADATA_TABLE writes the scalar attributes of each tag to a compound dataset '/meta/[tag]' with a row per frame.
+                LAYOUT_STACKED always stores the metadata in '/meta/[tag]'.
+                If None, METADATA_ATTRS for a new file and the stored mode for an existing file. Defaults to None.
+            dedup (bool, optional): If True, a dataset or a composite group with the same data and attributes as an object written before
+                is stored as a hard link to it. Not supported by LAYOUT_STACKED. Defaults to False.
+            stats (bool, optional): If True, the calls, bytes and time of the 'set_*' functions are counted by tag.
+                The summary is returned by 'close' and 'get_write_stats'. Defaults to False.
+            stats_callback (Callable[[Dict[str, Any]], None], optional): function called with the summary of the statistics on close
+                and every 'stats_interval' seconds. If not None, 'stats' is enabled. Defaults to None.
+            stats_interval (float, optional): period of 'stats_callback' [sec]. If None, only on close. Defaults to None.
+            profile (str | H5FileProfile, optional): file-level settings of HDF5, or the name of a preset ['record', 'convert', 'train-read'].
+                If None, the defaults of HDF5. Defaults to None.
+            swmr (bool, optional): If True, the file is written in SWMR mode, so that H5DatasetReader with 'swmr=True' can read it while it is written.
+                Only for a new file of LAYOUT_STACKED. The first frame creates the datasets of all tags and SWMR mode starts at the second frame.
+                Defaults to False.
+            swmr_interval (float, optional): period of showing the written frames to the readers [sec]. 0 shows every frame. Defaults to 1.0.
+            checkpoint_frames (int, optional): If not None, a checkpoint is written every this number of frames. Defaults to None.
+            checkpoint_interval (float, optional): If not None, a checkpoint is written every this number of seconds. Defaults to None.
+                A checkpoint writes the buffered rows, records the complete frames and the rows of the appendable datasets in '/header',
+                and flushes the file. A file with checkpoints keeps them in 'a' mode.
+
+        Raises:
+            ValueError: if 'layout' or 'metadata' differs from the existing file, METADATA_TABLE is used with LAYOUT_STACKED,
+                'dedup' is used with LAYOUT_STACKED, 'swmr' is used without a new file of LAYOUT_STACKED, 'checkpoint_*' is used with 'swmr',
+                or a master file of LAYOUT_STACKED created by 'finalize_shards' is opened in 'a' mode.
         """
         fullpath = os.path.abspath(path)
 
@@ -31,58 +149,357 @@ class H5Dataset():
         if mode not in ['w', 'a']:
             raise ValueError('"mode" must be "w" or "a".')
 
-        self.__h5file = h5py.File(fullpath, mode=mode)
-
-        if isinstance(self.__h5file.get(H5_KEY_DATA), h5py.Group) is False:
-            self.__h5file.create_group(H5_KEY_DATA)
-            self.__current_index = -1
+        if layout not in [None, LAYOUT_GROUP, LAYOUT_STACKED]:
+            raise ValueError('"layout" must be "{0}" or "{1}".'.format(LAYOUT_GROUP, LAYOUT_STACKED))
+
+        if metadata not in [None, METADATA_ATTRS, METADATA_TABLE]:
+            raise ValueError('"metadata" must be "{0}" or "{1}".'.format(METADATA_ATTRS, METADATA_TABLE))
+        if layout == LAYOUT_STACKED and metadata == METADATA_TABLE:
+            raise ValueError('"metadata" of "{0}" is always stored in "/{1}".'.format(LAYOUT_STACKED, H5_KEY_META))
+
+        if swmr is True:
+            if mode != 'w' or layout != LAYOUT_STACKED:
+                raise ValueError('"swmr" requires mode "w" and layout "{0}".'.format(LAYOUT_STACKED))
+            if swmr_interval < 0.0:
+                raise ValueError('"swmr_interval" must be 0 or greater.')
+            if checkpoint_frames is not None or checkpoint_interval is not None:
+                # SWMR mode commits the frames every 'swmr_interval' in the same record.
+                raise ValueError('"checkpoint_frames" and "checkpoint_interval" can not be used with "swmr". Use "swmr_interval".')
+            # SWMR requires the file format of HDF5 1.10 or later.
+            profile = get_file_profile(profile)
+            if profile.libver is None:
+                profile = copy.copy(profile)
+                profile.libver = SWMR_LIBVER
+
+        if checkpoint_frames is not None and checkpoint_frames < 1:
+            raise ValueError('"checkpoint_frames" must be greater than 0.')
+        if checkpoint_interval is not None and checkpoint_interval <= 0.0:
+            raise ValueError('"checkpoint_interval" must be positive.')
+
+        self.__h5file = open_h5file(fullpath, mode, profile)
+
+        h5_data:h5py.Group = self.__h5file.get(H5_KEY_DATA)
+        if isinstance(h5_data, h5py.Group) is False:
+            h5_data = self.__h5file.create_group(H5_KEY_DATA)
+            h5_data.attrs[H5_ATTR_LAYOUT] = LAYOUT_GROUP if layout is None else layout
+            h5_data.attrs[H5_ATTR_METADATA] = METADATA_ATTRS if metadata is None else metadata
+
+        self.__layout:str = h5_data.attrs.get(H5_ATTR_LAYOUT, LAYOUT_GROUP)
+        if isinstance(self.__layout, bytes):
+            self.__layout = self.__layout.decode('utf-8')
+        if layout is not None and layout != self.__layout:
+            self.__h5file.close()
+            raise ValueError('"layout" of "{0}" is "{1}".'.format(fullpath, self.__layout))
+
+        self.__metadata:str = h5_data.attrs.get(H5_ATTR_METADATA, METADATA_ATTRS)
+        if isinstance(self.__metadata, bytes):
+            self.__metadata = self.__metadata.decode('utf-8')
+        if metadata is not None and metadata != self.__metadata:
+            self.__h5file.close()
+            raise ValueError('"metadata" of "{0}" is "{1}".'.format(fullpath, self.__metadata))
+
+        if dedup is True and self.__layout == LAYOUT_STACKED:
+            self.__h5file.close()
+            raise ValueError('"dedup" is not supported by "{0}".'.format(LAYOUT_STACKED))
+        if mode == 'a' and self.__layout == LAYOUT_STACKED and _has_virtual_dataset(h5_data):
+            self.__h5file.close()
+            raise ValueError('"{0}" is a master file of shards in "{1}", and its virtual datasets can not be appended.'.format(fullpath, LAYOUT_STACKED))
+
+        # The frames of a writer that died after its last checkpoint are removed before anything is appended.
+        self.__recovery:Dict[str, Any] = None
+        has_checkpoint = mode == 'a' and _has_checkpoint(self.__h5file)
+        if has_checkpoint is True:
+            self.__recovery = _recover(self.__h5file)
+
+        self.__codec_policies:Dict[str, H5CodecPolicy] = {} if codec_policies is None else dict(codec_policies)
+        self.__dedup:_H5DedupIndex = _H5DedupIndex(self.__h5file) if dedup is True else None
+        self.__write_stats:_H5WriteStats = None
+        if stats is True or stats_callback is not None:
+            self.__write_stats = _H5WriteStats(stats_callback, stats_interval)
+            global _WRITE_STATS_COUNT
+            _WRITE_STATS_COUNT += 1
+
+        self.__stacked:_H5StackedStore = None
+        if self.__layout == LAYOUT_STACKED:
+            self.__stacked = _H5StackedStore(self.__h5file, swmr=swmr)
+        self.__timestamps:H5TimestampIndex = H5TimestampIndex(self.__h5file)
+        self.__metadata_table:_H5MetadataTable = None
+        if self.__metadata == METADATA_TABLE:
+            self.__metadata_table = _H5MetadataTable(self.__h5file)
+        self.__trajectories:Dict[str, _H5TrajectoryWriter] = {}
+
+        # The frame index is read once from '/header/length', and '/data' is scanned only if it does not exist.
+        self.__max_index:int = -1
+        h5_header_length:h5py.Dataset = self.__h5file.get(f'{H5_KEY_HEADER}/{H5_KEY_LENGTH}')
+        if h5_header_length is not None:
+            self.__max_index = int(h5_header_length[()]) - 1
+        else:
+            self.__max_index = self.__scan_maximum_data_index()
+        self.__current_index:int = self.__max_index
+
+        self.__swmr_enabled:bool = swmr
+        self.__swmr_interval:float = swmr_interval
+        self.__swmr:_H5SwmrHeader = None
+        self.__swmr_commit_time:float = 0.0
+
+        self.__checkpoint:_H5Checkpoint = None
+        self.__checkpoint_frames:int = checkpoint_frames
+        self.__checkpoint_interval:float = checkpoint_interval
+        self.__checkpoint_length:int = self.__max_index + 1
+        self.__checkpoint_time:float = time.perf_counter()
+        if checkpoint_frames is not None or checkpoint_interval is not None or has_checkpoint is True:
+            self.__checkpoint = _H5Checkpoint(self.__h5file, self.__layout)
+            # '/header/live' is set until close, so that a crash is detected on the next open.
+            self.__checkpoint.commit(self.__checkpoint_length)
+
+        _H5DATASETS[self.__h5file.id.fileno] = self
+
+    def __write_header(self, length:int) -> None:
+        if isinstance(self.__h5file.get(H5_KEY_HEADER), h5py.Group) is False:
+            h5_header:h5py.Group = self.__h5file.create_group(H5_KEY_HEADER)
+            h5_header.create_dataset(H5_KEY_LENGTH, data=length)
         else:
-            self.__current_index = 0
+            h5_header_length:h5py.Dataset = self.__h5file[f'{H5_KEY_HEADER}/{H5_KEY_LENGTH}']
+            h5_header_length[()] = length
+
+    def __scan_maximum_data_index(self) -> int:
+        h5_data:h5py.Group = self.__h5file[H5_KEY_DATA]
+        if self.__stacked is None:
+            return max([int(key) for key in h5_data.keys()], default=-1)
+        max_index = -1
+        h5_meta:h5py.Group = self.__h5file.get(H5_KEY_META)
+        if h5_meta is not None:
+            for h5_meta_tag in h5_meta.values():
+                h5_index:h5py.Dataset = h5_meta_tag.get(H5_KEY_INDEX)
+                if h5_index is not None and h5_index.shape[0] > 0:
+                    max_index = max(max_index, int(h5_index[-1]))
+        return max_index
+
+    @property
+    def layout(self) -> str:
+        """layout
+
+        Returns:
+            str: Layout of '/data' [LAYOUT_GROUP, LAYOUT_STACKED]
+        """
+        return self.__layout
+
+    @property
+    def metadata(self) -> str:
+        """metadata
+
+        Returns:
+            str: Storage of the metadata [METADATA_ATTRS, METADATA_TABLE]
+        """
+        return self.__metadata
+
+    def _get_metadata_table(self) -> _H5MetadataTable:
+        return self.__metadata_table
+
+    def _get_dedup_index(self) -> _H5DedupIndex:
+        return self.__dedup
+
+    def _get_write_stats(self) -> _H5WriteStats:
+        return self.__write_stats
+
+    def get_write_stats(self) -> Dict[str, Any]:
+        """get_write_stats
+
+        Get the statistics of the 'set_*' calls so far.
+
+        Returns:
+            Dict[str, Any]: {'elapsed_s', 'close_s', 'calls', 'bytes', 'total_s', 'validation_s', 'hdf5_s', 'attrs_s', 'tags'}, or None if 'stats' is False.
+                'tags' holds {'function', 'calls', 'bytes', 'total_s', 'validation_s', 'hdf5_s', 'attrs_s'} of each tag.
+        """
+        return None if self.__write_stats is None else self.__write_stats.get_summary()
+
+    def _get_trajectory_writer(self, h5_traj:h5py.Group) -> _H5TrajectoryWriter:
+        writer = self.__trajectories.get(h5_traj.name)
+        if writer is None:
+            writer = _H5TrajectoryWriter(h5_traj)
+            self.__trajectories[h5_traj.name] = writer
+        return writer
+
+    def get_dedup_info(self) -> Dict[str, Any]:
+        """get_dedup_info
+
+        Get the hit rate of the deduplication.
+
+        Returns:
+            Dict[str, Any]: {'hits', 'misses', 'hit_rate', 'saved_bytes', 'types'}, or None if 'dedup' is False.
+                'types' holds {'hits', 'misses', 'saved_bytes'} of each type.
+        """
+        return None if self.__dedup is None else self.__dedup.get_info()
+
+    def get_codec_policy(self, type_:str) -> H5CodecPolicy:
+        """get_codec_policy
+
+        Get the chunking and compression policy of a type in this H5Dataset.
+
+        Args:
+            type_ (str): TYPE_* constant
+
+        Returns:
+            H5CodecPolicy: the policy of the type
+        """
+        policy = self.__codec_policies.get(type_)
+        if policy is None:
+            policy = get_codec_policy(type_)
+        return policy
+
+    def get_timestamp_index(self) -> H5TimestampIndex:
+        """get_timestamp_index
+
+        Get the table of the timestamps of each tag.
+
+        Returns:
+            H5TimestampIndex: the table of the timestamps
+        """
+        return self.__timestamps
 
-    def close(self) -> None:
+    def close(self) -> Dict[str, Any]:
         """close
 
         Close H5Dataset. Be sure to do this on exit.
+        An H5Dataset without frames is closed with the length 0.
+
+        Returns:
+            Dict[str, Any]: the summary of 'get_write_stats' including the time to close, or None if 'stats' is False.
         """
-        if isinstance(self.__h5file.get(H5_KEY_HEADER), h5py.Group) is False:
-            h5_header:h5py.Group = self.__h5file.create_group(H5_KEY_HEADER)
-            h5_header.create_dataset(H5_KEY_LENGTH, data=self.get_maximum_data_index()+1)
+        start = time.perf_counter()
+        self.__flush_buffers()
+        if self.__swmr is not None:
+            self.__swmr.commit(self.__max_index+1, live=False)
+        elif self.__checkpoint is not None:
+            self.__checkpoint.commit(self.__max_index+1, live=False)
         else:
-            h5_header_length:h5py.Dataset = self.__h5file[f'{H5_KEY_HEADER}/{H5_KEY_LENGTH}']
-            h5_header_length[()] = self.get_maximum_data_index()+1
+            self.__write_header(self.__max_index+1)
 
+        _H5DATASETS.pop(self.__h5file.id.fileno, None)
         self.__h5file.close()
         self.__current_index = -1
         self.__h5file = None
 
+        if self.__write_stats is None:
+            return None
+        global _WRITE_STATS_COUNT
+        _WRITE_STATS_COUNT -= 1
+        write_stats = self.__write_stats
+        self.__write_stats = None
+        return write_stats.close(time.perf_counter() - start)
+
+    def __flush_buffers(self) -> None:
+        if self.__stacked is not None:
+            self.__stacked.flush()
+        self.__timestamps.flush()
+        if self.__metadata_table is not None:
+            self.__metadata_table.flush()
+        for trajectory in self.__trajectories.values():
+            trajectory.flush()
+
+    def __start_swmr(self) -> None:
+        # Every object must exist before SWMR mode starts, so no tag or common group can be added after this.
+        self.__flush_buffers()
+        self.__swmr = _H5SwmrHeader(self.__h5file)
+        self.__stacked.frozen = True
+        self.__timestamps.frozen = True
+
+    def __update_swmr(self) -> None:
+        if self.__swmr is None:
+            self.__start_swmr()
+        elif time.perf_counter() - self.__swmr_commit_time < self.__swmr_interval:
+            return
+        else:
+            self.__flush_buffers()
+        self.__swmr.commit(self.__max_index + 1)
+        self.__swmr_commit_time = time.perf_counter()
+
+    def __update_checkpoint(self, force:bool=False) -> None:
+        length = self.__max_index + 1
+        if force is False:
+            frames_due = self.__checkpoint_frames is not None and length - self.__checkpoint_length >= self.__checkpoint_frames
+            time_due = self.__checkpoint_interval is not None and time.perf_counter() - self.__checkpoint_time >= self.__checkpoint_interval
+            if frames_due is False and time_due is False:
+                return
+        self.__flush_buffers()
+        self.__checkpoint.commit(length)
+        self.__checkpoint_length = length
+        self.__checkpoint_time = time.perf_counter()
+
+    def get_recovery_info(self) -> Dict[str, Any]:
+        """get_recovery_info
+
+        Get the partial frames removed on open in 'a' mode.
+
+        Returns:
+            Dict[str, Any]: {'length', 'frames', 'rows'} of 'recover_h5dataset', or None if the file has no checkpoint.
+        """
+        return self.__recovery
+
+    def _check_swmr(self, path:str) -> None:
+        if self.__swmr is not None:
+            raise ValueError('"{0}" can not be created in SWMR mode. Write it before the second frame.'.format(path))
+
+    @property
+    def swmr(self) -> bool:
+        """swmr
+
+        Returns:
+            bool: True if SWMR mode has started.
+        """
+        return self.__swmr is not None
+
+    def flush(self) -> None:
+        """flush
+
+        Write the buffered rows to the file.
+        With 'swmr=True', the frames up to the current one are shown to the readers, and SWMR mode starts if it has not.
+        With checkpoints, a checkpoint of the frames up to the current one is written.
+        Call it between frames, e.g. after 'set_batch'.
+
+        Raises:
+            ValueError: if '/data' is empty in SWMR mode.
+        """
+        if self.__swmr_enabled is True:
+            self.get_maximum_data_index()
+            self.__swmr_commit_time = 0.0
+            self.__update_swmr()
+            return
+        if self.__checkpoint is not None:
+            self.__update_checkpoint(force=True)
+            return
+        self.__flush_buffers()
+        self.__h5file.flush()
+
     def get_maximum_data_index(self) -> int:
         """get_maximum_data_index
 
         Get the maximum value of the index in '/data'.
+        The index is kept in memory, so this does not scan '/data'.
+
+        Raises:
+            ValueError: if '/data' is empty.
 
         Returns:
             int: the maximum value of the index in '/data'.
         """
-        h5_data:h5py.Group = self.__h5file[H5_KEY_DATA]
-        h5_data_keys = np.array([int(key) for key in h5_data.keys()])
-        h5_data_max_index = np.max(h5_data_keys)
-        return h5_data_max_index
+        if self.__max_index < 0:
+            raise ValueError('"/{}" is empty.'.format(H5_KEY_DATA))
+        return self.__max_index
 
-    def get_current_data_group(self) -> h5py.Group:
+    def get_current_data_group(self) -> Union[h5py.Group, H5StackedGroup]:
         """get_current_data_group
 
         Get the group of indexes in '/data' to be edited.
 
         Returns:
-            h5py.Group: the group of indexes in '/data' to be edited.
+            h5py.Group | H5StackedGroup: the group of indexes in '/data' to be edited.
         """
-        h5_data:h5py.Group = self.__h5file[H5_KEY_DATA]
         if self.__current_index < 0:
-            self.__current_index = 0
-            data_group = h5_data.create_group(str(self.__current_index))
-        else:
-            data_group = h5_data[str(self.__current_index)]
-        return data_group
+            return self.get_next_data_group()
+        if self.__stacked is not None:
+            return H5StackedGroup(self.__stacked, self.__current_index)
+        return self.__h5file[H5_KEY_DATA + '/' + str(self.__current_index)]
 
     def get_current_data_index(self) -> int:
         """get_current_data_index
@@ -94,22 +511,30 @@ class H5Dataset():
         """
         return self.__current_index
 
-    def get_next_data_group(self) -> h5py.Group:
+    def get_next_data_group(self) -> Union[h5py.Group, H5StackedGroup]:
         """get_next_data_group
 
         Get the next group of index in '/data'.
 
         Returns:
-            h5py.Group: the next group of index in '/data'.
+            h5py.Group | H5StackedGroup: the next group of index in '/data'.
         """
+        # The frames before the next one are complete, so they are shown to the SWMR readers.
+        if self.__swmr_enabled is True and self.__max_index >= 0:
+            self.__update_swmr()
+        elif self.__checkpoint is not None:
+            self.__update_checkpoint()
         self.__current_index += 1
-        h5_data:h5py.Group = self.__h5file[H5_KEY_DATA]
-        data_group = h5_data.get(str(self.__current_index))
-        if data_group is None:
-            data_group = h5_data.create_group(str(self.__current_index))
-        return data_group
-
-    def get_data_group_from_index(self, index:int) -> h5py.Group:
+        if self.__current_index <= self.__max_index:
+            if self.__stacked is not None:
+                return H5StackedGroup(self.__stacked, self.__current_index)
+            return self.__h5file[H5_KEY_DATA + '/' + str(self.__current_index)]
+        self.__max_index = self.__current_index
+        if self.__stacked is not None:
+            return H5StackedGroup(self.__stacked, self.__current_index)
+        return self.__h5file[H5_KEY_DATA].create_group(str(self.__current_index))
+
+    def get_data_group_from_index(self, index:int) -> Union[h5py.Group, H5StackedGroup]:
         """get_data_group_from_index
 
         Get the group at the specified index in '/data'.
@@ -121,14 +546,204 @@ class H5Dataset():
             ValueError: if 'index' is out of range.
 
         Returns:
-            h5py.Group: the group at the specified index in '/data'.
+            h5py.Group | H5StackedGroup: the group at the specified index in '/data'.
         """
-        max_index = self.get_maximum_data_index()
-        if index < 0 or max_index < index:
+        if index < 0 or self.__max_index < index:
             raise ValueError('Out of range.')
         self.__current_index = index
+        if self.__stacked is not None:
+            return H5StackedGroup(self.__stacked, index)
         return self.__h5file[H5_KEY_DATA + '/' + str(index)]
 
+    def __reserve_batch(self, length:int, start_index:int=None) -> np.ndarray:
+        if length < 1:
+            raise ValueError('"data" must have at least one frame.')
+        if start_index is None:
+            start_index = self.__max_index + 1
+        if start_index < 0 or self.__max_index + 1 < start_index:
+            raise ValueError('"start_index" must be in [0, {0}].'.format(self.__max_index + 1))
+        return np.arange(start_index, start_index + length, dtype=np.int64)
+
+    def __get_batch_groups(self, indices:np.ndarray) -> List[h5py.Group]:
+        h5_data:h5py.Group = self.__h5file[H5_KEY_DATA]
+        return [h5_data.require_group(str(index)) for index in indices.tolist()]
+
+    def __commit_batch(self, indices:np.ndarray) -> None:
+        self.__max_index = max(self.__max_index, int(indices[-1]))
+        self.__current_index = int(indices[-1])
+
+    @_instrument
+    def set_batch(self, tag:str, type_:str, data:np.ndarray, frame_id:str=None, stamp_sec:Union[int, np.ndarray]=0, stamp_nsec:Union[int, np.ndarray]=0,
+        start_index:int=None, base_line:float=None, label_tag:str=None, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> int:
+        """set_batch
+
+        Write N consecutive frames of a tag at once.
+        The shape and dtype are validated once for all frames.
+        In LAYOUT_STACKED, the frames are written to '/data/[tag]' with a single slice.
+        Supported types are the scalars, the images, TYPE_DEPTH, TYPE_DISPARITY, TYPE_SEMANTIC2D,
+        TYPE_TRANSLATION and TYPE_QUATERNION.
+        If 'image_codec' is given, the images are encoded on a thread pool before they are written one frame at a time.
+
+        Args:
+            tag (str): tag of the data
+            type_ (str): TYPE_* constant
+            data (np.ndarray): data of the frames with a leading frame axis, e.g. shape=(N, H, W, 3) for TYPE_BGR8
+            frame_id (str, optional): frame id. Required for the images. Defaults to None.
+            stamp_sec (int | np.ndarray, optional): integer part of the timestamps [sec], scalar or shape=(N,). Defaults to 0.
+            stamp_nsec (int | np.ndarray, optional): fractional part of the timestamps [nsec], scalar or shape=(N,). Defaults to 0.
+            start_index (int, optional): index of the first frame. If None, the frames are appended after the last frame. Defaults to None.
+            base_line (float, optional): baseline of the stereo camera [m]. Required for TYPE_DISPARITY. Defaults to None.
+            label_tag (str, optional): tag of the label settings. Required for TYPE_SEMANTIC2D. Defaults to None.
+            codec_policy (H5CodecPolicy, optional): chunking and compression policy. Defaults to None.
+            image_codec (H5ImageCodec, optional): encoding of the images. If None, the pixels are stored. Defaults to None.
+
+        Raises:
+            ValueError: if 'type_' is not supported, a required argument is missing, 'data.shape' is invalid,
+                'image_codec' does not support 'type_' or 'start_index' is out of range.
+            TypeError: if 'data.dtype' is invalid.
+
+        Returns:
+            int: the index of the first frame.
+        """
+        if type_ not in _BATCH_SHAPES:
+            raise ValueError('"{0}" is not supported by "set_batch".'.format(type_))
+        shape, shape_name = _BATCH_SHAPES[type_]
+        data = np.asarray(data)
+        if len(data.shape) != len(shape) + 1 or any(s is not None and s != d for s, d in zip(shape, data.shape[1:])):
+            raise ValueError('"data.shape" must be {0}.'.format(shape_name))
+        if type_ in _BATCH_SCALAR_TYPES:
+            data = data.astype(DTYPE_NUMPY[type_], copy=False)
+        elif type_ in _BATCH_ARRAY_ATTRS:
+            if data.dtype not in [np.float32, np.float64]:
+                raise TypeError('"data.dtype" must be "np.float32" or "np.float64".')
+        elif data.dtype != DTYPE_NUMPY[type_]:
+            raise TypeError('"data.dtype" must be "{}".'.format(str(np.dtype(DTYPE_NUMPY[type_]))))
+        indices = self.__reserve_batch(data.shape[0], start_index)
+
+        attrs = {H5_ATTR_TYPE: type_}
+        if type_ in _BATCH_ARRAY_ATTRS:
+            attrs[H5_ATTR_ARRAY] = _BATCH_ARRAY_ATTRS[type_]
+        attrs[H5_ATTR_STAMPSEC] = np.broadcast_to(np.asarray(stamp_sec, dtype=np.int64), indices.shape)
+        attrs[H5_ATTR_STAMPNSEC] = np.broadcast_to(np.asarray(stamp_nsec, dtype=np.int64), indices.shape)
+        if type_ not in _BATCH_SCALAR_TYPES and type_ not in _BATCH_ARRAY_ATTRS:
+            if frame_id is None:
+                raise ValueError('"frame_id" is required for "{0}".'.format(type_))
+            attrs[H5_ATTR_FRAMEID] = frame_id
+        if type_ == TYPE_DISPARITY:
+            if base_line is None:
+                raise ValueError('"base_line" is required for "{0}".'.format(type_))
+            attrs[H5_ATTR_BASELINE] = base_line
+        if type_ == TYPE_SEMANTIC2D:
+            if label_tag is None:
+                raise ValueError('"label_tag" is required for "{0}".'.format(type_))
+            attrs[H5_ATTR_LABELTAG] = label_tag
+        policy = self.get_codec_policy(type_) if codec_policy is None else codec_policy
+        frames = data
+        if image_codec is not None:
+            if type_ not in IMAGE_TYPES:
+                raise ValueError('"{0}" can not be encoded.'.format(type_))
+            frames = encode_images(data, type_, image_codec)
+            attrs.update(image_codec.get_attrs(data.shape[1:]))
+            policy = CODEC_NONE if codec_policy is None else codec_policy
+
+        if self.__stacked is not None and image_codec is None:
+            start = time.perf_counter()
+            self.__stacked.extend_dataset(tag, indices, data, attrs, codec_policy=policy)
+            if self.__write_stats is not None:
+                self.__write_stats.add_hdf5(time.perf_counter() - start, data.nbytes)
+            self.__timestamps.extend(tag, indices, get_stamp_ns(attrs[H5_ATTR_STAMPSEC], attrs[H5_ATTR_STAMPNSEC]))
+        elif self.__stacked is not None:
+            # The encoded images have different lengths, so they are appended one frame at a time.
+            stamps = (attrs[H5_ATTR_STAMPSEC], attrs[H5_ATTR_STAMPNSEC])
+            start = time.perf_counter()
+            for i, index in enumerate(indices.tolist()):
+                attrs[H5_ATTR_STAMPSEC] = int(stamps[0][i])
+                attrs[H5_ATTR_STAMPNSEC] = int(stamps[1][i])
+                self.__stacked.append_dataset(tag, index, frames[i], attrs, codec_policy=policy)
+            if self.__write_stats is not None:
+                self.__write_stats.add_hdf5(time.perf_counter() - start, sum(frame.nbytes for frame in frames))
+            self.__timestamps.extend(tag, indices, get_stamp_ns(stamps[0], stamps[1]))
+        else:
+            stamp_secs = attrs[H5_ATTR_STAMPSEC].tolist()
+            stamp_nsecs = attrs[H5_ATTR_STAMPNSEC].tolist()
+            for i, h5_frame in enumerate(self.__get_batch_groups(indices)):
+                attrs[H5_ATTR_STAMPSEC] = stamp_secs[i]
+                attrs[H5_ATTR_STAMPNSEC] = stamp_nsecs[i]
+                _create_dataset(h5_frame, tag, frames[i], attrs, codec_policy=policy)
+        self.__commit_batch(indices)
+        return int(indices[0])
+
+    @_instrument
+    def set_pose_batch(self, tag:str, data_translation:np.ndarray, data_quaternion:np.ndarray, frame_id:str, child_frame_id:str,
+        stamp_sec:Union[int, np.ndarray]=0, stamp_nsec:Union[int, np.ndarray]=0, start_index:int=None, codec_policy:H5CodecPolicy=None) -> int:
+        """set_pose_batch
+
+        Write N consecutive frames of 'pose' at once.
+
+        Args:
+            tag (str): tag of the data
+            data_translation (np.ndarray): shape=(N, 3), dtype=np.float32 or np.float64 translation vectors
+            data_quaternion (np.ndarray): shape=(N, 4), dtype=np.float32 or np.float64 quaternions [qx, qy, qz, qw]
+            frame_id (str): frame id
+            child_frame_id (str): child frame id
+            stamp_sec (int | np.ndarray, optional): integer part of the timestamps [sec], scalar or shape=(N,). Defaults to 0.
+            stamp_nsec (int | np.ndarray, optional): fractional part of the timestamps [nsec], scalar or shape=(N,). Defaults to 0.
+            start_index (int, optional): index of the first frame. If None, the frames are appended after the last frame. Defaults to None.
+            codec_policy (H5CodecPolicy, optional): chunking and compression policy. Defaults to None.
+
+        Raises:
+            ValueError: if the shapes are invalid or 'start_index' is out of range.
+            TypeError: if the dtypes are invalid.
+
+        Returns:
+            int: the index of the first frame.
+        """
+        data_translation = np.asarray(data_translation)
+        data_quaternion = np.asarray(data_quaternion)
+        if len(data_translation.shape) != 2 or data_translation.shape[1] != 3:
+            raise ValueError('"data_translation.shape" must be (N, 3).')
+        if len(data_quaternion.shape) != 2 or data_quaternion.shape[1] != 4:
+            raise ValueError('"data_quaternion.shape" must be (N, 4).')
+        if data_translation.shape[0] != data_quaternion.shape[0]:
+            raise ValueError('"data_translation" and "data_quaternion" must have the same number of frames.')
+        for data in [data_translation, data_quaternion]:
+            if data.dtype not in [np.float32, np.float64]:
+                raise TypeError('"data.dtype" must be "np.float32" or "np.float64".')
+        indices = self.__reserve_batch(data_translation.shape[0], start_index)
+
+        stamp_secs = np.broadcast_to(np.asarray(stamp_sec, dtype=np.int64), indices.shape)
+        stamp_nsecs = np.broadcast_to(np.asarray(stamp_nsec, dtype=np.int64), indices.shape)
+        attrs = {
+            H5_ATTR_TYPE: TYPE_POSE,
+            H5_ATTR_STAMPSEC: stamp_secs,
+            H5_ATTR_STAMPNSEC: stamp_nsecs,
+            H5_ATTR_FRAMEID: frame_id,
+            H5_ATTR_CHILDFRAMEID: child_frame_id,
+        }
+        children = [
+            (SUBTYPE_TRANSLATION, data_translation, {H5_ATTR_TYPE: TYPE_TRANSLATION, H5_ATTR_ARRAY: 'x,y,z', H5_ATTR_STAMPSEC: stamp_secs, H5_ATTR_STAMPNSEC: stamp_nsecs}),
+            (SUBTYPE_ROTATION, data_quaternion, {H5_ATTR_TYPE: TYPE_QUATERNION, H5_ATTR_ARRAY: 'x,y,z,w', H5_ATTR_STAMPSEC: stamp_secs, H5_ATTR_STAMPNSEC: stamp_nsecs}),
+        ]
+        policies = [self.get_codec_policy(child_attrs[H5_ATTR_TYPE]) if codec_policy is None else codec_policy for _, _, child_attrs in children]
+
+        if self.__stacked is not None:
+            start = time.perf_counter()
+            self.__stacked.extend_group(tag, indices, attrs)
+            for (subtag, data, child_attrs), policy in zip(children, policies):
+                self.__stacked.extend_dataset(tag + '/' + subtag, indices, data, child_attrs, codec_policy=policy)
+            if self.__write_stats is not None:
+                self.__write_stats.add_hdf5(time.perf_counter() - start, data_translation.nbytes + data_quaternion.nbytes)
+            self.__timestamps.extend(tag, indices, get_stamp_ns(stamp_secs, stamp_nsecs))
+        else:
+            for i, h5_frame in enumerate(self.__get_batch_groups(indices)):
+                frame_attrs = {key: (value[i] if isinstance(value, np.ndarray) else value) for key, value in attrs.items()}
+                h5_pose = _create_group(h5_frame, tag, frame_attrs)
+                for (subtag, data, child_attrs), policy in zip(children, policies):
+                    child_frame_attrs = {key: (value[i] if isinstance(value, np.ndarray) else value) for key, value in child_attrs.items()}
+                    _create_dataset(h5_pose, subtag, data[i], child_frame_attrs, codec_policy=policy)
+        self.__commit_batch(indices)
+        return int(indices[0])
+
     def get_label_group(self, tag:str) -> h5py.Group:
         """get_label_group
 
@@ -147,9 +762,11 @@ class H5Dataset():
             raise NameError('"len(tag)" must be greater than 0.')
         h5_label:h5py.Group = self.__h5file.get(H5_KEY_LABEL)
         if h5_label is None:
+            self._check_swmr(H5_KEY_LABEL)
             h5_label = self.__h5file.create_group(H5_KEY_LABEL)
         h5_label_tag:h5py.Group = h5_label.get(tag)
         if h5_label_tag is None:
+            self._check_swmr(H5_KEY_LABEL + '/' + tag)
             h5_label_tag = h5_label.create_group(tag)
         return h5_label_tag
 
@@ -167,13 +784,163 @@ class H5Dataset():
         Returns:
             h5py.Group: a group of common data '/[tag]'
         """
-        if {tag} <= {H5_KEY_HEADER, H5_KEY_DATA, H5_KEY_LABEL}:
+        if {tag} <= {H5_KEY_HEADER, H5_KEY_DATA, H5_KEY_LABEL, H5_KEY_META, H5_KEY_TIMESTAMP}:
             raise NameError('"{}" is reserved.'.format(tag))
         h5_common:h5py.Group = self.__h5file.get(tag)
         if h5_common is None:
+            self._check_swmr(tag)
             h5_common = self.__h5file.create_group(tag)
         return h5_common
 
+def _get_h5dataset(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup]) -> H5Dataset:
+    if len(_H5DATASETS) < 1:
+        return None
+    h5_id = h5_group.file.id if isinstance(h5_group, H5StackedGroup) else h5_group.id
+    return _H5DATASETS.get(h5_id.fileno)
+
+def _get_frame_path(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup]) -> Tuple[int, str]:
+    # Split the name of a group in '/data' into the frame index and the path in the frame.
+    if isinstance(h5_group, H5StackedGroup):
+        return h5_group.index, h5_group.name[len(H5_KEY_DATA) + 2:]
+    names = h5_group.name.split('/', 3)
+    if len(names) < 3 or names[1] != H5_KEY_DATA or names[2].isdigit() is False:
+        return -1, None
+    return int(names[2]), names[3] if len(names) > 3 else ''
+
+def _append_timestamp(h5dataset:H5Dataset, index:int, path:str, tag:str, attrs:Dict[str, Any]) -> None:
+    # Only the tags directly under a frame '/data/[index]' are indexed, not the members of a composite type.
+    if path != '' or H5_ATTR_STAMPSEC not in attrs:
+        return
+    stats = h5dataset._get_write_stats()
+    start = 0.0 if stats is None else time.perf_counter()
+    h5dataset.get_timestamp_index().append(tag, index, get_stamp_ns(attrs[H5_ATTR_STAMPSEC], attrs.get(H5_ATTR_STAMPNSEC, 0)))
+    if stats is not None:
+        stats.add_attrs(time.perf_counter() - start)
+
+def _split_attrs(h5dataset:H5Dataset, index:int, path:str, tag:str, attrs:Dict[str, Any]) -> Tuple[tuple, Dict[str, Any]]:
+    # Split the attributes into a row of the metadata table and the attributes of the dataset.
+    metadata_table = None if h5dataset is None or index < 0 else h5dataset._get_metadata_table()
+    if metadata_table is None:
+        return None, attrs
+    if path == '':
+        return metadata_table.split(tag, attrs)
+    return None, {key: value for key, value in attrs.items() if key not in TABLE_MEMBER_ATTRS}
+
+def _write_attrs(h5dataset:H5Dataset, index:int, tag:str, h5_obj:Union[h5py.Group, h5py.Dataset], row:tuple, attrs:Dict[str, Any]) -> None:
+    stats = None if h5dataset is None else h5dataset._get_write_stats()
+    start = 0.0 if stats is None else time.perf_counter()
+    for key, value in attrs.items():
+        h5_obj.attrs[key] = value
+    if row is not None:
+        h5dataset._get_metadata_table().append(tag, index, row)
+    if stats is not None:
+        stats.add_attrs(time.perf_counter() - start)
+
+def _create_dataset(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], tag:str, data:Any, attrs:Dict[str, Any], dtype:Any=None, codec_policy:H5CodecPolicy=None) -> h5py.Dataset:
+    h5dataset = _get_h5dataset(h5_group)
+    if codec_policy is None:
+        codec_policy = get_codec_policy(attrs.get(H5_ATTR_TYPE)) if h5dataset is None else h5dataset.get_codec_policy(attrs.get(H5_ATTR_TYPE))
+    index, path = (-1, None) if h5dataset is None else _get_frame_path(h5_group)
+    stats = None if h5dataset is None else h5dataset._get_write_stats()
+    if isinstance(h5_group, H5StackedGroup):
+        start = 0.0 if stats is None else time.perf_counter()
+        h5_data:h5py.Dataset = h5_group.create_dataset(tag, data, attrs, dtype=dtype, codec_policy=codec_policy)
+        if stats is not None:
+            stats.add_hdf5(time.perf_counter() - start, np.asarray(data).nbytes)
+    else:
+        if h5dataset is not None:
+            h5dataset._check_swmr(h5_group.name + '/' + tag)
+        row, dataset_attrs = _split_attrs(h5dataset, index, path, tag, attrs)
+        dedup = None if h5dataset is None else h5dataset._get_dedup_index()
+        key, nbytes = (None, 0) if dedup is None else dedup.get_dataset_key(data, dtype, dataset_attrs)
+        h5_data:h5py.Dataset = None if key is None else dedup.link_dataset(h5_group, tag, key, attrs.get(H5_ATTR_TYPE))
+        if h5_data is not None:
+            _write_attrs(h5dataset, index, tag, h5_data, row, {})
+        else:
+            kwds = {}
+            if codec_policy.filtered is True or codec_policy.chunks is not None:
+                data = np.asarray(data, dtype=dtype)
+                kwds = codec_policy.get_kwds(data.shape, data.dtype.itemsize)
+            start = 0.0 if stats is None else time.perf_counter()
+            h5_data = h5_group.create_dataset(tag, data=data, dtype=dtype, **kwds)
+            if stats is not None:
+                stats.add_hdf5(time.perf_counter() - start, h5_data.size * h5_data.dtype.itemsize)
+            _write_attrs(h5dataset, index, tag, h5_data, row, dataset_attrs)
+            if key is not None:
+                dedup.add(key, h5_data, nbytes)
+    if index >= 0:
+        _append_timestamp(h5dataset, index, path, tag, attrs)
+    return h5_data
+
+def _create_group(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], tag:str, attrs:Dict[str, Any]) -> Union[h5py.Group, H5StackedGroup]:
+    h5dataset = _get_h5dataset(h5_group)
+    index, path = (-1, None) if h5dataset is None else _get_frame_path(h5_group)
+    stats = None if h5dataset is None else h5dataset._get_write_stats()
+    start = 0.0 if stats is None else time.perf_counter()
+    if isinstance(h5_group, H5StackedGroup):
+        h5_data:H5StackedGroup = h5_group.create_group(tag, attrs)
+        if stats is not None:
+            stats.add_hdf5(time.perf_counter() - start, 0)
+    else:
+        if h5dataset is not None:
+            h5dataset._check_swmr(h5_group.name + '/' + tag)
+        row, group_attrs = _split_attrs(h5dataset, index, path, tag, attrs)
+        h5_data:h5py.Group = h5_group.create_group(tag)
+        if stats is not None:
+            stats.add_hdf5(time.perf_counter() - start, 0)
+        _write_attrs(h5dataset, index, tag, h5_data, row, group_attrs)
+    if index >= 0:
+        _append_timestamp(h5dataset, index, path, tag, attrs)
+    return h5_data
+
+def _link_duplicate_group(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], tag:str, type_:str) -> None:
+    # The members are deduplicated by '_create_dataset', then the group is compared by its attributes and members.
+    h5dataset = _get_h5dataset(h5_group)
+    dedup = None if h5dataset is None else h5dataset._get_dedup_index()
+    if dedup is not None and isinstance(h5_group, H5StackedGroup) is False:
+        dedup.link_group(h5_group, tag, type_)
+
+def _create_image(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], tag:str, data:np.ndarray, attrs:Dict[str, Any], codec_policy:H5CodecPolicy, image_codec:H5ImageCodec) -> h5py.Dataset:
+    if image_codec is not None:
+        attrs.update(image_codec.get_attrs(data.shape))
+        data = image_codec.encode(data, attrs[H5_ATTR_TYPE])
+        # The encoded image is not compressed again by the filters.
+        if codec_policy is None:
+            codec_policy = CODEC_NONE
+    return _create_dataset(h5_group, tag, data, attrs, codec_policy=codec_policy)
+
+def _create_depth(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], tag:str, data:np.ndarray, attrs:Dict[str, Any], codec_policy:H5CodecPolicy, depth_codec:H5DepthCodec) -> h5py.Dataset:
+    if depth_codec is not None:
+        sparse = None
+        if isinstance(h5_group, H5StackedGroup):
+            # A stacked dataset has one shape, so the frames follow the first frame of the tag.
+            h5_data = h5_group.file.get(h5_group.name + '/' + tag)
+            if h5_data is not None:
+                sparse = h5_data.attrs.get(H5_ATTR_ENCODING) == ENCODING_DEPTH_SPARSE
+        data, encoding_attrs = depth_codec.encode(data, sparse)
+        attrs.update(encoding_attrs)
+    return _create_dataset(h5_group, tag, data, attrs, codec_policy=codec_policy)
+
+def _create_labels(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], tag:str, data:np.ndarray, attrs:Dict[str, Any], codec_policy:H5CodecPolicy, label_codec:H5LabelCodec) -> h5py.Dataset:
+    if label_codec is not None:
+        bits = label_codec.bits
+        if bits is None:
+            label_tag = attrs[H5_ATTR_LABELTAG]
+            h5_label:h5py.Group = h5_group.file.get(H5_KEY_LABEL + '/' + label_tag)
+            if h5_label is None or len(h5_label.keys()) < 1:
+                raise ValueError('The label config "{0}" must be set by "set_label_config" before the labels.'.format(label_tag))
+            bits = get_label_bits(max(int(key) for key in h5_label.keys()))
+        encoding = None
+        if isinstance(h5_group, H5StackedGroup):
+            # A stacked dataset has one dtype, so the frames follow the first frame of the tag.
+            h5_data = h5_group.file.get(h5_group.name + '/' + tag)
+            if h5_data is not None:
+                encoding = h5_data.attrs.get(H5_ATTR_ENCODING)
+        data, encoding_attrs = label_codec.encode(data, bits, encoding)
+        attrs.update(encoding_attrs)
+    return _create_dataset(h5_group, tag, data, attrs, codec_policy=codec_policy)
+
+@_instrument
 def set_uint8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_uint8
 
@@ -186,11 +953,13 @@ def set_uint8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_se
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.uint8)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_UINT8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_UINT8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.uint8)
 
+@_instrument
 def set_int8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_int8
 
@@ -203,11 +972,13 @@ def set_int8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_sec
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.int8)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_INT8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_INT8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.int8)
 
+@_instrument
 def set_int16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_int16
 
@@ -220,11 +991,13 @@ def set_int16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_se
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.int16)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_INT16
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_INT16,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.int16)
 
+@_instrument
 def set_int32(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_int32
 
@@ -237,11 +1010,13 @@ def set_int32(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_se
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.int32)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_INT32
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_INT32,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.int32)
 
+@_instrument
 def set_int64(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_int64
 
@@ -254,11 +1029,13 @@ def set_int64(h5_group:Union[h5py.Group, h5py.File], tag:str, data:int, stamp_se
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.int64)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_INT64
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_INT64,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.int64)
 
+@_instrument
 def set_float16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:float, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_float16
 
@@ -271,11 +1048,13 @@ def set_float16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:float, stam
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.float16)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_FLOAT16
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_FLOAT16,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.float16)
 
+@_instrument
 def set_float32(h5_group:Union[h5py.Group, h5py.File], tag:str, data:float, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_float32
 
@@ -288,11 +1067,13 @@ def set_float32(h5_group:Union[h5py.Group, h5py.File], tag:str, data:float, stam
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.float32)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_FLOAT32
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_FLOAT32,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.float32)
 
+@_instrument
 def set_float64(h5_group:Union[h5py.Group, h5py.File], tag:str, data:float, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_float64
 
@@ -305,12 +1086,14 @@ def set_float64(h5_group:Union[h5py.Group, h5py.File], tag:str, data:float, stam
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data, dtype=np.float64)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_FLOAT64
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-
-def set_mono8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_FLOAT64,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, dtype=np.float64)
+
+@_instrument
+def set_mono8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> None:
     """set_mono8
 
     'mono8'型の画像データを格納する
@@ -322,9 +1105,12 @@ def set_mono8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. 符号化した画像はCODEC_NONE. Defaults to None.
+        image_codec (H5ImageCodec, optional): 画像の符号化(PNG/JPEG/WebP). Noneの場合, 画素をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W).
+        ValueError: if \"image_codec\" does not support the type.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 2:
@@ -332,13 +1118,15 @@ def set_mono8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
     dtype:np.dtype = DTYPE_NUMPY[TYPE_MONO8]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_MONO8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_mono16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_image(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_MONO8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, image_codec)
+
+@_instrument
+def set_mono16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> None:
     """set_mono16
 
     'mono16'型の画像データを格納する
@@ -350,9 +1138,12 @@ def set_mono16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray,
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. 符号化した画像はCODEC_NONE. Defaults to None.
+        image_codec (H5ImageCodec, optional): 画像の符号化(PNG/JPEG/WebP). Noneの場合, 画素をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W).
+        ValueError: if \"image_codec\" does not support the type.
         TypeError: if \"data.dtype\" is not \"np.uint16\".
     """
     if len(data.shape) != 2:
@@ -360,13 +1151,15 @@ def set_mono16(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray,
     dtype:np.dtype = DTYPE_NUMPY[TYPE_MONO16]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_MONO16
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_bgr8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_image(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_MONO16,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, image_codec)
+
+@_instrument
+def set_bgr8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> None:
     """set_bgr8
 
     'bgr8'型の画像データを格納する
@@ -378,9 +1171,12 @@ def set_bgr8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, fr
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. 符号化した画像はCODEC_NONE. Defaults to None.
+        image_codec (H5ImageCodec, optional): 画像の符号化(PNG/JPEG/WebP). Noneの場合, 画素をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W, 3).
+        ValueError: if \"image_codec\" does not support the type.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 3:
@@ -390,13 +1186,15 @@ def set_bgr8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, fr
     dtype:np.dtype = DTYPE_NUMPY[TYPE_BGR8]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_BGR8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_rgb8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_image(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_BGR8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, image_codec)
+
+@_instrument
+def set_rgb8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> None:
     """set_rgb8
 
     'rgb8'型の画像データを格納する
@@ -408,9 +1206,12 @@ def set_rgb8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, fr
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. 符号化した画像はCODEC_NONE. Defaults to None.
+        image_codec (H5ImageCodec, optional): 画像の符号化(PNG/JPEG/WebP). Noneの場合, 画素をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W, 3).
+        ValueError: if \"image_codec\" does not support the type.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 3:
@@ -420,13 +1221,15 @@ def set_rgb8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, fr
     dtype:np.dtype = DTYPE_NUMPY[TYPE_RGB8]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_RGB8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_bgra8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_image(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_RGB8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, image_codec)
+
+@_instrument
+def set_bgra8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> None:
     """set_bgra8
 
     'bgra8'型の画像データを格納する
@@ -438,9 +1241,12 @@ def set_bgra8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. 符号化した画像はCODEC_NONE. Defaults to None.
+        image_codec (H5ImageCodec, optional): 画像の符号化(PNG/JPEG/WebP). Noneの場合, 画素をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W, 4).
+        ValueError: if \"image_codec\" does not support the type.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 3:
@@ -450,13 +1256,15 @@ def set_bgra8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
     dtype:np.dtype = DTYPE_NUMPY[TYPE_BGRA8]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_BGRA8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_rgba8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_image(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_BGRA8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, image_codec)
+
+@_instrument
+def set_rgba8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, image_codec:H5ImageCodec=None) -> None:
     """set_rgba8
 
     'rgba8'型の画像データを格納する
@@ -468,9 +1276,12 @@ def set_rgba8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. 符号化した画像はCODEC_NONE. Defaults to None.
+        image_codec (H5ImageCodec, optional): 画像の符号化(PNG/JPEG/WebP). Noneの場合, 画素をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W, 4).
+        ValueError: if \"image_codec\" does not support the type.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 3:
@@ -480,13 +1291,15 @@ def set_rgba8(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
     dtype:np.dtype = DTYPE_NUMPY[TYPE_RGBA8]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_RGBA8
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_depth(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_image(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_RGBA8,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, image_codec)
+
+@_instrument
+def set_depth(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, depth_codec:H5DepthCodec=None) -> None:
     """set_depth
 
     'depth'型の画像データを格納する
@@ -498,9 +1311,12 @@ def set_depth(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
         frame_id (str): 座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        depth_codec (H5DepthCodec, optional): 値の量子化と疎な格納の設定. Noneの場合, float32の密な画像をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W).
+        ValueError: if the values quantized by \"depth_codec\" do not fit in uint16.
         TypeError: if \"data.dtype\" is not \"np.float32\".
     """
     if len(data.shape) != 2:
@@ -508,13 +1324,15 @@ def set_depth(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, f
     dtype:np.dtype = DTYPE_NUMPY[TYPE_DEPTH]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_DEPTH
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-
-def set_disparity(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, base_line:float, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_depth(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_DEPTH,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }, codec_policy, depth_codec)
+
+@_instrument
+def set_disparity(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, base_line:float, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, depth_codec:H5DepthCodec=None) -> None:
     """set_disparity
 
     'disparity'型の画像データを格納する
@@ -527,9 +1345,12 @@ def set_disparity(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarra
         base_line (float): ステレオカメラのベースライン[m]
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        depth_codec (H5DepthCodec, optional): 値の量子化と疎な格納の設定. Noneの場合, float32の密な画像をそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W).
+        ValueError: if the values quantized by \"depth_codec\" do not fit in uint16.
         TypeError: if \"data.dtype\" is not \"np.float32\".
     """
     if len(data.shape) != 2:
@@ -537,14 +1358,25 @@ def set_disparity(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarra
     dtype:np.dtype = DTYPE_NUMPY[TYPE_DISPARITY]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_DISPARITY
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-    h5_data.attrs[H5_ATTR_BASELINE] = base_line
-
-def set_points(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None) -> None:
+    _create_depth(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_DISPARITY,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_BASELINE: base_line,
+    }, codec_policy, depth_codec)
+
+def _quantize(h5_group:Union[h5py.Group, h5py.File, H5StackedGroup], data:np.ndarray, quantize_error:float, attrs:Dict[str, Any]) -> np.ndarray:
+    # The stacked layout needs the same dtype and attributes in all frames, so the offset is 0 and the dtype is np.int32.
+    if isinstance(h5_group, H5StackedGroup):
+        data, encoding_attrs = quantize(data, quantize_error, centered=False, dtype=np.int32)
+    else:
+        data, encoding_attrs = quantize(data, quantize_error)
+    attrs.update(encoding_attrs)
+    return data
+
+@_instrument
+def set_points(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None, codec_policy:H5CodecPolicy=None, quantize_error:float=None) -> None:
     """set_points
 
     'points'型の点群データを格納する
@@ -557,6 +1389,8 @@ def set_points(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray,
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
         map_id (str, optional): 三次元点群地図のID. 三次元点群地図として使用する場合は必須. Defaults to None.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        quantize_error (float, optional): 固定小数点の整数で格納する場合の最大誤差[m]. Noneの場合, 量子化しない. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (N, 3).
@@ -569,18 +1403,32 @@ def set_points(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray,
     dtype:np.dtype = DTYPE_NUMPY[TYPE_POINTS]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_POINTS
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
+    attrs = {
+        H5_ATTR_TYPE: TYPE_POINTS,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }
     if map_id is not None:
-        h5_data.attrs[H5_ATTR_MAPID] = map_id
-
+        attrs[H5_ATTR_MAPID] = map_id
+    if quantize_error is not None:
+        data = _quantize(h5_group, data, quantize_error, attrs)
+    _create_dataset(h5_group, tag, data, attrs, codec_policy=codec_policy)
+
+def _set_voxel_grid(h5_group:Union[h5py.Group, h5py.File], tag:str, data:H5VoxelGrid, attrs:Dict[str, Any], subtype:str, codec_policy:H5CodecPolicy) -> None:
+    # The points are a flat array sorted by voxel, and 'voxel_offset' and 'voxel_count' give the rows of each voxel.
+    h5_data:h5py.Group = _create_group(h5_group, tag, attrs)
+    member_attrs = {key: value for key, value in attrs.items() if key in (H5_ATTR_STAMPSEC, H5_ATTR_STAMPNSEC)}
+    _create_dataset(h5_data, subtype, data.points, dict(member_attrs, **{H5_ATTR_TYPE: subtype}), codec_policy=codec_policy)
+    grid_policy = CODEC_GZIP if codec_policy is None else codec_policy
+    _create_dataset(h5_data, H5_KEY_VOXELOFFSET, data.offsets, member_attrs, codec_policy=grid_policy)
+    _create_dataset(h5_data, H5_KEY_VOXELCOUNT, data.counts, member_attrs, codec_policy=grid_policy)
+
+@_instrument
 def set_voxel_points(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray,
     frame_id:str, voxel_size:float, voxels_min:Tuple[float, float, float],
     voxels_max:Tuple[float, float, float], voxels_center:Tuple[float, float, float],
-    voxels_origin:Tuple[int, int, int], label_tag:str=None, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None) -> None:
+    voxels_origin:Tuple[int, int, int], label_tag:str=None, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None, codec_policy:H5CodecPolicy=None) -> None:
     """set_voxel_points
 
     'voxel-points'型のデータを格納する
@@ -588,7 +1436,7 @@ def set_voxel_points(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.ndar
     Args:
         h5_group (Union[h5py.Group, h5py.File]): 格納するH5Datasetのグループ
         tag (str): データのタグ
-        data (np.ndarray): VoxelGridMap (compound(N,)['x', 'y', 'z']を格納したNumpy(Z, Y, X)行列)
+        data (H5VoxelGrid | np.ndarray): VoxelGridMap. H5VoxelGrid, またはcompound(N,)['x', 'y', 'z']を格納したNumpy(Z, Y, X)行列
         frame_id (str): 座標系
         voxel_size (float): Voxelのサイズ[m]
         voxels_min (Tuple[float, float, float]): VoxelGridMapの範囲の最小値(z_min, y_min, x_min)
@@ -599,27 +1447,84 @@ def set_voxel_points(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.ndar
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
         map_id (str, optional): 三次元点群地図のID. 三次元点群地図として使用する場合は必須. Defaults to None.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
     """
-    dtype:np.dtype = DTYPE_NUMPY[TYPE_VOXEL_POINTS]
+    if isinstance(data, H5VoxelGrid) is False:
+        dtype:np.dtype = DTYPE_NUMPY[TYPE_VOXEL_POINTS]
+        if data.dtype != dtype:
+            raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
+        data = create_voxel_grid(data, DTYPE_NUMPY[SUBTYPE_VOXEL_POINTS])
+    elif data.points.dtype != DTYPE_NUMPY[SUBTYPE_VOXEL_POINTS]:
+        raise TypeError('"data.points.dtype" must be "{}".'.format(str(DTYPE_NUMPY[SUBTYPE_VOXEL_POINTS])))
+
+    attrs = {
+        H5_ATTR_TYPE: TYPE_VOXEL_POINTS,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }
+    if label_tag is not None:
+        attrs[H5_ATTR_LABELTAG] = label_tag
+    if map_id is not None:
+        attrs[H5_ATTR_MAPID] = map_id
+    attrs[H5_ATTR_VOXELSIZE] = voxel_size
+    attrs[H5_ATTR_VOXELMIN] = np.array(voxels_min)
+    attrs[H5_ATTR_VOXELMAX] = np.array(voxels_max)
+    attrs[H5_ATTR_VOXELCENTER] = np.array(voxels_center)
+    attrs[H5_ATTR_VOXELORIGIN] = np.array(voxels_origin)
+    _set_voxel_grid(h5group, tag, data, attrs, SUBTYPE_VOXEL_POINTS, codec_policy)
+
+def _get_voxel_params(voxel_size:float, voxels_min:Tuple[float, float, float], voxels_max:Tuple[float, float, float]) -> Tuple[Tuple[float, float, float], Tuple[int, int, int]]:
+    # The center of the range and the index of the voxel that contains it.
+    voxels_center = (np.asarray(voxels_min) + np.asarray(voxels_max)) * 0.5
+    voxels_origin = np.floor((voxels_center - np.asarray(voxels_min)) / voxel_size).astype(np.int64)
+    return tuple(voxels_center.tolist()), tuple(voxels_origin.tolist())
+
+def _check_points(data:np.ndarray) -> None:
+    if len(data.shape) != 2 or data.shape[1] != 3:
+        raise ValueError('"data.shape" must be (N, 3).')
+    dtype:np.dtype = DTYPE_NUMPY[TYPE_POINTS]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
 
-    h5_data:h5py.Dataset = h5group.create_dataset(tag, data=data, dtype=h5py.special_dtype(vlen=DTYPE_NUMPY[SUBTYPE_VOXEL_POINTS]))
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_VOXEL_POINTS
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-    if label_tag is not None:
-        h5_data.attrs[H5_ATTR_LABELTAG] = label_tag
-    if map_id is not None:
-        h5_data.attrs[H5_ATTR_MAPID] = map_id
-    h5_data.attrs[H5_ATTR_VOXELSIZE] = voxel_size
-    h5_data.attrs[H5_ATTR_VOXELMIN] = np.array(voxels_min)
-    h5_data.attrs[H5_ATTR_VOXELMAX] = np.array(voxels_max)
-    h5_data.attrs[H5_ATTR_VOXELCENTER] = np.array(voxels_center)
-    h5_data.attrs[H5_ATTR_VOXELORIGIN] = np.array(voxels_origin)
-
-def set_semantic1d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, label_tag:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+@_instrument
+def set_voxelized_points(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, voxel_size:float,
+    voxels_min:Tuple[float, float, float]=None, voxels_max:Tuple[float, float, float]=None,
+    label_tag:str=None, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None, codec_policy:H5CodecPolicy=None) -> H5VoxelGrid:
+    """set_voxelized_points
+
+    点群をVoxelに分割し, 'voxel-points'型のデータとして格納する
+
+    Args:
+        h5_group (Union[h5py.Group, h5py.File]): 格納するH5Datasetのグループ
+        tag (str): データのタグ
+        data (np.ndarray): shape=(N, 3), dtype=np.float32 の点群データ
+        frame_id (str): 座標系
+        voxel_size (float): Voxelのサイズ[m]
+        voxels_min (Tuple[float, float, float], optional): VoxelGridMapの範囲の最小値(z_min, y_min, x_min). Noneの場合, 点群の最小値. Defaults to None.
+        voxels_max (Tuple[float, float, float], optional): VoxelGridMapの範囲の最大値(z_max, y_max, x_max). Noneの場合, 全ての点を含む範囲. Defaults to None.
+        label_tag (str): 依存するラベルのタグ
+        stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
+        stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        map_id (str, optional): 三次元点群地図のID. 三次元点群地図として使用する場合は必須. Defaults to None.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+
+    Returns:
+        H5VoxelGrid: 格納したVoxelGridMap
+
+    Raises:
+        ValueError: if \"data.shape\" is not (N, 3).
+        TypeError: if \"data.dtype\" is not \"np.float32\".
+    """
+    _check_points(data)
+    grid, voxels_min, voxels_max = voxelize(data, voxel_size, voxels_min, voxels_max)
+    voxels_center, voxels_origin = _get_voxel_params(voxel_size, voxels_min, voxels_max)
+    set_voxel_points(h5group, tag, grid, frame_id, voxel_size, voxels_min, voxels_max, voxels_center, voxels_origin,
+        label_tag=label_tag, stamp_sec=stamp_sec, stamp_nsec=stamp_nsec, map_id=map_id, codec_policy=codec_policy)
+    return grid
+
+@_instrument
+def set_semantic1d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, label_tag:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, label_codec:H5LabelCodec=None) -> None:
     """set_semantic1d
 
     'semantic1d'型の1次元のラベルデータを格納する
@@ -631,9 +1536,12 @@ def set_semantic1d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarr
         label_tag (str): 依存するラベルのタグ
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        label_codec (H5LabelCodec, optional): ラベルのビットパックまたはランレングス符号化の設定. Noneの場合, uint8のラベルをそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (N,).
+        ValueError: if the label config of \"label_tag\" is not set or a label does not fit in its bit width.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 1:
@@ -641,13 +1549,15 @@ def set_semantic1d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarr
     dtype:np.dtype = DTYPE_NUMPY[TYPE_SEMANTIC1D]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_SEMANTIC1D
-    h5_data.attrs[H5_ATTR_LABELTAG] = label_tag
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-
-def set_semantic2d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, label_tag:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    _create_labels(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_SEMANTIC1D,
+        H5_ATTR_LABELTAG: label_tag,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, codec_policy, label_codec)
+
+@_instrument
+def set_semantic2d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, label_tag:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, label_codec:H5LabelCodec=None) -> None:
     """set_semantic2d
 
     'semantic2d'型のラベルデータを格納する
@@ -660,9 +1570,12 @@ def set_semantic2d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarr
         label_tag (str): 依存するラベルのタグ
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        label_codec (H5LabelCodec, optional): ラベルのビットパックまたはランレングス符号化の設定. Noneの場合, uint8のラベルをそのまま格納する. Defaults to None.
 
     Raises:
         ValueError: if \"data.shape\" is not (H, W).
+        ValueError: if the label config of \"label_tag\" is not set or a label does not fit in its bit width.
         TypeError: if \"data.dtype\" is not \"np.uint8\".
     """
     if len(data.shape) != 2:
@@ -670,14 +1583,16 @@ def set_semantic2d(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarr
     dtype:np.dtype = DTYPE_NUMPY[TYPE_SEMANTIC2D]
     if data.dtype != dtype:
         raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_SEMANTIC2D
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-    h5_data.attrs[H5_ATTR_LABELTAG] = label_tag
-
-def set_semantic3d(h5_group:Union[h5py.Group, h5py.File], tag:str, data_points:np.ndarray, data_semantic1d:np.ndarray, frame_id:str, label_tag:str, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None) -> None:
+    _create_labels(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_SEMANTIC2D,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_LABELTAG: label_tag,
+    }, codec_policy, label_codec)
+
+@_instrument
+def set_semantic3d(h5_group:Union[h5py.Group, h5py.File], tag:str, data_points:np.ndarray, data_semantic1d:np.ndarray, frame_id:str, label_tag:str, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None, codec_policy:H5CodecPolicy=None, quantize_error:float=None) -> None:
     """set_semantic3d
 
     'semantic3d'型のラベル付き点群データを格納する
@@ -692,27 +1607,117 @@ def set_semantic3d(h5_group:Union[h5py.Group, h5py.File], tag:str, data_points:n
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
         map_id (str, optional): 三次元点群地図のID. 三次元点群地図として使用する場合は必須. Defaults to None.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        quantize_error (float, optional): 点群を固定小数点の整数で格納する場合の最大誤差[m]. Noneの場合, 量子化しない. Defaults to None.
 
     Raises:
         ValueError: if data_points.shape[0] != data_semantic1d.shape[0].
     """
     if data_points.shape[0] != data_semantic1d.shape[0]:
         raise ValueError('"data_points.shape[0] != data_semantic1d.shape[0]"')
-    h5_data:h5py.Group = h5_group.create_group(tag)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_SEMANTIC3D
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-    h5_data.attrs[H5_ATTR_LABELTAG] = label_tag
+    attrs = {
+        H5_ATTR_TYPE: TYPE_SEMANTIC3D,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_LABELTAG: label_tag,
+    }
     if map_id is not None:
-        h5_data.attrs[H5_ATTR_MAPID] = map_id
-    set_points(h5_data, SUBTYPE_POINTS, data_points, frame_id, stamp_sec, stamp_nsec, map_id)
-    set_semantic1d(h5_data, SUBTYPE_SEMANTIC1D, data_semantic1d, label_tag, stamp_sec, stamp_nsec)
+        attrs[H5_ATTR_MAPID] = map_id
+    h5_data:h5py.Group = _create_group(h5_group, tag, attrs)
+    set_points(h5_data, SUBTYPE_POINTS, data_points, frame_id, stamp_sec, stamp_nsec, map_id, codec_policy=codec_policy, quantize_error=quantize_error)
+    set_semantic1d(h5_data, SUBTYPE_SEMANTIC1D, data_semantic1d, label_tag, stamp_sec, stamp_nsec, codec_policy=codec_policy)
+
+def _set_map_tiles(h5_data:h5py.Group, tile_key:np.ndarray, tile_offset:np.ndarray, stamp_sec:int, stamp_nsec:int, codec_policy:H5CodecPolicy) -> None:
+    for subtype, data in [(SUBTYPE_TILE_KEY, tile_key), (SUBTYPE_TILE_OFFSET, tile_offset)]:
+        _create_dataset(h5_data, subtype, data, {
+            H5_ATTR_TYPE: subtype,
+            H5_ATTR_STAMPSEC: stamp_sec,
+            H5_ATTR_STAMPNSEC: stamp_nsec,
+        }, codec_policy=codec_policy)
+
+@_instrument
+def set_points_map(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, frame_id:str, map_id:str, tile_size:float=MAP_TILE_SIZE,
+    stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None) -> None:
+    """set_points_map
+
+    'points-map'型の三次元点群地図を格納する.
+    点群はタイルのMorton符号の順に並べ替えて格納し, タイルごとの先頭の行を'tile_key', 'tile_offset'に格納する
+
+    Args:
+        h5_group (h5py.Group | h5py.File): 格納するH5Datasetのグループ
+        tag (str): データのタグ
+        data (np.ndarray): shape=(N, 3), dtype=np.float32 の点群データ
+        frame_id (str): 座標系
+        map_id (str): 三次元点群地図のID
+        tile_size (float, optional): タイルのサイズ[m]. Defaults to MAP_TILE_SIZE.
+        stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
+        stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+
+    Raises:
+        ValueError: if \"data.shape\" is not (N, 3).
+        TypeError: if \"data.dtype\" is not \"np.float32\".
+    """
+    _check_points(data)
+    order, tile_key, tile_offset = sort_points_map(data, tile_size)
+    h5_data:h5py.Group = _create_group(h5_group, tag, {
+        H5_ATTR_TYPE: TYPE_POINTS_MAP,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_MAPID: map_id,
+        H5_ATTR_TILESIZE: tile_size,
+    })
+    set_points(h5_data, SUBTYPE_POINTS, data[order], frame_id, stamp_sec, stamp_nsec, map_id, codec_policy=codec_policy)
+    _set_map_tiles(h5_data, tile_key, tile_offset, stamp_sec, stamp_nsec, codec_policy)
+
+@_instrument
+def set_semantic3d_map(h5_group:Union[h5py.Group, h5py.File], tag:str, data_points:np.ndarray, data_semantic1d:np.ndarray, frame_id:str, label_tag:str, map_id:str,
+    tile_size:float=MAP_TILE_SIZE, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None) -> None:
+    """set_semantic3d_map
+
+    'semantic3d-map'型のラベル付き三次元点群地図を格納する.
+    点群とラベルはタイルのMorton符号の順に並べ替えて格納し, タイルごとの先頭の行を'tile_key', 'tile_offset'に格納する
 
+    Args:
+        h5_group (h5py.Group | h5py.File): 格納するH5Datasetのグループ
+        tag (str): データのタグ
+        data_points (np.ndarray): shape=(N, 3), dtype=np.float32 のラベル付き点群を構成する点群データ
+        data_semantic1d (np.ndarray): shape=(N,), dtype=np.uint8 のラベル付き点群を構成する1次元ラベルデータ
+        frame_id (str): 座標系
+        label_tag (str): 依存するラベルのタグ
+        map_id (str): 三次元点群地図のID
+        tile_size (float, optional): タイルのサイズ[m]. Defaults to MAP_TILE_SIZE.
+        stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
+        stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+
+    Raises:
+        ValueError: if data_points.shape[0] != data_semantic1d.shape[0].
+    """
+    _check_points(data_points)
+    if data_points.shape[0] != data_semantic1d.shape[0]:
+        raise ValueError('"data_points.shape[0] != data_semantic1d.shape[0]"')
+    order, tile_key, tile_offset = sort_points_map(data_points, tile_size)
+    h5_data:h5py.Group = _create_group(h5_group, tag, {
+        H5_ATTR_TYPE: TYPE_SEMANTIC3D_MAP,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_LABELTAG: label_tag,
+        H5_ATTR_MAPID: map_id,
+        H5_ATTR_TILESIZE: tile_size,
+    })
+    set_points(h5_data, SUBTYPE_POINTS, data_points[order], frame_id, stamp_sec, stamp_nsec, map_id, codec_policy=codec_policy)
+    set_semantic1d(h5_data, SUBTYPE_SEMANTIC1D, data_semantic1d[order], label_tag, stamp_sec, stamp_nsec, codec_policy=codec_policy)
+    _set_map_tiles(h5_data, tile_key, tile_offset, stamp_sec, stamp_nsec, codec_policy)
+
+@_instrument
 def set_voxel_semantic3d(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray,
     frame_id:str, voxel_size:float, voxels_min:Tuple[float, float, float],
     voxels_max:Tuple[float, float, float], voxels_center:Tuple[float, float, float],
-    voxels_origin:Tuple[int, int, int], label_tag:str=None, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None) -> None:
+    voxels_origin:Tuple[int, int, int], label_tag:str=None, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None, codec_policy:H5CodecPolicy=None) -> None:
     """set_voxel_semantic3d
 
     'voxel-semantic3d'型のデータを格納する
@@ -720,7 +1725,7 @@ def set_voxel_semantic3d(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.
     Args:
         h5_group (Union[h5py.Group, h5py.File]): 格納するH5Datasetのグループ
         tag (str): データのタグ
-        data (np.ndarray): VoxelGridMap (compound(N,)['x', 'y', 'z', 'label']を格納したNumpy(Z, Y, X)行列)
+        data (H5VoxelGrid | np.ndarray): VoxelGridMap. H5VoxelGrid, またはcompound(N,)['x', 'y', 'z', 'label']を格納したNumpy(Z, Y, X)行列
         frame_id (str): 座標系
         voxel_size (float): Voxelのサイズ[m]
         voxels_min (Tuple[float, float, float]): VoxelGridMapの範囲の最小値(z_min, y_min, x_min)
@@ -731,27 +1736,77 @@ def set_voxel_semantic3d(h5group:Union[h5py.Group, h5py.File], tag:str, data:np.
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
         map_id (str, optional): 三次元点群地図のID. 三次元点群地図として使用する場合は必須. Defaults to None.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
     """
-    dtype:np.dtype = DTYPE_NUMPY[TYPE_VOXEL_SEMANTIC3D]
-    if data.dtype != dtype:
-        raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
-
-    h5_data:h5py.Dataset = h5group.create_dataset(tag, data=data, dtype=h5py.special_dtype(vlen=DTYPE_NUMPY[SUBTYPE_VOXEL_SEMANTIC3D]))
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_VOXEL_SEMANTIC3D
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
+    if isinstance(data, H5VoxelGrid) is False:
+        dtype:np.dtype = DTYPE_NUMPY[TYPE_VOXEL_SEMANTIC3D]
+        if data.dtype != dtype:
+            raise TypeError('"data.dtype" must be "{}".'.format(str(dtype)))
+        data = create_voxel_grid(data, DTYPE_NUMPY[SUBTYPE_VOXEL_SEMANTIC3D])
+    elif data.points.dtype != DTYPE_NUMPY[SUBTYPE_VOXEL_SEMANTIC3D]:
+        raise TypeError('"data.points.dtype" must be "{}".'.format(str(DTYPE_NUMPY[SUBTYPE_VOXEL_SEMANTIC3D])))
+
+    attrs = {
+        H5_ATTR_TYPE: TYPE_VOXEL_SEMANTIC3D,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    }
     if label_tag is not None:
-        h5_data.attrs[H5_ATTR_LABELTAG] = label_tag
+        attrs[H5_ATTR_LABELTAG] = label_tag
     if map_id is not None:
-        h5_data.attrs[H5_ATTR_MAPID] = map_id
-    h5_data.attrs[H5_ATTR_VOXELSIZE] = voxel_size
-    h5_data.attrs[H5_ATTR_VOXELMIN] = np.array(voxels_min)
-    h5_data.attrs[H5_ATTR_VOXELMAX] = np.array(voxels_max)
-    h5_data.attrs[H5_ATTR_VOXELCENTER] = np.array(voxels_center)
-    h5_data.attrs[H5_ATTR_VOXELORIGIN] = np.array(voxels_origin)
-
-def set_pose(h5_group:Union[h5py.Group, h5py.File], tag:str, data_translation:np.ndarray, data_quaternion:np.ndarray, frame_id:str, child_frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+        attrs[H5_ATTR_MAPID] = map_id
+    attrs[H5_ATTR_VOXELSIZE] = voxel_size
+    attrs[H5_ATTR_VOXELMIN] = np.array(voxels_min)
+    attrs[H5_ATTR_VOXELMAX] = np.array(voxels_max)
+    attrs[H5_ATTR_VOXELCENTER] = np.array(voxels_center)
+    attrs[H5_ATTR_VOXELORIGIN] = np.array(voxels_origin)
+    _set_voxel_grid(h5group, tag, data, attrs, SUBTYPE_VOXEL_SEMANTIC3D, codec_policy)
+
+@_instrument
+def set_voxelized_semantic3d(h5group:Union[h5py.Group, h5py.File], tag:str, data_points:np.ndarray, data_semantic1d:np.ndarray, frame_id:str, voxel_size:float,
+    voxels_min:Tuple[float, float, float]=None, voxels_max:Tuple[float, float, float]=None,
+    label_tag:str=None, stamp_sec:int=0, stamp_nsec:int=0, map_id:str=None, codec_policy:H5CodecPolicy=None) -> H5VoxelGrid:
+    """set_voxelized_semantic3d
+
+    ラベル付三次元点群をVoxelに分割し, 'voxel-semantic3d'型のデータとして格納する
+
+    Args:
+        h5_group (Union[h5py.Group, h5py.File]): 格納するH5Datasetのグループ
+        tag (str): データのタグ
+        data_points (np.ndarray): shape=(N, 3), dtype=np.float32 の点群データ
+        data_semantic1d (np.ndarray): shape=(N,), dtype=np.uint8 の1次元ラベルデータ
+        frame_id (str): 座標系
+        voxel_size (float): Voxelのサイズ[m]
+        voxels_min (Tuple[float, float, float], optional): VoxelGridMapの範囲の最小値(z_min, y_min, x_min). Noneの場合, 点群の最小値. Defaults to None.
+        voxels_max (Tuple[float, float, float], optional): VoxelGridMapの範囲の最大値(z_max, y_max, x_max). Noneの場合, 全ての点を含む範囲. Defaults to None.
+        label_tag (str): 依存するラベルのタグ
+        stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
+        stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        map_id (str, optional): 三次元点群地図のID. 三次元点群地図として使用する場合は必須. Defaults to None.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+
+    Returns:
+        H5VoxelGrid: 格納したVoxelGridMap
+
+    Raises:
+        ValueError: if \"data_points.shape\" is not (N, 3) or \"data_semantic1d.shape\" is not (N,).
+        TypeError: if \"data_points.dtype\" is not \"np.float32\" or \"data_semantic1d.dtype\" is not \"np.uint8\".
+    """
+    _check_points(data_points)
+    if data_semantic1d.shape != data_points.shape[:1]:
+        raise ValueError('"data_semantic1d.shape" must be (N,).')
+    dtype:np.dtype = DTYPE_NUMPY[TYPE_SEMANTIC1D]
+    if data_semantic1d.dtype != dtype:
+        raise TypeError('"data_semantic1d.dtype" must be "{}".'.format(str(dtype)))
+    grid, voxels_min, voxels_max = voxelize(data_points, voxel_size, voxels_min, voxels_max, semantic1d=data_semantic1d)
+    voxels_center, voxels_origin = _get_voxel_params(voxel_size, voxels_min, voxels_max)
+    set_voxel_semantic3d(h5group, tag, grid, frame_id, voxel_size, voxels_min, voxels_max, voxels_center, voxels_origin,
+        label_tag=label_tag, stamp_sec=stamp_sec, stamp_nsec=stamp_nsec, map_id=map_id, codec_policy=codec_policy)
+    return grid
+
+@_instrument
+def set_pose(h5_group:Union[h5py.Group, h5py.File], tag:str, data_translation:np.ndarray, data_quaternion:np.ndarray, frame_id:str, child_frame_id:str, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, quantize_error:float=None) -> None:
     """set_pose
 
     'pose'型のデータを格納する
@@ -765,17 +1820,22 @@ def set_pose(h5_group:Union[h5py.Group, h5py.File], tag:str, data_translation:np
         child_frame_id (str): 子の座標系
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        quantize_error (float, optional): 並進ベクトルを固定小数点の整数で格納する場合の最大誤差[m]. Noneの場合, 量子化しない. Defaults to None.
     """
-    h5_data:h5py.Group = h5_group.create_group(tag)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_POSE
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-    h5_data.attrs[H5_ATTR_CHILDFRAMEID] = child_frame_id
-    set_translation(h5_data, SUBTYPE_TRANSLATION, data_translation, stamp_sec, stamp_nsec)
-    set_quaternion(h5_data, SUBTYPE_ROTATION, data_quaternion, stamp_sec, stamp_nsec)
-
-def set_translation(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    h5_data:h5py.Group = _create_group(h5_group, tag, {
+        H5_ATTR_TYPE: TYPE_POSE,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_CHILDFRAMEID: child_frame_id,
+    })
+    set_translation(h5_data, SUBTYPE_TRANSLATION, data_translation, stamp_sec, stamp_nsec, codec_policy=codec_policy, quantize_error=quantize_error)
+    set_quaternion(h5_data, SUBTYPE_ROTATION, data_quaternion, stamp_sec, stamp_nsec, codec_policy=codec_policy)
+    _link_duplicate_group(h5_group, tag, TYPE_POSE)
+
+@_instrument
+def set_translation(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None, quantize_error:float=None) -> None:
     """set_translation
 
     'translation'型のデータを格納する
@@ -786,6 +1846,8 @@ def set_translation(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndar
         data (np.ndarray): [tx, ty, tz], dtype=np.float32 or np.float64 の並進ベクトル
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+        quantize_error (float, optional): 固定小数点の整数で格納する場合の最大誤差[m]. Noneの場合, 量子化しない. Defaults to None.
 
     Raises:
         ValueError: if \"data\" is not [tx, ty, tz].
@@ -797,13 +1859,18 @@ def set_translation(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndar
         raise ValueError('"data" must be [tx, ty, tz].')
     if {data.dtype} <= {np.float32, np.float64}:
         raise TypeError('"data.dtype" must be "np.float32" or "np.float64".')
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_TRANSLATION
-    h5_data.attrs[H5_ATTR_ARRAY] = "x,y,z"
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-
-def set_quaternion(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, stamp_sec:int=0, stamp_nsec:int=0) -> None:
+    attrs = {
+        H5_ATTR_TYPE: TYPE_TRANSLATION,
+        H5_ATTR_ARRAY: "x,y,z",
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }
+    if quantize_error is not None:
+        data = _quantize(h5_group, data, quantize_error, attrs)
+    _create_dataset(h5_group, tag, data, attrs, codec_policy=codec_policy)
+
+@_instrument
+def set_quaternion(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, stamp_sec:int=0, stamp_nsec:int=0, codec_policy:H5CodecPolicy=None) -> None:
     """set_quaternion
 
     'quaternion'型のデータを格納する
@@ -814,6 +1881,7 @@ def set_quaternion(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarr
         data (np.ndarray): [qx, qy, qz, qw], dtype=np.float32 or np.float64 の並進ベクトル
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
 
     Raises:
         ValueError: if \"data\" is not [qx, qy, qz, qw].
@@ -825,12 +1893,14 @@ def set_quaternion(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarr
         raise ValueError('"data" must be [qx, qy, qz, qw].')
     if {data.dtype} <= {np.float32, np.float64}:
         raise TypeError('"data.dtype" must be "np.float32" or "np.float64".')
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_QUATERNION
-    h5_data.attrs[H5_ATTR_ARRAY] = "x,y,z,w"
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_QUATERNION,
+        H5_ATTR_ARRAY: "x,y,z,w",
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+    }, codec_policy=codec_policy)
+
+@_instrument
 def set_intrinsic(h5_group:Union[h5py.Group, h5py.File], tag:str, data_fx:float, data_fy:float, data_cx:float, data_cy:float, data_height:int, data_width:int, frame_id:str, stamp_sec:int=0, stamp_nsec:int=0) -> None:
     """set_intrinsic
 
@@ -849,17 +1919,19 @@ def set_intrinsic(h5_group:Union[h5py.Group, h5py.File], tag:str, data_fx:float,
         stamp_sec (int, optional): タイムスタンプ(整数部[sec]). Defaults to 0.
         stamp_nsec (int, optional): タイムスタンプ(小数部[nsec]). Defaults to 0.
     """
-    h5_data:h5py.Group = h5_group.create_group(tag)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_INTRINSIC
-    h5_data.attrs[H5_ATTR_STAMPSEC] = stamp_sec
-    h5_data.attrs[H5_ATTR_STAMPNSEC] = stamp_nsec
-    h5_data.attrs[H5_ATTR_FRAMEID] = frame_id
-    h5_data.create_dataset(SUBTYPE_FX, data=data_fx, dtype=np.float64)
-    h5_data.create_dataset(SUBTYPE_FY, data=data_fy, dtype=np.float64)
-    h5_data.create_dataset(SUBTYPE_CX, data=data_cx, dtype=np.float64)
-    h5_data.create_dataset(SUBTYPE_CY, data=data_cy, dtype=np.float64)
-    h5_data.create_dataset(SUBTYPE_HEIGHT, data=data_height, dtype=np.uint32)
-    h5_data.create_dataset(SUBTYPE_WIDTH, data=data_width, dtype=np.uint32)
+    h5_data:h5py.Group = _create_group(h5_group, tag, {
+        H5_ATTR_TYPE: TYPE_INTRINSIC,
+        H5_ATTR_STAMPSEC: stamp_sec,
+        H5_ATTR_STAMPNSEC: stamp_nsec,
+        H5_ATTR_FRAMEID: frame_id,
+    })
+    _create_dataset(h5_data, SUBTYPE_FX, data_fx, {}, dtype=np.float64)
+    _create_dataset(h5_data, SUBTYPE_FY, data_fy, {}, dtype=np.float64)
+    _create_dataset(h5_data, SUBTYPE_CX, data_cx, {}, dtype=np.float64)
+    _create_dataset(h5_data, SUBTYPE_CY, data_cy, {}, dtype=np.float64)
+    _create_dataset(h5_data, SUBTYPE_HEIGHT, data_height, {}, dtype=np.uint32)
+    _create_dataset(h5_data, SUBTYPE_WIDTH, data_width, {}, dtype=np.uint32)
+    _link_duplicate_group(h5_group, tag, TYPE_INTRINSIC)
 
 def set_color(h5_group:Union[h5py.Group, h5py.File], tag:str, data_r:int, data_g:int, data_b:int) -> None:
     """set_color
@@ -874,9 +1946,10 @@ def set_color(h5_group:Union[h5py.Group, h5py.File], tag:str, data_r:int, data_g
         data_b (int): 青の画素値 [0-255]
     """
     data:np.ndarray = np.array([data_b, data_g, data_r], dtype=np.uint8)
-    h5_data:h5py.Dataset = h5_group.create_dataset(tag, data=data)
-    h5_data.attrs[H5_ATTR_TYPE] = TYPE_COLOR
-    h5_data.attrs[H5_ATTR_ARRAY] = "b,g,r"
+    _create_dataset(h5_group, tag, data, {
+        H5_ATTR_TYPE: TYPE_COLOR,
+        H5_ATTR_ARRAY: "b,g,r",
+    })
 
 def set_label_config(h5_group:Union[h5py.Group, h5py.File], index:int, name:str, data_r:int, data_g:int, data_b:int) -> None:
     """set_label_config
@@ -891,6 +1964,81 @@ def set_label_config(h5_group:Union[h5py.Group, h5py.File], index:int, name:str,
         data_g (int): 緑の画素値 [0-255]
         data_b (int): 青の画素値 [0-255]
     """
-    h5_label_index:h5py.Group = h5_group.create_group(str(index))
-    h5_label_index.create_dataset(SUBTYPE_NAME, data=name)
+    h5_label_index:h5py.Group = _create_group(h5_group, str(index), {})
+    _create_dataset(h5_label_index, SUBTYPE_NAME, name, {})
     set_color(h5_label_index, TYPE_COLOR, data_r, data_g, data_b)
+    _link_duplicate_group(h5_group, str(index), H5_KEY_LABEL)
+
+def _extend_trajectory(h5_traj:h5py.Group, data:np.ndarray, stamps:np.ndarray) -> None:
+    # The poses are buffered by the H5Dataset until 'close', or written at once for a file opened by h5py.
+    h5dataset = _get_h5dataset(h5_traj)
+    if h5dataset is not None:
+        stats = h5dataset._get_write_stats()
+        start = 0.0 if stats is None else time.perf_counter()
+        h5dataset._get_trajectory_writer(h5_traj).extend(data, stamps)
+        if stats is not None:
+            stats.add_hdf5(time.perf_counter() - start, data.nbytes + stamps.nbytes)
+    else:
+        writer = _H5TrajectoryWriter(h5_traj)
+        writer.extend(data, stamps)
+        writer.flush()
+
+@_instrument
+def set_trajectory(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, stamps:np.ndarray, frame_id:str, child_frame_id:str, codec_policy:H5CodecPolicy=None) -> None:
+    """set_trajectory
+
+    'trajectory'型の姿勢の系列を格納する.
+    姿勢は'pose'に(N, 7)の配列, タイムスタンプは'stamp'にint64[nsec]の配列として格納し, 'append_trajectory'で追記できる
+
+    Args:
+        h5_group (h5py.Group | h5py.File): 格納するH5Datasetのグループ. 'get_common_group'のグループなど
+        tag (str): データのタグ
+        data (np.ndarray): shape=(N, 7), dtype=np.float32 or np.float64 の姿勢 [x, y, z, qx, qy, qz, qw]
+        stamps (np.ndarray): shape=(N,), dtype=np.int64 の昇順のタイムスタンプ[nsec]
+        frame_id (str): 座標系
+        child_frame_id (str): 子の座標系
+        codec_policy (H5CodecPolicy, optional): チャンクと圧縮の設定. Noneの場合, H5Datasetまたは型の既定の設定. Defaults to None.
+
+    Raises:
+        ValueError: if \"data.shape\" is not (N, 7), \"stamps\" is not sorted, or \"h5_group\" is a frame of LAYOUT_STACKED.
+        TypeError: if \"data.dtype\" is not \"np.float32\" or \"np.float64\".
+    """
+    if isinstance(h5_group, H5StackedGroup):
+        raise ValueError('"trajectory" is stored in a common group in "{0}".'.format(LAYOUT_STACKED))
+    data, stamps = _check_trajectory(data, stamps)
+    h5dataset = _get_h5dataset(h5_group)
+    if h5dataset is not None:
+        h5dataset._check_swmr(h5_group.name + '/' + tag)
+    if codec_policy is None:
+        codec_policy = get_codec_policy(TYPE_TRAJECTORY) if h5dataset is None else h5dataset.get_codec_policy(TYPE_TRAJECTORY)
+    h5_traj:h5py.Group = _create_trajectory(h5_group, tag, {
+        H5_ATTR_TYPE: TYPE_TRAJECTORY,
+        H5_ATTR_FRAMEID: frame_id,
+        H5_ATTR_CHILDFRAMEID: child_frame_id,
+        H5_ATTR_ARRAY: 'x,y,z,qx,qy,qz,qw',
+    }, codec_policy)
+    _extend_trajectory(h5_traj, data, stamps)
+
+@_instrument
+def append_trajectory(h5_group:Union[h5py.Group, h5py.File], tag:str, data:np.ndarray, stamps:np.ndarray) -> None:
+    """append_trajectory
+
+    'set_trajectory'で格納した'trajectory'型の姿勢の系列に姿勢を追記する.
+    1つずつ追記した姿勢はチャンク単位でまとめて書き込まれる
+
+    Args:
+        h5_group (h5py.Group | h5py.File): 'set_trajectory'で格納したグループ
+        tag (str): データのタグ
+        data (np.ndarray): shape=(N, 7), dtype=np.float32 or np.float64 の姿勢 [x, y, z, qx, qy, qz, qw]
+        stamps (np.ndarray): shape=(N,), dtype=np.int64 の昇順のタイムスタンプ[nsec]
+
+    Raises:
+        ValueError: if \"data.shape\" is not (N, 7), or \"stamps\" is not sorted or before the last pose.
+        TypeError: if \"data.dtype\" is not \"np.float32\" or \"np.float64\", or \"tag\" is not 'trajectory'.
+    """
+    h5_traj:h5py.Group = h5_group[tag]
+    type_ = h5_traj.attrs.get(H5_ATTR_TYPE)
+    if (type_.decode('utf-8') if isinstance(type_, bytes) else type_) != TYPE_TRAJECTORY:
+        raise TypeError('"{0}" is not "{1}".'.format(tag, TYPE_TRAJECTORY))
+    data, stamps = _check_trajectory(data, stamps)
+    _extend_trajectory(h5_traj, data, stamps)
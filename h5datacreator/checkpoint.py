@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Union
+import os
+import h5py
+import numpy as np
+
+from .structure import *
+from .tuning import H5FileProfile, open_h5file
+
+def _get_appendable_datasets(h5file:h5py.File, layout:str) -> List[h5py.Dataset]:
+    # The frame groups of LAYOUT_GROUP are not visited, so the cost does not grow with the frames.
+    datasets = []
+
+    def visit(name:str, h5_obj:h5py.HLObject) -> None:
+        if isinstance(h5_obj, h5py.Dataset) and h5_obj.maxshape is not None and len(h5_obj.maxshape) > 0 and h5_obj.maxshape[0] is None:
+            datasets.append(h5_obj)
+    for key, h5_obj in h5file.items():
+        if key == H5_KEY_HEADER or (key == H5_KEY_DATA and layout != LAYOUT_STACKED):
+            continue
+        if isinstance(h5_obj, h5py.Group):
+            h5_obj.visititems(visit)
+        else:
+            visit(key, h5_obj)
+    return datasets
+
+class _H5Checkpoint():
+    """_H5Checkpoint
+
+    Commit record of an H5Dataset written with checkpoints, in the same format as the record of SWMR mode.
+    '/header/paths' and '/header/rows' hold the rows of the appendable datasets, '/header/length' the number of the complete frames,
+    and '/header/live' is 1 until the writer is closed.
+    If the writer dies, the rows and the frames after the last checkpoint are removed by 'recover_h5dataset'.
+
+    Args:
+        h5file (h5py.File): H5Dataset file
+        layout (str): Layout of '/data' [LAYOUT_GROUP, LAYOUT_STACKED]
+    """
+
+    def __init__(self, h5file:h5py.File, layout:str) -> None:
+        self.__h5file:h5py.File = h5file
+        self.__layout:str = layout
+        self.__paths:List[str] = None
+
+    def commit(self, length:int, live:bool=True) -> None:
+        """commit
+
+        Write the record and flush the file.
+        The buffered rows must be written before, so that the extents of the datasets are their rows.
+
+        Args:
+            length (int): number of the complete frames
+            live (bool, optional): False when the writer is closed. Defaults to True.
+        """
+        datasets = _get_appendable_datasets(self.__h5file, self.__layout)
+        paths = [h5_dataset.name for h5_dataset in datasets]
+        rows = np.array([h5_dataset.shape[0] for h5_dataset in datasets], dtype=np.int64)
+
+        h5_header:h5py.Group = self.__h5file.require_group(H5_KEY_HEADER)
+        if self.__paths is None and H5_KEY_PATHS in h5_header:
+            self.__paths = [path.decode('utf-8') if isinstance(path, bytes) else path for path in h5_header[H5_KEY_PATHS][()]]
+        # The record is rewritten only when a dataset is added, e.g. by a new tag.
+        if paths != self.__paths:
+            for key in [H5_KEY_PATHS, H5_KEY_ROWS]:
+                if key in h5_header:
+                    del h5_header[key]
+            h5_header.create_dataset(H5_KEY_PATHS, data=paths, dtype=h5py.string_dtype())
+            h5_header.create_dataset(H5_KEY_ROWS, data=rows)
+            self.__paths = paths
+        else:
+            h5_header[H5_KEY_ROWS][...] = rows
+        for key, value, dtype in [(H5_KEY_LENGTH, length, np.int64), (H5_KEY_LIVE, 1 if live else 0, np.int8)]:
+            if key in h5_header:
+                h5_header[key][()] = value
+            else:
+                h5_header.create_dataset(key, data=value, dtype=dtype)
+        self.__h5file.flush()
+
+def _has_checkpoint(h5file:h5py.File) -> bool:
+    h5_header:h5py.Group = h5file.get(H5_KEY_HEADER)
+    return isinstance(h5_header, h5py.Group) and H5_KEY_ROWS in h5_header and H5_KEY_LIVE in h5_header
+
+def _recover(h5file:h5py.File) -> Dict[str, Any]:
+    h5_data:h5py.Group = h5file[H5_KEY_DATA]
+    layout = h5_data.attrs.get(H5_ATTR_LAYOUT, LAYOUT_GROUP)
+    if isinstance(layout, bytes):
+        layout = layout.decode('utf-8')
+    h5_header:h5py.Group = h5file[H5_KEY_HEADER]
+    length = int(h5_header[H5_KEY_LENGTH][()])
+    info = {'length': length, 'frames': 0, 'rows': {}}
+    if int(h5_header[H5_KEY_LIVE][()]) == 0:
+        return info
+
+    if layout == LAYOUT_STACKED:
+        h5_meta:h5py.Group = h5file.get(H5_KEY_META)
+        if h5_meta is not None:
+            for h5_meta_tag in h5_meta.values():
+                h5_index:h5py.Dataset = h5_meta_tag.get(H5_KEY_INDEX)
+                if h5_index is not None and h5_index.shape[0] > 0:
+                    info['frames'] = max(info['frames'], int(h5_index[-1]) + 1 - length)
+
+    paths = [path.decode('utf-8') if isinstance(path, bytes) else path for path in h5_header[H5_KEY_PATHS][()]]
+    rows = dict(zip(paths, h5_header[H5_KEY_ROWS][()].tolist()))
+    # The datasets created after the last checkpoint have no committed rows.
+    for h5_dataset in _get_appendable_datasets(h5file, layout):
+        committed = rows.get(h5_dataset.name, 0)
+        if h5_dataset.shape[0] > committed:
+            info['rows'][h5_dataset.name] = h5_dataset.shape[0] - committed
+            h5_dataset.resize(committed, axis=0)
+
+    if layout == LAYOUT_GROUP:
+        # The frames are created in index order, so the partial frames follow the committed ones.
+        index = length
+        while str(index) in h5_data:
+            del h5_data[str(index)]
+            index += 1
+        info['frames'] = index - length
+
+    h5_header[H5_KEY_LIVE][()] = 0
+    h5file.flush()
+    return info
+
+def recover_h5dataset(path:str, profile:Union[str, H5FileProfile]=None) -> Dict[str, Any]:
+    """recover_h5dataset
+
+    Remove the partial frames written after the last checkpoint by an H5Dataset that was not closed.
+    H5Dataset in 'a' mode does this on open, so that the recording resumes after the last complete frame.
+
+    Args:
+        path (str): path of H5Dataset
+        profile (str | H5FileProfile, optional): file-level settings of HDF5, or the name of a preset. Defaults to None.
+
+    Raises:
+        ValueError: if the file has no checkpoint.
+
+    Returns:
+        Dict[str, Any]: {'length', 'frames', 'rows'}. 'length' is the number of the complete frames, 'frames' the number of the removed frames
+            in LAYOUT_GROUP or the frames after 'length' in the removed rows in LAYOUT_STACKED, and 'rows' the removed rows by dataset path.
+    """
+    fullpath = os.path.abspath(path)
+    if os.path.isfile(fullpath) is False:
+        raise FileNotFoundError('File "{0}" not found.'.format(fullpath))
+    with open_h5file(fullpath, 'a', profile) as h5file:
+        if _has_checkpoint(h5file) is False:
+            raise ValueError('"{0}" has no checkpoint.'.format(fullpath))
+        return _recover(h5file)
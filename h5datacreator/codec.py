@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple, Union
+import h5py
+import numpy as np
+
+from .structure import *
+
+CODEC_CHUNK_BYTES:int = 1 << 18
+
+class H5CodecPolicy():
+    """H5CodecPolicy
+
+    Chunking and compression policy of the datasets written by the 'set_*' functions.
+
+    Args:
+        compression (str, optional): filter ['gzip', 'lzf'] or None. Defaults to None.
+        compression_opts (int, optional): level of 'gzip' [0-9]. Defaults to None.
+        shuffle (bool, optional): enable the byte shuffle filter. Defaults to False.
+        fletcher32 (bool, optional): enable the fletcher32 checksum. Defaults to False.
+        chunks (Tuple[int, ...], optional): chunk shape. If None, blocks of rows along the first axis
+            of about 'chunk_bytes' are used when a filter is enabled. Defaults to None.
+        chunk_bytes (int, optional): target size of a chunk [byte]. Defaults to CODEC_CHUNK_BYTES.
+    """
+
+    def __init__(self, compression:str=None, compression_opts:int=None, shuffle:bool=False, fletcher32:bool=False,
+        chunks:Tuple[int, ...]=None, chunk_bytes:int=CODEC_CHUNK_BYTES) -> None:
+        if compression not in [None, 'gzip', 'lzf']:
+            raise ValueError('"compression" must be "gzip", "lzf" or None.')
+        if compression_opts is not None and compression != 'gzip':
+            raise ValueError('"compression_opts" is only available for "gzip".')
+        if chunk_bytes < 1:
+            raise ValueError('"chunk_bytes" must be greater than 0.')
+        self.compression:str = compression
+        self.compression_opts:int = compression_opts
+        self.shuffle:bool = shuffle
+        self.fletcher32:bool = fletcher32
+        self.chunks:Tuple[int, ...] = None if chunks is None else tuple(chunks)
+        self.chunk_bytes:int = chunk_bytes
+
+    def __repr__(self) -> str:
+        return 'H5CodecPolicy(compression={0!r}, compression_opts={1!r}, shuffle={2!r}, fletcher32={3!r}, chunks={4!r}, chunk_bytes={5!r})'.format(
+            self.compression, self.compression_opts, self.shuffle, self.fletcher32, self.chunks, self.chunk_bytes
+        )
+
+    @property
+    def filtered(self) -> bool:
+        """filtered
+
+        Returns:
+            bool: True if any filter is enabled.
+        """
+        return self.compression is not None or self.shuffle or self.fletcher32
+
+    def get_filter_kwds(self) -> Dict[str, Any]:
+        """get_filter_kwds
+
+        Get the filter arguments of 'h5py.Group.create_dataset'.
+
+        Returns:
+            Dict[str, Any]: the filter arguments
+        """
+        kwds = {}
+        if self.compression is not None:
+            kwds['compression'] = self.compression
+            if self.compression_opts is not None:
+                kwds['compression_opts'] = self.compression_opts
+        if self.shuffle is True:
+            kwds['shuffle'] = True
+        if self.fletcher32 is True:
+            kwds['fletcher32'] = True
+        return kwds
+
+    def get_chunks(self, shape:Tuple[int, ...], itemsize:int) -> Tuple[int, ...]:
+        """get_chunks
+
+        Get the chunk shape of a dataset.
+
+        Args:
+            shape (Tuple[int, ...]): shape of the dataset
+            itemsize (int): size of an element [byte]
+
+        Raises:
+            ValueError: if 'chunks' does not have the dimensions of the dataset.
+
+        Returns:
+            Tuple[int, ...]: the chunk shape
+        """
+        if self.chunks is not None:
+            if len(self.chunks) != len(shape):
+                raise ValueError('"chunks" must have {0} dimensions.'.format(len(shape)))
+            return tuple(max(1, min(c, s)) for c, s in zip(self.chunks, shape))
+        row_nbytes = max(int(np.prod(shape[1:], dtype=np.int64)) * itemsize, 1)
+        rows = max(1, min(self.chunk_bytes // row_nbytes, shape[0]))
+        return (rows,) + tuple(max(1, s) for s in shape[1:])
+
+    def get_kwds(self, shape:Tuple[int, ...], itemsize:int) -> Dict[str, Any]:
+        """get_kwds
+
+        Get the arguments of 'h5py.Group.create_dataset'.
+        Scalars, empty datasets and datasets without a filter or an explicit chunk shape are stored contiguously.
+
+        Args:
+            shape (Tuple[int, ...]): shape of the dataset
+            itemsize (int): size of an element [byte]
+
+        Returns:
+            Dict[str, Any]: the arguments
+        """
+        if len(shape) < 1 or 0 in shape or (self.filtered is False and self.chunks is None):
+            return {}
+        kwds = self.get_filter_kwds()
+        kwds['chunks'] = self.get_chunks(shape, itemsize)
+        return kwds
+
+CODEC_NONE:H5CodecPolicy = H5CodecPolicy()
+CODEC_LZF:H5CodecPolicy = H5CodecPolicy(compression='lzf', shuffle=True)
+CODEC_GZIP:H5CodecPolicy = H5CodecPolicy(compression='gzip', compression_opts=1, shuffle=True)
+CODEC_GZIP_IMAGE:H5CodecPolicy = H5CodecPolicy(compression='gzip', compression_opts=1)
+CODEC_GZIP_MAX:H5CodecPolicy = H5CodecPolicy(compression='gzip', compression_opts=9, shuffle=True)
+
+# The defaults only use 'gzip' (deflate), which every build of HDF5 can decode.
+# 'lzf' is faster but is only bundled with h5py, so it is left to CODEC_LZF as an opt-in.
+# The byte shuffle does not help the 8-bit images.
+CODEC_POLICIES:Dict[str, H5CodecPolicy] = {
+    TYPE_MONO8: CODEC_GZIP_IMAGE,
+    TYPE_MONO16: CODEC_GZIP,
+    TYPE_BGR8: CODEC_GZIP_IMAGE,
+    TYPE_RGB8: CODEC_GZIP_IMAGE,
+    TYPE_BGRA8: CODEC_GZIP_IMAGE,
+    TYPE_RGBA8: CODEC_GZIP_IMAGE,
+    TYPE_DEPTH: CODEC_GZIP,
+    TYPE_DISPARITY: CODEC_GZIP,
+    TYPE_POINTS: CODEC_GZIP,
+    SUBTYPE_VOXEL_POINTS: CODEC_GZIP,
+    SUBTYPE_VOXEL_SEMANTIC3D: CODEC_GZIP,
+    TYPE_SEMANTIC1D: CODEC_GZIP,
+    TYPE_SEMANTIC2D: CODEC_GZIP,
+}
+
+def register_codec_policy(type_:str, policy:H5CodecPolicy) -> None:
+    """register_codec_policy
+
+    Register the default policy of a type for all H5Datasets.
+
+    Args:
+        type_ (str): TYPE_* constant
+        policy (H5CodecPolicy): policy of the type. If None, the datasets of the type are stored without a filter.
+    """
+    if policy is None:
+        CODEC_POLICIES.pop(type_, None)
+    else:
+        CODEC_POLICIES[type_] = policy
+
+def get_codec_policy(type_:str) -> H5CodecPolicy:
+    """get_codec_policy
+
+    Get the default policy of a type.
+
+    Args:
+        type_ (str): TYPE_* constant
+
+    Returns:
+        H5CodecPolicy: the policy of the type
+    """
+    return CODEC_POLICIES.get(type_, CODEC_NONE)
+
+def get_storage_report(h5file:Union[str, h5py.File, h5py.Group]) -> Dict[str, Dict[str, float]]:
+    """get_storage_report
+
+    Get the raw size and the stored size of the datasets of each type.
+
+    Args:
+        h5file (str | h5py.File | h5py.Group): path of H5Dataset, or a file or a group to inspect
+
+    Returns:
+        Dict[str, Dict[str, float]]: {type: {'datasets', 'raw_bytes', 'stored_bytes', 'ratio'}}
+    """
+    if isinstance(h5file, str):
+        with h5py.File(h5file, mode='r') as h5_root:
+            return get_storage_report(h5_root)
+
+    report:Dict[str, Dict[str, float]] = {}
+
+    def visit(name:str, h5_obj:Any) -> None:
+        if isinstance(h5_obj, h5py.Dataset) is False:
+            return
+        type_ = h5_obj.attrs.get(H5_ATTR_TYPE)
+        if type_ is None:
+            type_ = h5_obj.parent.attrs.get(H5_ATTR_TYPE, '')
+        if isinstance(type_, bytes):
+            type_ = type_.decode('utf-8')
+        item = report.setdefault(type_, {'datasets': 0, 'raw_bytes': 0, 'stored_bytes': 0, 'ratio': 0.0})
+        item['datasets'] += 1
+        item['raw_bytes'] += h5_obj.size * h5_obj.dtype.itemsize
+        item['stored_bytes'] += h5_obj.id.get_storage_size()
+
+    h5file.visititems(visit)
+    for item in report.values():
+        item['ratio'] = item['raw_bytes'] / item['stored_bytes'] if item['stored_bytes'] > 0 else 0.0
+    return report
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple, Union
+import hashlib
+import h5py
+import numpy as np
+
+from .structure import *
+
+# Larger payloads are not hashed, since the repeated data are small calibration and configuration data.
+DEDUP_MAX_BYTES:int = 1 << 16
+
+def _update_hash(h:Any, value:Any) -> None:
+    array = np.asarray(value)
+    h.update(array.dtype.str.encode('utf-8'))
+    h.update(repr(array.shape).encode('utf-8'))
+    if array.dtype == object:
+        h.update(repr(array.tolist()).encode('utf-8'))
+    else:
+        h.update(np.ascontiguousarray(array).tobytes())
+
+def _hash_attrs(h:Any, attrs:Dict[str, Any]) -> None:
+    for key in sorted(attrs.keys()):
+        h.update(key.encode('utf-8'))
+        _update_hash(h, attrs[key])
+
+class _H5DedupIndex():
+    """_H5DedupIndex
+
+    Index of the objects of an H5Dataset by the hash of their content.
+    A dataset or a group with the same data and attributes as a stored object is replaced by a hard link to it.
+
+    Args:
+        h5file (h5py.File): H5Dataset file
+    """
+
+    def __init__(self, h5file:h5py.File) -> None:
+        self.__h5file:h5py.File = h5file
+        # The path and the size of the data of the first object with each key.
+        self.__paths:Dict[bytes, Tuple[bytes, int]] = {}
+        self.__stats:Dict[str, Dict[str, int]] = {}
+
+    def __count(self, type_:Any, hit:bool, nbytes:int) -> None:
+        # The members without a type, e.g. of 'intrinsic', are counted by their group.
+        if type_ is None:
+            return
+        if isinstance(type_, bytes):
+            type_ = type_.decode('utf-8')
+        stats = self.__stats.setdefault(str(type_), {'hits': 0, 'misses': 0, 'saved_bytes': 0})
+        if hit is True:
+            stats['hits'] += 1
+            stats['saved_bytes'] += nbytes
+        else:
+            stats['misses'] += 1
+
+    def get_dataset_key(self, data:Any, dtype:Any, attrs:Dict[str, Any]) -> Tuple[bytes, int]:
+        """get_dataset_key
+
+        Args:
+            data (Any): data of the dataset
+            dtype (Any): dtype of the dataset
+            attrs (Dict[str, Any]): attributes written to the dataset
+
+        Returns:
+            Tuple[bytes, int]: the hash of the data and the attributes, or None if the data are larger than DEDUP_MAX_BYTES, and the size of the data
+        """
+        array = np.asarray(data, dtype=dtype)
+        if array.nbytes > DEDUP_MAX_BYTES:
+            return None, array.nbytes
+        h = hashlib.blake2b(digest_size=20)
+        _update_hash(h, array)
+        _hash_attrs(h, attrs)
+        return h.digest(), array.nbytes
+
+    def link_dataset(self, h5_group:h5py.Group, tag:str, key:bytes, type_:str) -> h5py.Dataset:
+        """link_dataset
+
+        Link '[h5_group]/[tag]' to the stored dataset with the same key.
+
+        Args:
+            h5_group (h5py.Group): group of the new dataset
+            tag (str): tag of the new dataset
+            key (bytes): the key returned by 'get_dataset_key'
+            type_ (str): TYPE_* constant counted in the report
+
+        Returns:
+            h5py.Dataset: the linked dataset, or None if no dataset has the key
+        """
+        stored = self.__paths.get(key)
+        if stored is None:
+            self.__count(type_, False, 0)
+            return None
+        # The low-level API avoids resolving the path through the high-level objects for each frame.
+        h5_id = h5py.h5o.open(self.__h5file.id, stored[0])
+        h5py.h5o.link(h5_id, h5_group.id, tag.encode('utf-8'))
+        self.__count(type_, True, stored[1])
+        return h5py.Dataset(h5_id)
+
+    def add(self, key:bytes, h5_obj:Union[h5py.Group, h5py.Dataset], nbytes:int) -> None:
+        """add
+
+        Register a new object with its key.
+
+        Args:
+            key (bytes): the key returned by 'get_dataset_key'
+            h5_obj (h5py.Group | h5py.Dataset): the new object
+            nbytes (int): size of the data
+        """
+        self.__paths[key] = (h5_obj.name.encode('utf-8'), nbytes)
+
+    def link_group(self, h5_group:h5py.Group, tag:str, type_:str) -> None:
+        """link_group
+
+        Replace the group '[h5_group]/[tag]' by a hard link to the stored group with the same attributes and members.
+        The members are compared by their object address, so the members must be deduplicated before the group.
+
+        Args:
+            h5_group (h5py.Group): parent of the group
+            tag (str): tag of the group
+            type_ (str): TYPE_* constant counted in the report
+        """
+        name = tag.encode('utf-8')
+        h5_id = h5py.h5g.open(h5_group.id, name)
+        h = hashlib.blake2b(digest_size=20)
+        _hash_attrs(h, dict(h5py.Group(h5_id).attrs.items()))
+        for member in sorted(h5_id):
+            h.update(member)
+            h.update(str(h5_id.links.get_info(member).u).encode('utf-8'))
+        key = h.digest()
+        stored = self.__paths.get(key)
+        if stored is None:
+            self.__paths[key] = (h5py.h5i.get_name(h5_id), 0)
+            self.__count(type_, False, 0)
+            return
+        h5_group.id.unlink(name)
+        h5py.h5o.link(h5py.h5o.open(self.__h5file.id, stored[0]), h5_group.id, name)
+        self.__count(type_, True, 0)
+
+    def get_info(self) -> Dict[str, Any]:
+        """get_info
+
+        Returns:
+            Dict[str, Any]: {'hits', 'misses', 'hit_rate', 'saved_bytes', 'types'} with the same counts of each type in 'types'
+        """
+        hits = sum(stats['hits'] for stats in self.__stats.values())
+        misses = sum(stats['misses'] for stats in self.__stats.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses > 0 else 0.0,
+            'saved_bytes': sum(stats['saved_bytes'] for stats in self.__stats.values()),
+            'types': {type_: dict(stats) for type_, stats in self.__stats.items()},
+        }
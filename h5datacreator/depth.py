@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple
+import numpy as np
+
+from .structure import *
+
+ENCODING_DEPTH_DENSE:str = 'depth-dense'
+ENCODING_DEPTH_SPARSE:str = 'depth-sparse'
+DEPTH_ENCODINGS:Tuple[str, ...] = (ENCODING_DEPTH_DENSE, ENCODING_DEPTH_SPARSE)
+
+# Below this ratio of nonzero pixels, the indices and values are smaller than the dense map.
+DEPTH_SPARSE_DENSITY:float = 0.25
+
+class H5DepthCodec():
+    """H5DepthCodec
+
+    Encoding of TYPE_DEPTH and TYPE_DISPARITY.
+    The values are float32 (lossless) or uint16 multiples of 'scale', and the map is dense (H, W)
+    or sparse, a compound array of the flat 'index' and the 'value' of the nonzero pixels.
+
+    Args:
+        scale (float, optional): step of the uint16 values, e.g. 0.001 for millimetres. If None, the values are float32. Defaults to None.
+        sparse (bool, optional): if True, the maps are sparse. If False, dense.
+            If None, each frame is sparse when the ratio of nonzero pixels is below 'density'. Defaults to None.
+        density (float, optional): ratio of nonzero pixels below which a frame is sparse. Defaults to DEPTH_SPARSE_DENSITY.
+    """
+
+    def __init__(self, scale:float=None, sparse:bool=None, density:float=DEPTH_SPARSE_DENSITY) -> None:
+        if scale is not None and scale <= 0.0:
+            raise ValueError('"scale" must be positive.')
+        self.scale:float = None if scale is None else float(scale)
+        self.sparse:bool = sparse
+        self.density:float = float(density)
+
+    def __repr__(self) -> str:
+        return 'H5DepthCodec(scale={0!r}, sparse={1!r}, density={2!r})'.format(self.scale, self.sparse, self.density)
+
+    def get_dtype(self) -> np.dtype:
+        """get_dtype
+
+        Returns:
+            np.dtype: dtype of the sparse pixels
+        """
+        return np.dtype([('index', np.uint32), ('value', np.float32 if self.scale is None else np.uint16)])
+
+    def __quantize(self, values:np.ndarray) -> np.ndarray:
+        # The invalid pixels (NaN, inf) are stored as 0 like the missing pixels.
+        values = np.where(np.isfinite(values), values, 0.0)
+        quantized = np.rint(values / self.scale)
+        if quantized.size > 0 and (quantized.min() < 0.0 or quantized.max() > np.iinfo(np.uint16).max):
+            raise ValueError('The values must be in [0, {0}] with "scale" {1}.'.format(np.iinfo(np.uint16).max * self.scale, self.scale))
+        return quantized.astype(np.uint16)
+
+    def encode(self, data:np.ndarray, sparse:bool=None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """encode
+
+        Encode a depth or disparity map.
+
+        Args:
+            data (np.ndarray): shape=(H, W), dtype=np.float32 the map
+            sparse (bool, optional): overrides 'self.sparse' if not None. Defaults to None.
+
+        Raises:
+            ValueError: if the quantized values do not fit in uint16.
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, Any]]: the encoded map and the attributes 'encoding', 'scale' and 'shape'
+        """
+        if sparse is None:
+            sparse = self.sparse
+        indices = None
+        if sparse is not False:
+            indices = np.flatnonzero(data)
+            if sparse is None and indices.shape[0] >= self.density * data.size:
+                indices = None
+        attrs = {H5_ATTR_ENCODING: ENCODING_DEPTH_DENSE if indices is None else ENCODING_DEPTH_SPARSE}
+        if self.scale is not None:
+            attrs[H5_ATTR_SCALE] = self.scale
+        if indices is None:
+            return (data if self.scale is None else self.__quantize(data)), attrs
+        attrs[H5_ATTR_SHAPE] = np.array(data.shape, dtype=np.int64)
+        values = data.reshape(-1)[indices]
+        pixels = np.empty(indices.shape[0], dtype=self.get_dtype())
+        pixels['index'] = indices
+        pixels['value'] = values if self.scale is None else self.__quantize(values)
+        return pixels, attrs
+
+DEPTH_CODEC_LOSSLESS:H5DepthCodec = H5DepthCodec()
+DEPTH_CODEC_MM:H5DepthCodec = H5DepthCodec(0.001)
+
+def decode_depth(data:np.ndarray, encoding:str, attrs:Dict[str, Any]) -> np.ndarray:
+    """decode_depth
+
+    Decode a map encoded by H5DepthCodec to the dense float32 map.
+    The attributes 'scale' and 'shape' are removed from 'attrs'.
+
+    Args:
+        data (np.ndarray): the encoded map
+        encoding (str): ENCODING_DEPTH_DENSE or ENCODING_DEPTH_SPARSE
+        attrs (Dict[str, Any]): attributes of the dataset
+
+    Returns:
+        np.ndarray: shape=(H, W), dtype=np.float32 the map
+    """
+    scale = attrs.pop(H5_ATTR_SCALE, None)
+    shape = attrs.pop(H5_ATTR_SHAPE, None)
+    if encoding == ENCODING_DEPTH_DENSE:
+        if scale is None:
+            return data
+        return (data * np.float32(scale)).astype(np.float32, copy=False)
+    values = data['value'] if scale is None else data['value'] * np.float32(scale)
+    dense = np.zeros(int(np.prod(shape)), dtype=np.float32)
+    dense[data['index']] = values
+    return dense.reshape(tuple(int(s) for s in shape))
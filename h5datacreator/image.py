@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Sequence, Tuple
+import concurrent.futures
+import os
+import threading
+import cv2
+import numpy as np
+
+from .structure import *
+
+ENCODING_PNG:str = 'png'
+ENCODING_JPEG:str = 'jpeg'
+ENCODING_WEBP:str = 'webp'
+IMAGE_ENCODINGS:Dict[str, str] = {
+    ENCODING_PNG: '.png',
+    ENCODING_JPEG: '.jpg',
+    ENCODING_WEBP: '.webp',
+}
+
+# The range of 'quality' of each encoding. WebP above 100 is lossless.
+_QUALITY_RANGES:Dict[str, Tuple[int, int]] = {
+    ENCODING_PNG: (0, 9),
+    ENCODING_JPEG: (0, 100),
+    ENCODING_WEBP: (1, 101),
+}
+
+# Types that can be encoded, and the encodings that support each type.
+IMAGE_TYPES:Dict[str, Sequence[str]] = {
+    TYPE_MONO8: (ENCODING_PNG, ENCODING_JPEG, ENCODING_WEBP),
+    TYPE_MONO16: (ENCODING_PNG,),
+    TYPE_BGR8: (ENCODING_PNG, ENCODING_JPEG, ENCODING_WEBP),
+    TYPE_RGB8: (ENCODING_PNG, ENCODING_JPEG, ENCODING_WEBP),
+    TYPE_BGRA8: (ENCODING_PNG, ENCODING_WEBP),
+    TYPE_RGBA8: (ENCODING_PNG, ENCODING_WEBP),
+}
+
+IMAGE_WORKERS:int = os.cpu_count() or 1
+
+_RGB_TO_BGR:Dict[str, int] = {
+    TYPE_RGB8: cv2.COLOR_RGB2BGR,
+    TYPE_RGBA8: cv2.COLOR_RGBA2BGRA,
+}
+_BGR_TO_RGB:Dict[str, int] = {
+    TYPE_RGB8: cv2.COLOR_BGR2RGB,
+    TYPE_RGBA8: cv2.COLOR_BGRA2RGBA,
+}
+
+_executor:concurrent.futures.ThreadPoolExecutor = None
+_executor_lock:threading.Lock = threading.Lock()
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    # cv2 releases the GIL while encoding and decoding, so a thread pool runs them in parallel.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='h5datacreator-image')
+        return _executor
+
+class H5ImageCodec():
+    """H5ImageCodec
+
+    Encoding of the images stored as a byte blob (shape=(B,), dtype=np.uint8) instead of the raw pixels.
+    The attributes 'encoding', 'quality' and 'shape' of the dataset hold the codec and the original shape.
+
+    Args:
+        encoding (str): ENCODING_PNG, ENCODING_JPEG or ENCODING_WEBP
+        quality (int, optional): compression level [0-9] for ENCODING_PNG, quality [0-100] for ENCODING_JPEG
+            and quality [1-101] for ENCODING_WEBP (lossless at 101). If None, 3 for PNG and 95 for JPEG and WebP. Defaults to None.
+    """
+
+    def __init__(self, encoding:str, quality:int=None) -> None:
+        if encoding not in IMAGE_ENCODINGS:
+            raise ValueError('"encoding" must be one of {0}.'.format(list(IMAGE_ENCODINGS.keys())))
+        if quality is None:
+            quality = 3 if encoding == ENCODING_PNG else 95
+        low, high = _QUALITY_RANGES[encoding]
+        if not low <= quality <= high:
+            raise ValueError('"quality" of "{0}" must be in [{1}, {2}].'.format(encoding, low, high))
+        self.encoding:str = encoding
+        self.quality:int = int(quality)
+
+    def __repr__(self) -> str:
+        return 'H5ImageCodec(encoding={0!r}, quality={1!r})'.format(self.encoding, self.quality)
+
+    @property
+    def lossless(self) -> bool:
+        """lossless
+
+        Returns:
+            bool: True if the decoded images are the same as the original images.
+        """
+        return self.encoding == ENCODING_PNG or (self.encoding == ENCODING_WEBP and self.quality > 100)
+
+    def __get_params(self) -> List[int]:
+        if self.encoding == ENCODING_PNG:
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.quality]
+        if self.encoding == ENCODING_JPEG:
+            return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+
+    def get_attrs(self, shape:Sequence[int]) -> Dict[str, Any]:
+        """get_attrs
+
+        Get the attributes of an encoded image.
+
+        Args:
+            shape (Sequence[int]): shape of the original image
+
+        Returns:
+            Dict[str, Any]: the attributes 'encoding', 'quality' and 'shape'
+        """
+        return {
+            H5_ATTR_ENCODING: self.encoding,
+            H5_ATTR_QUALITY: self.quality,
+            H5_ATTR_SHAPE: np.array(shape, dtype=np.int64),
+        }
+
+    def encode(self, data:np.ndarray, type_:str) -> np.ndarray:
+        """encode
+
+        Encode an image.
+
+        Args:
+            data (np.ndarray): the image
+            type_ (str): TYPE_* constant of the image
+
+        Raises:
+            ValueError: if the encoding does not support 'type_'.
+            RuntimeError: if OpenCV fails to encode the image.
+
+        Returns:
+            np.ndarray: shape=(B,), dtype=np.uint8 the encoded image
+        """
+        if self.encoding not in IMAGE_TYPES.get(type_, ()):
+            raise ValueError('"{0}" can not be encoded with "{1}".'.format(type_, self.encoding))
+        if type_ in _RGB_TO_BGR:
+            data = cv2.cvtColor(data, _RGB_TO_BGR[type_])
+        success, blob = cv2.imencode(IMAGE_ENCODINGS[self.encoding], data, self.__get_params())
+        if success is False:
+            raise RuntimeError('Failed to encode "{0}" with "{1}".'.format(type_, self.encoding))
+        return blob.reshape(-1)
+
+IMAGE_CODEC_PNG:H5ImageCodec = H5ImageCodec(ENCODING_PNG)
+IMAGE_CODEC_JPEG:H5ImageCodec = H5ImageCodec(ENCODING_JPEG)
+IMAGE_CODEC_WEBP:H5ImageCodec = H5ImageCodec(ENCODING_WEBP)
+
+def encode_images(images:Sequence[np.ndarray], type_:str, codec:H5ImageCodec) -> List[np.ndarray]:
+    """encode_images
+
+    Encode images on the thread pool of IMAGE_WORKERS threads.
+
+    Args:
+        images (Sequence[np.ndarray]): the images
+        type_ (str): TYPE_* constant of the images
+        codec (H5ImageCodec): the encoding
+
+    Returns:
+        List[np.ndarray]: the encoded images in the same order
+    """
+    if len(images) < 2:
+        return [codec.encode(image, type_) for image in images]
+    return list(_get_executor().map(lambda image: codec.encode(image, type_), images))
+
+def decode_image(blob:np.ndarray, type_:str) -> np.ndarray:
+    """decode_image
+
+    Decode an image encoded by H5ImageCodec.
+
+    Args:
+        blob (np.ndarray): shape=(B,), dtype=np.uint8 the encoded image
+        type_ (str): TYPE_* constant of the image
+
+    Raises:
+        RuntimeError: if OpenCV fails to decode the image.
+
+    Returns:
+        np.ndarray: the image
+    """
+    # WebP always decodes to color, so 'mono8' is read as grayscale.
+    flags = cv2.IMREAD_GRAYSCALE if type_ == TYPE_MONO8 else cv2.IMREAD_UNCHANGED
+    data = cv2.imdecode(np.asarray(blob, dtype=np.uint8), flags)
+    if data is None:
+        raise RuntimeError('Failed to decode "{0}".'.format(type_))
+    if type_ in _BGR_TO_RGB:
+        data = cv2.cvtColor(data, _BGR_TO_RGB[type_])
+    return data
+
+def decode_images(blobs:Sequence[np.ndarray], types:Sequence[str]) -> List[np.ndarray]:
+    """decode_images
+
+    Decode images on the thread pool of IMAGE_WORKERS threads.
+
+    Args:
+        blobs (Sequence[np.ndarray]): the encoded images
+        types (Sequence[str]): TYPE_* constants of the images
+
+    Returns:
+        List[np.ndarray]: the images in the same order
+    """
+    if len(blobs) < 2:
+        return [decode_image(blob, type_) for blob, type_ in zip(blobs, types)]
+    return list(_get_executor().map(decode_image, blobs, types))
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Tuple
+import collections
+import concurrent.futures
+import csv
+import os
+import time
+import cv2
+import numpy as np
+
+from .structure import *
+from .image import IMAGE_WORKERS
+
+if TYPE_CHECKING:
+    from . import H5Dataset
+
+INGEST_PREFETCH:int = 16
+
+_IMREAD_FLAGS:Dict[str, int] = {
+    TYPE_MONO8: cv2.IMREAD_GRAYSCALE,
+    TYPE_MONO16: cv2.IMREAD_ANYDEPTH,
+    TYPE_BGR8: cv2.IMREAD_COLOR,
+    TYPE_RGB8: cv2.IMREAD_COLOR,
+    TYPE_BGRA8: cv2.IMREAD_UNCHANGED,
+    TYPE_RGBA8: cv2.IMREAD_UNCHANGED,
+    TYPE_DEPTH: cv2.IMREAD_ANYDEPTH,
+    TYPE_DISPARITY: cv2.IMREAD_ANYDEPTH,
+    TYPE_SEMANTIC2D: cv2.IMREAD_GRAYSCALE,
+}
+_IMREAD_COLORS:Dict[str, int] = {
+    TYPE_RGB8: cv2.COLOR_BGR2RGB,
+    TYPE_RGBA8: cv2.COLOR_BGRA2RGBA,
+}
+# The arguments of the 'set_*' functions without a default.
+_REQUIRED_KWDS:Dict[str, Tuple[str, ...]] = {
+    TYPE_DISPARITY: ('base_line',),
+    TYPE_SEMANTIC1D: ('label_tag',),
+    TYPE_SEMANTIC2D: ('label_tag',),
+}
+
+class H5IngestSource():
+    """H5IngestSource
+
+    A file of a manifest, read by 'ingest_files' and written to a frame with the 'set_*' function of its type.
+    '.npy' files are read with 'np.load', '.bin' files with 'np.fromfile' and the other files with 'cv2.imread'.
+
+    Args:
+        index (int): frame index in '/data'
+        tag (str): tag of the data
+        type_ (str): TYPE_* constant. The images, TYPE_DEPTH, TYPE_DISPARITY, TYPE_POINTS, TYPE_SEMANTIC1D and TYPE_SEMANTIC2D.
+        path (str): path of the file
+        frame_id (str, optional): frame id. Required by all types except TYPE_SEMANTIC1D. Defaults to None.
+        stamp_sec (int, optional): timestamp (integer part [sec]). Defaults to 0.
+        stamp_nsec (int, optional): timestamp (fractional part [nsec]). Defaults to 0.
+        scale (float, optional): factor of the integer values of TYPE_DEPTH and TYPE_DISPARITY, e.g. 0.001 for 16-bit PNG in millimeters. Defaults to None.
+        dims (int, optional): number of the float32 values of a point in a '.bin' file, e.g. 4 for x, y, z and intensity. Defaults to 4.
+        kwds (Dict[str, Any], optional): the other arguments of the 'set_*' function.
+            'base_line' of TYPE_DISPARITY and 'label_tag' of TYPE_SEMANTIC1D and TYPE_SEMANTIC2D are required. Defaults to None.
+
+    Raises:
+        ValueError: if the type can not be ingested, 'frame_id' is missing, or a required argument of the 'set_*' function is not in 'kwds'.
+    """
+
+    def __init__(self, index:int, tag:str, type_:str, path:str, frame_id:str=None, stamp_sec:int=0, stamp_nsec:int=0,
+        scale:float=None, dims:int=4, kwds:Dict[str, Any]=None) -> None:
+        if type_ not in _IMREAD_FLAGS and type_ not in [TYPE_POINTS, TYPE_SEMANTIC1D]:
+            raise ValueError('"{0}" can not be ingested from a file.'.format(type_))
+        if dims < 3 and type_ == TYPE_POINTS:
+            raise ValueError('"dims" must be 3 or greater.')
+        if type_ != TYPE_SEMANTIC1D and not frame_id:
+            raise ValueError('"{0}" of "{1}" requires "frame_id".'.format(tag, type_))
+        for key in _REQUIRED_KWDS.get(type_, ()):
+            if kwds is None or kwds.get(key) is None:
+                raise ValueError('"{0}" of "{1}" requires "{2}" in "kwds".'.format(tag, type_, key))
+        self.index:int = index
+        self.tag:str = tag
+        self.type_:str = type_
+        self.path:str = path
+        self.frame_id:str = frame_id
+        self.stamp_sec:int = stamp_sec
+        self.stamp_nsec:int = stamp_nsec
+        self.scale:float = scale
+        self.dims:int = dims
+        self.kwds:Dict[str, Any] = {} if kwds is None else kwds
+
+    def __repr__(self) -> str:
+        return 'H5IngestSource(index={0}, tag={1!r}, type_={2!r}, path={3!r})'.format(self.index, self.tag, self.type_, self.path)
+
+def read_source(source:H5IngestSource) -> np.ndarray:
+    """read_source
+
+    Read the data of a source in the dtype of its type.
+
+    Args:
+        source (H5IngestSource): the source
+
+    Raises:
+        RuntimeError: if OpenCV fails to read the file.
+        ValueError: if the integer values do not fit in the dtype of the type.
+
+    Returns:
+        np.ndarray: the data
+    """
+    extension = os.path.splitext(source.path)[1].lower()
+    if extension == '.npy':
+        data = np.load(source.path)
+    elif extension == '.bin' or source.type_ in [TYPE_POINTS, TYPE_SEMANTIC1D]:
+        if source.type_ == TYPE_POINTS:
+            # e.g. the scans of KITTI, float32 x, y, z and intensity
+            data = np.fromfile(source.path, dtype=np.float32).reshape(-1, source.dims)[:, :3]
+        else:
+            # e.g. the labels of SemanticKITTI, uint32 with the instance in the upper 16 bits
+            data = np.fromfile(source.path, dtype=np.uint32) & 0xFFFF
+    else:
+        # OpenEXR requires OPENCV_IO_ENABLE_OPENEXR=1 in the environment.
+        data = cv2.imread(source.path, _IMREAD_FLAGS[source.type_])
+        if data is None:
+            raise RuntimeError('Failed to read "{0}".'.format(source.path))
+        if source.type_ in _IMREAD_COLORS:
+            data = cv2.cvtColor(data, _IMREAD_COLORS[source.type_])
+    if source.scale is not None:
+        data = data.astype(np.float32) * np.float32(source.scale)
+    dtype = np.dtype(DTYPE_NUMPY[source.type_])
+    if data.dtype != dtype and np.issubdtype(data.dtype, np.integer) and np.issubdtype(dtype, np.integer) and data.size > 0:
+        if data.min() < np.iinfo(dtype).min or data.max() > np.iinfo(dtype).max:
+            raise ValueError('The values of "{0}" do not fit in "{1}".'.format(source.path, dtype))
+    return np.ascontiguousarray(data, dtype=dtype)
+
+def _read_source(source:H5IngestSource) -> Tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    data = read_source(source)
+    return data, time.perf_counter() - start
+
+def load_manifest(path:str) -> Iterator[H5IngestSource]:
+    """load_manifest
+
+    Read a CSV manifest with a header of the columns 'index', 'tag', 'type', 'path' and optionally 'frame_id', 'stamp_sec', 'stamp_nsec', 'scale', 'dims',
+    'base_line' and 'label_tag'. 'frame_id' is required by all types except TYPE_SEMANTIC1D, 'base_line' by TYPE_DISPARITY
+    and 'label_tag' by TYPE_SEMANTIC1D and TYPE_SEMANTIC2D.
+    The relative paths are relative to the directory of the manifest. The rows are read lazily.
+
+    Args:
+        path (str): path of the manifest
+
+    Raises:
+        ValueError: if a row lacks a column required by its type.
+
+    Yields:
+        H5IngestSource: the source of each row
+    """
+    root = os.path.dirname(os.path.abspath(path))
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            frame_id = row.get('frame_id')
+            scale = row.get('scale')
+            dims = row.get('dims')
+            kwds = {}
+            if row.get('base_line'):
+                kwds['base_line'] = float(row['base_line'])
+            if row.get('label_tag'):
+                kwds['label_tag'] = row['label_tag']
+            yield H5IngestSource(
+                int(row['index']), row['tag'], row['type'], os.path.join(root, row['path']),
+                frame_id=frame_id if frame_id else None,
+                stamp_sec=int(row.get('stamp_sec') or 0), stamp_nsec=int(row.get('stamp_nsec') or 0),
+                scale=float(scale) if scale else None, dims=int(dims) if dims else 4, kwds=kwds,
+            )
+
+def _get_writers() -> Dict[str, Callable[..., None]]:
+    # The 'set_*' functions are defined after the modules are imported.
+    from . import set_mono8, set_mono16, set_bgr8, set_rgb8, set_bgra8, set_rgba8, set_depth, set_disparity, set_points, set_semantic1d, set_semantic2d
+    return {
+        TYPE_MONO8: set_mono8,
+        TYPE_MONO16: set_mono16,
+        TYPE_BGR8: set_bgr8,
+        TYPE_RGB8: set_rgb8,
+        TYPE_BGRA8: set_bgra8,
+        TYPE_RGBA8: set_rgba8,
+        TYPE_DEPTH: set_depth,
+        TYPE_DISPARITY: set_disparity,
+        TYPE_POINTS: set_points,
+        TYPE_SEMANTIC1D: set_semantic1d,
+        TYPE_SEMANTIC2D: set_semantic2d,
+    }
+
+def _group_frames(sources:Iterable[H5IngestSource]) -> Iterator[Tuple[int, List[H5IngestSource]]]:
+    index = None
+    frame = []
+    for source in sources:
+        if index is not None and source.index != index:
+            if source.index < index:
+                raise ValueError('The manifest must be sorted by the frame index (index: {0} after {1}).'.format(source.index, index))
+            yield index, frame
+            frame = []
+        index = source.index
+        frame.append(source)
+    if len(frame) > 0:
+        yield index, frame
+
+def ingest_files(h5file:'H5Dataset', sources:Iterable[H5IngestSource], workers:int=IMAGE_WORKERS, prefetch:int=INGEST_PREFETCH,
+    processes:bool=False, callback:Callable[[Dict[str, Any]], None]=None, interval:float=None) -> Dict[str, Any]:
+    """ingest_files
+
+    Read the files of a manifest on a pool of workers and write them to an H5Dataset in the order of the frames.
+    The files of at most 'prefetch' frames are read ahead, so the memory does not grow with the manifest.
+    The calling thread is the only writer of the H5Dataset.
+
+    Args:
+        h5file (H5Dataset): H5Dataset to write
+        sources (Iterable[H5IngestSource]): the sources sorted by the frame index, e.g. 'load_manifest'.
+            The frames are written after the last frame of 'h5file', and the missing indices are written as empty frames.
+        workers (int, optional): number of the workers. Defaults to IMAGE_WORKERS.
+        prefetch (int, optional): maximum number of the frames read ahead. Defaults to INGEST_PREFETCH.
+        processes (bool, optional): If True, the files are read on processes instead of threads. Defaults to False.
+        callback (Callable[[Dict[str, Any]], None], optional): function called with the statistics every 'interval' seconds. Defaults to None.
+        interval (float, optional): period of 'callback' [sec]. If None, only at the end. Defaults to None.
+
+    Raises:
+        ValueError: if the manifest is not sorted, or a frame index is not after the last frame of 'h5file'.
+        RuntimeError: if reading a file fails.
+
+    Returns:
+        Dict[str, Any]: {'frames', 'sources', 'bytes', 'elapsed_s', 'read_s', 'write_s', 'wait_s', 'frames_per_s', 'bytes_per_s', 'queue_mean', 'queue_max', 'ready_mean'}.
+            'read_s' is the total time of the workers, and 'wait_s' the time the writer waited for them.
+            'queue_*' is the number of the frames read ahead and 'ready_mean' the number of them already read, when a frame is written.
+    """
+    if workers < 1:
+        raise ValueError('"workers" must be greater than 0.')
+    if prefetch < 1:
+        raise ValueError('"prefetch" must be greater than 0.')
+    if interval is not None and interval <= 0.0:
+        raise ValueError('"interval" must be positive.')
+
+    writers = _get_writers()
+    if processes is True:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='h5datacreator-ingest')
+
+    # frames, sources, bytes, read, write, wait, the sum of the queue, the maximum of the queue and the sum of the ready frames
+    counts = [0, 0, 0, 0.0, 0.0, 0.0, 0, 0, 0]
+    start = time.perf_counter()
+
+    def get_stats() -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        frames = counts[0]
+        return {
+            'frames': frames,
+            'sources': counts[1],
+            'bytes': counts[2],
+            'elapsed_s': elapsed,
+            'read_s': counts[3],
+            'write_s': counts[4],
+            'wait_s': counts[5],
+            'frames_per_s': frames / elapsed if elapsed > 0.0 else 0.0,
+            'bytes_per_s': counts[2] / elapsed if elapsed > 0.0 else 0.0,
+            'queue_mean': counts[6] / frames if frames > 0 else 0.0,
+            'queue_max': counts[7],
+            'ready_mean': counts[8] / frames if frames > 0 else 0.0,
+        }
+
+    frames = _group_frames(sources)
+    pending:collections.deque = collections.deque()
+    try:
+        next_index = h5file.get_maximum_data_index() + 1
+        # 'get_next_data_group' continues from the current frame, so it is moved to the last frame.
+        h5file.get_data_group_from_index(next_index - 1)
+    except ValueError:
+        next_index = 0
+    last_report = start
+    try:
+        while True:
+            while len(pending) < prefetch:
+                frame = next(frames, None)
+                if frame is None:
+                    break
+                index, frame_sources = frame
+                pending.append((index, frame_sources, [executor.submit(_read_source, source) for source in frame_sources]))
+            if len(pending) < 1:
+                break
+
+            counts[6] += len(pending)
+            counts[7] = max(counts[7], len(pending))
+            counts[8] += sum(1 for _, _, futures in pending if all(future.done() for future in futures))
+
+            index, frame_sources, futures = pending.popleft()
+            if index < next_index:
+                raise ValueError('The frame index {0} must not be before {1}.'.format(index, next_index))
+            wait_start = time.perf_counter()
+            results = []
+            for source, future in zip(frame_sources, futures):
+                try:
+                    results.append(future.result())
+                except Exception as error:
+                    raise RuntimeError('Reading "{0}" failed.'.format(source.path)) from error
+            counts[5] += time.perf_counter() - wait_start
+
+            write_start = time.perf_counter()
+            while next_index <= index:
+                h5_group = h5file.get_next_data_group()
+                next_index += 1
+            for source, (data, read_time) in zip(frame_sources, results):
+                if source.type_ == TYPE_SEMANTIC1D:
+                    writers[source.type_](h5_group, source.tag, data, stamp_sec=source.stamp_sec, stamp_nsec=source.stamp_nsec, **source.kwds)
+                else:
+                    writers[source.type_](h5_group, source.tag, data, source.frame_id, stamp_sec=source.stamp_sec, stamp_nsec=source.stamp_nsec, **source.kwds)
+                counts[1] += 1
+                counts[2] += data.nbytes
+                counts[3] += read_time
+            results = None
+            counts[4] += time.perf_counter() - write_start
+            counts[0] += 1
+
+            if callback is not None and interval is not None and time.perf_counter() - last_report >= interval:
+                last_report = time.perf_counter()
+                callback(get_stats())
+    finally:
+        for _, _, futures in pending:
+            for future in futures:
+                future.cancel()
+        executor.shutdown(wait=True)
+
+    stats = get_stats()
+    if callback is not None:
+        callback(stats)
+    return stats
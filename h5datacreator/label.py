@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple
+import numpy as np
+
+from .structure import *
+
+ENCODING_LABEL_PACKED:str = 'label-packed'
+ENCODING_LABEL_RLE:str = 'label-rle'
+LABEL_ENCODINGS:Tuple[str, ...] = (ENCODING_LABEL_PACKED, ENCODING_LABEL_RLE)
+
+# The widths divide a byte, so that a value never spans two bytes.
+LABEL_BITS:Tuple[int, ...] = (1, 2, 4, 8)
+DTYPE_LABEL_RUN:np.dtype = np.dtype([('value', np.uint8), ('length', np.uint32)])
+
+def get_label_bits(max_index:int) -> int:
+    """get_label_bits
+
+    Get the bit width of the labels.
+
+    Args:
+        max_index (int): the largest label index
+
+    Returns:
+        int: the smallest width in LABEL_BITS that holds 'max_index'
+    """
+    for bits in LABEL_BITS:
+        if max_index < (1 << bits):
+            return bits
+    raise ValueError('"max_index" must be less than 256.')
+
+def pack_labels(data:np.ndarray, bits:int) -> np.ndarray:
+    """pack_labels
+
+    Pack the labels into bytes with 'bits' bits per label, from the least significant bits.
+    The first byte is the number of the unused labels in the last byte.
+
+    Args:
+        data (np.ndarray): dtype=np.uint8 labels less than 2^bits
+        bits (int): width in LABEL_BITS
+
+    Returns:
+        np.ndarray: shape=(B,), dtype=np.uint8 the packed labels
+    """
+    flat = np.ascontiguousarray(data, dtype=np.uint8).reshape(-1)
+    per_byte = 8 // bits
+    padding = -flat.shape[0] % per_byte
+    if bits == 8:
+        packed = flat
+    elif bits == 1:
+        packed = np.packbits(flat, bitorder='little')
+    else:
+        if padding > 0:
+            flat = np.concatenate([flat, np.zeros(padding, dtype=np.uint8)])
+        groups = flat.reshape(-1, per_byte)
+        packed = groups[:, 0].copy()
+        for k in range(1, per_byte):
+            packed |= groups[:, k] << np.uint8(k * bits)
+    return np.concatenate([np.array([padding], dtype=np.uint8), packed])
+
+def unpack_labels(packed:np.ndarray, bits:int) -> np.ndarray:
+    """unpack_labels
+
+    Inverse of 'pack_labels'.
+
+    Args:
+        packed (np.ndarray): shape=(B,), dtype=np.uint8 the packed labels
+        bits (int): width in LABEL_BITS
+
+    Returns:
+        np.ndarray: shape=(N,), dtype=np.uint8 the labels
+    """
+    padding = int(packed[0])
+    packed = packed[1:]
+    per_byte = 8 // bits
+    count = packed.shape[0] * per_byte - padding
+    if bits == 8:
+        return packed.copy()
+    if bits == 1:
+        return np.unpackbits(packed, count=count, bitorder='little')
+    labels = np.empty((packed.shape[0], per_byte), dtype=np.uint8)
+    mask = np.uint8((1 << bits) - 1)
+    for k in range(per_byte):
+        np.bitwise_and(packed >> np.uint8(k * bits), mask, out=labels[:, k])
+    return labels.reshape(-1)[:count]
+
+def encode_label_runs(data:np.ndarray) -> np.ndarray:
+    """encode_label_runs
+
+    Run-length encode the labels in row-major order.
+
+    Args:
+        data (np.ndarray): dtype=np.uint8 labels
+
+    Returns:
+        np.ndarray: shape=(R,), DTYPE_LABEL_RUN array of the 'value' and the 'length' of the runs
+    """
+    flat = np.asarray(data, dtype=np.uint8).reshape(-1)
+    starts = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    starts = np.concatenate([[0], starts]) if flat.shape[0] > 0 else starts
+    runs = np.empty(starts.shape[0], dtype=DTYPE_LABEL_RUN)
+    runs['value'] = flat[starts]
+    runs['length'] = np.diff(np.append(starts, flat.shape[0]))
+    return runs
+
+def decode_label_runs(runs:np.ndarray) -> np.ndarray:
+    """decode_label_runs
+
+    Inverse of 'encode_label_runs'.
+
+    Args:
+        runs (np.ndarray): DTYPE_LABEL_RUN array
+
+    Returns:
+        np.ndarray: shape=(N,), dtype=np.uint8 the labels
+    """
+    return np.repeat(runs['value'], runs['length'].astype(np.intp))
+
+class H5LabelCodec():
+    """H5LabelCodec
+
+    Encoding of TYPE_SEMANTIC1D and TYPE_SEMANTIC2D.
+    The labels are bit-packed with the width of the label config, or run-length encoded.
+
+    Args:
+        encoding (str, optional): ENCODING_LABEL_PACKED or ENCODING_LABEL_RLE.
+            If None, each frame is run-length encoded when the runs are smaller than the packed labels. Defaults to None.
+        bits (int, optional): width in LABEL_BITS. If None, the width of the largest index of the label config. Defaults to None.
+    """
+
+    def __init__(self, encoding:str=None, bits:int=None) -> None:
+        if encoding is not None and encoding not in LABEL_ENCODINGS:
+            raise ValueError('"encoding" must be one of {0}.'.format(list(LABEL_ENCODINGS)))
+        if bits is not None and bits not in LABEL_BITS:
+            raise ValueError('"bits" must be one of {0}.'.format(list(LABEL_BITS)))
+        self.encoding:str = encoding
+        self.bits:int = bits
+
+    def __repr__(self) -> str:
+        return 'H5LabelCodec(encoding={0!r}, bits={1!r})'.format(self.encoding, self.bits)
+
+    def encode(self, data:np.ndarray, bits:int, encoding:str=None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """encode
+
+        Encode the labels.
+
+        Args:
+            data (np.ndarray): dtype=np.uint8 labels
+            bits (int): width of the label config, used if 'self.bits' is None
+            encoding (str, optional): overrides 'self.encoding' if not None. Defaults to None.
+
+        Raises:
+            ValueError: if a label does not fit in the width.
+
+        Returns:
+            Tuple[np.ndarray, Dict[str, Any]]: the encoded labels and the attributes 'encoding', 'bits' and 'shape' (only 2-D labels)
+        """
+        if self.bits is not None:
+            bits = self.bits
+        if encoding is None:
+            encoding = self.encoding
+        if data.size > 0 and int(data.max()) >= (1 << bits):
+            raise ValueError('The labels must be less than {0} for {1} bits.'.format(1 << bits, bits))
+        runs = None
+        if encoding != ENCODING_LABEL_PACKED:
+            runs = encode_label_runs(data)
+            if encoding is None and runs.nbytes >= (data.size * bits + 7) // 8:
+                runs = None
+        attrs = {
+            H5_ATTR_ENCODING: ENCODING_LABEL_PACKED if runs is None else ENCODING_LABEL_RLE,
+            H5_ATTR_BITS: bits,
+        }
+        # The number of 'semantic1d' labels differs by frame and is recovered from the encoded labels.
+        if len(data.shape) > 1:
+            attrs[H5_ATTR_SHAPE] = np.array(data.shape, dtype=np.int64)
+        return (pack_labels(data, bits) if runs is None else runs), attrs
+
+LABEL_CODEC_AUTO:H5LabelCodec = H5LabelCodec()
+LABEL_CODEC_PACKED:H5LabelCodec = H5LabelCodec(ENCODING_LABEL_PACKED)
+LABEL_CODEC_RLE:H5LabelCodec = H5LabelCodec(ENCODING_LABEL_RLE)
+
+def decode_labels(data:np.ndarray, encoding:str, attrs:Dict[str, Any]) -> np.ndarray:
+    """decode_labels
+
+    Decode the labels encoded by H5LabelCodec.
+    The attributes 'bits' and 'shape' are removed from 'attrs'.
+
+    Args:
+        data (np.ndarray): the encoded labels
+        encoding (str): ENCODING_LABEL_PACKED or ENCODING_LABEL_RLE
+        attrs (Dict[str, Any]): attributes of the dataset
+
+    Returns:
+        np.ndarray: dtype=np.uint8 the labels
+    """
+    bits = int(attrs.pop(H5_ATTR_BITS))
+    shape = attrs.pop(H5_ATTR_SHAPE, None)
+    labels = unpack_labels(data, bits) if encoding == ENCODING_LABEL_PACKED else decode_label_runs(data)
+    if shape is None:
+        return labels
+    return labels.reshape(tuple(int(s) for s in shape))
@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+import os
+import time
+import h5py
+import numpy as np
+
+from .structure import *
+from .shard import _read_layout, _read_length, _copy_attrs, _write_appendable
+from .tuning import H5FileProfile, open_h5file
+
+def _get_filters(h5_dataset:h5py.Dataset) -> Tuple[Any, ...]:
+    dcpl = h5_dataset.id.get_create_plist()
+    return tuple(dcpl.get_filter(i) for i in range(dcpl.get_nfilters()))
+
+def _is_variable_length(dtype:np.dtype) -> bool:
+    return h5py.check_vlen_dtype(dtype) is not None or (h5py.check_string_dtype(dtype) is not None and h5py.check_string_dtype(dtype).length is None)
+
+def _get_ends(h5_meta:h5py.Group, offsets:np.ndarray, rows:int) -> np.ndarray:
+    # The end of the rows of each frame is the offset of the next frame, or '/meta/[path]/end' of a merged file.
+    ends = np.append(offsets[1:], rows).astype(np.int64)
+    h5_ends:h5py.Dataset = h5_meta.get(H5_KEY_END)
+    if h5_ends is not None:
+        ends[:h5_ends.shape[0]] = h5_ends[()]
+    return ends
+
+class _H5Merger():
+    """_H5Merger
+
+    Copy of the frames, the metadata and the common groups of H5Datasets into one H5Dataset.
+    The datasets are copied without decoding: the objects of LAYOUT_GROUP by H5Ocopy, and the stacked datasets chunk by chunk
+    with 'read_direct_chunk' and 'write_direct_chunk'. The rows of the datasets located by '/meta/[path]/offset', e.g. points,
+    are padded to start at a chunk boundary. A dataset read by the row of the frame that does not start at a chunk boundary,
+    or whose chunks or filters differ, is copied through the filters instead.
+    The objects shared by hard links in a source, e.g. by 'dedup', stay shared in the merged file.
+
+    Args:
+        h5_dst (h5py.File): the merged file
+        h5_srcs (List[h5py.File]): the source files
+        starts (List[int]): index of the first frame of each source in the merged file
+    """
+
+    def __init__(self, h5_dst:h5py.File, h5_srcs:List[h5py.File], starts:List[int]) -> None:
+        self.__h5_dst:h5py.File = h5_dst
+        self.__h5_srcs:List[h5py.File] = h5_srcs
+        self.__starts:List[int] = starts
+        # The path in the merged file of each object with more than one hard link, by source and address.
+        self.__copied:Dict[Tuple[int, int], str] = {}
+        self.raw_chunks:int = 0
+        self.raw_bytes:int = 0
+        self.decoded_bytes:int = 0
+
+    def __copy_object(self, source:int, h5_src:Union[h5py.Group, h5py.Dataset], h5_dst_parent:h5py.Group, name:str) -> None:
+        info = h5py.h5o.get_info(h5_src.id)
+        if info.rc > 1:
+            path = self.__copied.get((source, info.addr))
+            if path is not None:
+                h5_dst_parent[name] = self.__h5_dst[path]
+                return
+        if isinstance(h5_src, h5py.Group):
+            h5_dst:h5py.Group = h5_dst_parent.create_group(name)
+            _copy_attrs(h5_src, h5_dst)
+            for key, h5_child in h5_src.items():
+                self.__copy_object(source, h5_child, h5_dst, key)
+        else:
+            # H5Ocopy copies the chunks as they are stored.
+            h5_src.file.copy(h5_src, h5_dst_parent, name=name)
+            h5_dst = h5_dst_parent[name]
+            self.raw_bytes += h5_src.id.get_storage_size()
+        if info.rc > 1:
+            self.__copied[(source, info.addr)] = h5_dst.name
+
+    def copy_frames(self) -> None:
+        """copy_frames
+
+        Copy '/data/[index]' of LAYOUT_GROUP with the indices shifted by the starts of the sources.
+        """
+        h5_data:h5py.Group = self.__h5_dst[H5_KEY_DATA]
+        for source, (h5_src, start) in enumerate(zip(self.__h5_srcs, self.__starts)):
+            for key, h5_frame in h5_src[H5_KEY_DATA].items():
+                self.__copy_object(source, h5_frame, h5_data, str(start + int(key)))
+
+    def __concatenate_chunks(self, name:str, items:List[Tuple[int, h5py.Dataset]], padded:bool) -> Dict[int, int]:
+        first = items[0][1]
+        for _, h5_src in items:
+            if h5_src.shape[1:] != first.shape[1:] or h5_src.dtype != first.dtype:
+                raise ValueError('"{0}" has different shapes or dtypes in the sources.'.format(name))
+        filters = _get_filters(first)
+        chunk_rows = 0 if first.chunks is None else first.chunks[0]
+
+        # The first row of each source in the merged dataset. The rows of a dataset located by '/meta/[path]/offset' start
+        # at the next chunk boundary, so that the chunks of every source are copied as they are stored.
+        # The other datasets are read by the row of '/meta/[path]', so a source that does not start at a chunk boundary is decoded.
+        starts:Dict[int, int] = {}
+        raws:Dict[int, bool] = {}
+        row = 0
+        for source, h5_src in items:
+            raw = chunk_rows > 0 and h5_src.chunks == first.chunks and _get_filters(h5_src) == filters and _is_variable_length(first.dtype) is False
+            if raw is True and padded is True:
+                row = -(-row // chunk_rows) * chunk_rows
+            raws[source] = raw is True and row % chunk_rows == 0
+            starts[source] = row
+            row += h5_src.shape[0]
+
+        parent, _, key = name.rpartition('/')
+        h5_parent:h5py.Group = self.__h5_dst.require_group(parent)
+        # The merged dataset has the chunks, the filters and the fill value of the first source, and stays appendable.
+        space = h5py.h5s.create_simple((row,) + first.shape[1:], (h5py.h5s.UNLIMITED,) + first.shape[1:])
+        dsid = h5py.h5d.create(h5_parent.id, key.encode('utf-8'), first.id.get_type(), space, dcpl=first.id.get_create_plist())
+        h5_dst = h5py.Dataset(dsid)
+        _copy_attrs(first, h5_dst)
+
+        for source, h5_src in items:
+            row = starts[source]
+            if raws[source] is True:
+                chunks = []
+                h5_src.id.chunk_iter(chunks.append)
+                for chunk in chunks:
+                    filter_mask, data = h5_src.id.read_direct_chunk(chunk.chunk_offset)
+                    dsid.write_direct_chunk((chunk.chunk_offset[0] + row,) + tuple(chunk.chunk_offset[1:]), data, filter_mask)
+                    self.raw_chunks += 1
+                    self.raw_bytes += len(data)
+            else:
+                rows = h5_src.shape[0]
+                step = chunk_rows if chunk_rows > 0 else max(rows, 1)
+                for begin in range(0, rows, step):
+                    end = min(begin + step, rows)
+                    values = h5_src[begin:end]
+                    h5_dst[row + begin:row + end] = values
+                    self.decoded_bytes += values.nbytes
+        return starts
+
+    def copy_stacked(self) -> None:
+        """copy_stacked
+
+        Concatenate '/data/[tag]' of LAYOUT_STACKED along the frame axis, and '/meta/[tag]' with the indices and offsets shifted.
+        A dataset located by '/meta/[path]/offset' is padded to the chunk boundary before each source,
+        and '/meta/[path]/end' holds the end of the rows of each frame if the rows are not contiguous.
+        """
+        datasets:Dict[str, List[Tuple[int, h5py.Dataset]]] = {}
+        groups:Dict[str, h5py.Group] = {}
+
+        def visit_data(source:int) -> Callable[[str, Any], None]:
+            def visit(name:str, h5_obj:Any) -> None:
+                if isinstance(h5_obj, h5py.Dataset):
+                    datasets.setdefault(name, []).append((source, h5_obj))
+                elif name not in groups:
+                    groups[name] = h5_obj
+            return visit
+        for source, h5_src in enumerate(self.__h5_srcs):
+            h5_src[H5_KEY_DATA].visititems(visit_data(source))
+
+        h5_data:h5py.Group = self.__h5_dst[H5_KEY_DATA]
+        for name in sorted(groups.keys()):
+            _copy_attrs(groups[name], h5_data.create_group(name))
+        starts:Dict[str, Dict[int, int]] = {}
+        for name, items in datasets.items():
+            padded = all(H5_KEY_META + '/' + name + '/' + H5_KEY_OFFSET in self.__h5_srcs[source] for source, _ in items)
+            starts[name] = self.__concatenate_chunks(H5_KEY_DATA + '/' + name, items, padded)
+
+        # '/meta' is small, so it is decoded to shift the frame indices and the offsets into the rows of '/data'.
+        columns:Dict[str, List[np.ndarray]] = {}
+        ends:Dict[str, List[np.ndarray]] = {}
+        for source, (h5_src, start) in enumerate(zip(self.__h5_srcs, self.__starts)):
+            h5_meta:h5py.Group = h5_src.get(H5_KEY_META)
+            if h5_meta is None:
+                continue
+
+            def visit_meta(name:str, h5_obj:Any) -> None:
+                if isinstance(h5_obj, h5py.Dataset) is False:
+                    return
+                path, _, key = name.rpartition('/')
+                if key == H5_KEY_END:
+                    return
+                values = h5_obj[()]
+                if key == H5_KEY_INDEX:
+                    values = values + start
+                elif key == H5_KEY_OFFSET:
+                    ends.setdefault(path, []).append(_get_ends(h5_obj.parent, values, h5_src[H5_KEY_DATA + '/' + path].shape[0]) + starts[path][source])
+                    values = values + starts[path][source]
+                columns.setdefault(name, []).append(values)
+            h5_meta.visititems(visit_meta)
+        for path, items in ends.items():
+            offsets = np.concatenate(columns[path + '/' + H5_KEY_OFFSET])
+            values = np.concatenate(items)
+            if np.any(offsets[1:] != values[:-1]):
+                columns[path + '/' + H5_KEY_END] = [values]
+        self.__write_columns(H5_KEY_META, columns)
+
+    def copy_metadata_tables(self) -> None:
+        """copy_metadata_tables
+
+        Concatenate the metadata tables '/meta/[tag]' of LAYOUT_GROUP with the frame indices shifted.
+        """
+        tables:Dict[str, List[np.ndarray]] = {}
+        for h5_src, start in zip(self.__h5_srcs, self.__starts):
+            h5_meta:h5py.Group = h5_src.get(H5_KEY_META)
+            if h5_meta is None:
+                continue
+            for tag, h5_table in h5_meta.items():
+                table = h5_table[()]
+                if len(tables.get(tag, [])) > 0 and table.dtype != tables[tag][0].dtype:
+                    raise ValueError('The columns of the metadata table "{0}" differ in the sources.'.format(tag))
+                table[H5_KEY_INDEX] += start
+                tables.setdefault(tag, []).append(table)
+        self.__write_columns(H5_KEY_META, tables)
+
+    def __write_columns(self, root:str, columns:Dict[str, List[np.ndarray]]) -> None:
+        for name, items in columns.items():
+            dtypes = set(values.dtype for values in items)
+            if len(dtypes) > 1 and all(values.dtype.kind in 'OSU' for values in items):
+                # e.g. the fixed-length frame ids of SWMR mode and the variable-length ones
+                values = np.concatenate([values.astype(object) for values in items])
+                dtype = h5py.string_dtype()
+            else:
+                values = np.concatenate(items)
+                dtype = items[0].dtype
+            parent, _, key = (root + '/' + name).rpartition('/')
+            _write_appendable(self.__h5_dst.require_group(parent), key, values, dtype)
+
+    def copy_timestamps(self) -> None:
+        """copy_timestamps
+
+        Merge the timestamp tables '/timestamp/[tag]' with the frame indices shifted.
+        """
+        tables:Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        for h5_src, start in zip(self.__h5_srcs, self.__starts):
+            h5_timestamp:h5py.Group = h5_src.get(H5_KEY_TIMESTAMP)
+            if h5_timestamp is None:
+                continue
+            for tag, h5_table in h5_timestamp.items():
+                tables.setdefault(tag, []).append((h5_table[H5_KEY_STAMP][()], h5_table[H5_KEY_INDEX][()] + start))
+        for tag, items in tables.items():
+            stamps = np.concatenate([stamp for stamp, _ in items])
+            indices = np.concatenate([index for _, index in items])
+            order = np.lexsort((indices, stamps))
+            self.__write_columns(H5_KEY_TIMESTAMP, {tag + '/' + H5_KEY_STAMP: [stamps[order]], tag + '/' + H5_KEY_INDEX: [indices[order]]})
+
+    def __merge_object(self, source:int, h5_src:Union[h5py.Group, h5py.Dataset], h5_dst_parent:h5py.Group, name:str) -> None:
+        h5_dst = h5_dst_parent.get(name)
+        if h5_dst is None:
+            self.__copy_object(source, h5_src, h5_dst_parent, name)
+        elif isinstance(h5_src, h5py.Group) and isinstance(h5_dst, h5py.Group):
+            for key, value in h5_src.attrs.items():
+                if key in h5_dst.attrs and _equal(h5_dst.attrs[key], value) is False:
+                    raise ValueError('The attribute "{0}" of "{1}" conflicts between the sources.'.format(key, h5_dst.name))
+                h5_dst.attrs[key] = value
+            for key, h5_child in h5_src.items():
+                self.__merge_object(source, h5_child, h5_dst, key)
+        elif isinstance(h5_src, h5py.Dataset) is False or isinstance(h5_dst, h5py.Dataset) is False or _equal_datasets(h5_src, h5_dst) is False:
+            raise ValueError('"{0}" conflicts between the sources.'.format(h5_dst.name))
+
+    def merge_common(self) -> None:
+        """merge_common
+
+        Merge '/label/[tag]' and the common groups. The objects in only one source are copied and the same objects are kept once.
+
+        Raises:
+            ValueError: if an object or an attribute has different values in the sources, e.g. a label with another name or color.
+        """
+        for source, h5_src in enumerate(self.__h5_srcs):
+            for key, h5_obj in h5_src.items():
+                if key in [H5_KEY_HEADER, H5_KEY_DATA, H5_KEY_META, H5_KEY_TIMESTAMP]:
+                    continue
+                self.__merge_object(source, h5_obj, self.__h5_dst, key)
+
+def _equal(a:Any, b:Any) -> bool:
+    return np.array_equal(np.asarray(a), np.asarray(b))
+
+def _equal_datasets(a:h5py.Dataset, b:h5py.Dataset) -> bool:
+    if a.shape != b.shape or a.dtype != b.dtype:
+        return False
+    if set(a.attrs.keys()) != set(b.attrs.keys()) or any(_equal(a.attrs[key], b.attrs[key]) is False for key in a.attrs.keys()):
+        return False
+    return _equal(a[()], b[()])
+
+def merge_datasets(path:str, src_paths:Sequence[str], profile:Union[str, H5FileProfile]=None) -> Dict[str, Any]:
+    """merge_datasets
+
+    Concatenate H5Datasets into one H5Dataset, e.g. the files of each drive into a file for training.
+    The frames are numbered consecutively in the order of 'src_paths'. Unlike 'finalize_shards', the merged file does not refer to the sources.
+    The compressed data are copied without decoding, so the merge is bound by I/O.
+    In LAYOUT_STACKED, the datasets located by '/meta/[path]/offset', e.g. points, always keep their chunks, but a dataset read by
+    the row of the frame, e.g. an image, is decoded when its source does not start at a chunk boundary of the merged dataset.
+    '/label/[tag]' and the common groups are merged, and an object that differs between the sources is an error.
+
+    Args:
+        path (str): path of the merged file
+        src_paths (Sequence[str]): paths of the sources
+        profile (str | H5FileProfile, optional): file-level settings of HDF5 of the merged file, e.g. 'convert'. Defaults to None.
+
+    Raises:
+        ValueError: if 'src_paths' is empty, the layouts or the metadata of the sources differ, a source was not closed after its last checkpoint,
+            or the labels or the common groups conflict.
+
+    Returns:
+        Dict[str, Any]: {'frames', 'raw_chunks', 'raw_bytes', 'decoded_bytes', 'elapsed_s'}.
+            'raw_bytes' is the size of the data copied without decoding, and 'decoded_bytes' the size of the stacked data that had to be decoded.
+    """
+    if len(src_paths) < 1:
+        raise ValueError('"src_paths" must not be empty.')
+    fullpath = os.path.abspath(path)
+    if os.path.isdir(os.path.dirname(fullpath)) is False:
+        raise NotADirectoryError('Directory "{0}" not found.'.format(os.path.dirname(fullpath)))
+    if any(os.path.abspath(src_path) == fullpath for src_path in src_paths):
+        raise ValueError('"path" must not be one of "src_paths".')
+
+    start_time = time.perf_counter()
+    h5_srcs:List[h5py.File] = []
+    try:
+        for src_path in src_paths:
+            h5_srcs.append(open_h5file(src_path, 'r'))
+        layout = _read_layout(h5_srcs[0])
+        metadata = h5_srcs[0][H5_KEY_DATA].attrs.get(H5_ATTR_METADATA, METADATA_ATTRS)
+        if isinstance(metadata, bytes):
+            metadata = metadata.decode('utf-8')
+        starts = []
+        start = 0
+        for src_path, h5_src in zip(src_paths, h5_srcs):
+            src_metadata = h5_src[H5_KEY_DATA].attrs.get(H5_ATTR_METADATA, METADATA_ATTRS)
+            if _read_layout(h5_src) != layout or (src_metadata.decode('utf-8') if isinstance(src_metadata, bytes) else src_metadata) != metadata:
+                raise ValueError('The layouts and the metadata of the sources must be the same.')
+            h5_live:h5py.Dataset = h5_src.get(H5_KEY_HEADER + '/' + H5_KEY_LIVE)
+            if h5_live is not None and int(h5_live[()]) != 0:
+                raise ValueError('"{0}" was not closed. Recover it with "recover_h5dataset" first.'.format(src_path))
+            starts.append(start)
+            start += _read_length(h5_src)
+
+        with open_h5file(fullpath, 'w', profile) as h5_dst:
+            h5_data:h5py.Group = h5_dst.create_group(H5_KEY_DATA)
+            _copy_attrs(h5_srcs[0][H5_KEY_DATA], h5_data)
+            merger = _H5Merger(h5_dst, h5_srcs, starts)
+            if layout == LAYOUT_STACKED:
+                merger.copy_stacked()
+            else:
+                merger.copy_frames()
+                merger.copy_metadata_tables()
+            merger.copy_timestamps()
+            merger.merge_common()
+            h5_header:h5py.Group = h5_dst.create_group(H5_KEY_HEADER)
+            h5_header.create_dataset(H5_KEY_LENGTH, data=start)
+    finally:
+        for h5_src in h5_srcs:
+            h5_src.close()
+    return {
+        'frames': start,
+        'raw_chunks': merger.raw_chunks,
+        'raw_bytes': merger.raw_bytes,
+        'decoded_bytes': merger.decoded_bytes,
+        'elapsed_s': time.perf_counter() - start_time,
+    }
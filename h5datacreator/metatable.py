@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple
+import numbers
+import h5py
+import numpy as np
+
+from .structure import *
+from .stacked import _H5Appender, _create_appendable
+
+# Attributes of the members of a composite type that are the same as the row of the composite type.
+TABLE_MEMBER_ATTRS:Tuple[str, ...] = (H5_ATTR_STAMPSEC, H5_ATTR_STAMPNSEC, H5_ATTR_FRAMEID, H5_ATTR_CHILDFRAMEID, H5_ATTR_MAPID, H5_ATTR_LABELTAG)
+
+# Attributes that are real numbers even if the value of the first frame is an integer, e.g. 'base_line=1'.
+TABLE_FLOAT_ATTRS:Tuple[str, ...] = (H5_ATTR_BASELINE, H5_ATTR_VOXELSIZE, H5_ATTR_TILESIZE, H5_ATTR_SCALE, H5_ATTR_OFFSET)
+
+def _get_column_dtype(value:Any, name:str=None) -> Any:
+    if isinstance(value, (str, bytes)):
+        return h5py.special_dtype(vlen=str)
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, numbers.Integral):
+        return np.float64 if name in TABLE_FLOAT_ATTRS else np.int64
+    if isinstance(value, numbers.Real):
+        return np.float64
+    return None
+
+class _H5MetadataTable():
+    """_H5MetadataTable
+
+    Metadata of LAYOUT_GROUP stored as a compound dataset '/meta/[tag]' with a row per frame,
+    instead of the attributes of '/data/[index]/[tag]'.
+    The scalar attributes are the fields of the table, and the other attributes are kept on the dataset.
+
+    Args:
+        h5file (h5py.File): H5Dataset file
+    """
+
+    def __init__(self, h5file:h5py.File) -> None:
+        self.__h5file:h5py.File = h5file
+        self.__appenders:Dict[str, _H5Appender] = {}
+        self.__fields:Dict[str, Tuple[str, ...]] = {}
+        self.__kinds:Dict[str, Tuple[str, ...]] = {}
+
+    def __get_appender(self, tag:str, columns:Dict[str, Any]) -> _H5Appender:
+        appender = self.__appenders.get(tag)
+        if appender is None:
+            key = H5_KEY_META + '/' + tag
+            h5_table:h5py.Dataset = self.__h5file.get(key)
+            if h5_table is None:
+                dtype = np.dtype([(H5_KEY_INDEX, np.int64)] + [(name, _get_column_dtype(value, name)) for name, value in columns.items()])
+                h5_table = _create_appendable(self.__h5file.require_group(H5_KEY_META), tag, (), dtype)
+            appender = _H5Appender(h5_table)
+            self.__appenders[tag] = appender
+            self.__fields[tag] = h5_table.dtype.names[1:]
+            self.__kinds[tag] = tuple(h5_table.dtype[name].kind for name in h5_table.dtype.names[1:])
+        return appender
+
+    def split(self, tag:str, attrs:Dict[str, Any]) -> Tuple[tuple, Dict[str, Any]]:
+        """split
+
+        Split the attributes of a tag into a row of the table and the attributes kept on the dataset.
+
+        Args:
+            tag (str): tag of the data
+            attrs (Dict[str, Any]): attributes of the data
+
+        Raises:
+            ValueError: if the scalar attributes differ from the previous frames.
+            TypeError: if a value does not fit in the column, e.g. a real number in an integer column.
+
+        Returns:
+            Tuple[tuple, Dict[str, Any]]: the row without the frame index, and the attributes that are not stored in the table
+        """
+        columns = {}
+        others = {}
+        for key, value in attrs.items():
+            if _get_column_dtype(value) is None:
+                others[key] = value
+            else:
+                columns[key] = value
+        self.__get_appender(tag, columns)
+        fields = self.__fields[tag]
+        if len(fields) != len(columns) or any(field not in columns for field in fields):
+            raise ValueError('The attributes of "{0}" must be {1} in the metadata table.'.format(tag, list(fields)))
+        for field, kind in zip(fields, self.__kinds[tag]):
+            value = columns[field]
+            # A real number is never cast to an integer column, and a number never to a string column and vice versa.
+            if (kind in 'iu' and isinstance(value, numbers.Integral) is False) or (kind == 'f' and isinstance(value, numbers.Real) is False) \
+                or (kind == 'O' and isinstance(value, (str, bytes)) is False):
+                raise TypeError('"{0}" of "{1}" must be {2} in the metadata table, not {3!r}.'.format(field, tag, 'an integer' if kind in 'iu' else 'a real number' if kind == 'f' else 'a string', value))
+        return tuple(columns[field] for field in fields), others
+
+    def append(self, tag:str, index:int, row:tuple) -> None:
+        """append
+
+        Append a row returned by 'split' to the table.
+
+        Args:
+            tag (str): tag of the data
+            index (int): frame index
+            row (tuple): the row without the frame index
+        """
+        self.__appenders[tag].append((index,) + row)
+
+    def flush(self) -> None:
+        """flush
+
+        Write the buffered rows and trim the over-allocated rows.
+        """
+        for appender in self.__appenders.values():
+            appender.flush()
+
+def read_metadata_table(h5_table:h5py.Dataset) -> Dict[str, np.ndarray]:
+    """read_metadata_table
+
+    Read a metadata table '/meta/[tag]' with a single read.
+
+    Args:
+        h5_table (h5py.Dataset): the metadata table
+
+    Returns:
+        Dict[str, np.ndarray]: the columns sorted by the frame index
+    """
+    table = h5_table[()]
+    indices = table[H5_KEY_INDEX]
+    if indices.shape[0] > 1 and np.any(indices[1:] < indices[:-1]):
+        table = table[np.argsort(indices, kind='stable')]
+    columns = {}
+    for name in table.dtype.names:
+        column = table[name]
+        if column.dtype == object:
+            column = np.array([value.decode('utf-8') if isinstance(value, bytes) else value for value in column], dtype=object)
+        columns[name] = column
+    return columns
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple
+import numpy as np
+
+from .structure import *
+
+ENCODING_QUANTIZED:str = 'quantized'
+
+# dtype of the dequantized data of each type.
+DEQUANTIZED_DTYPES:Dict[str, Any] = {
+    TYPE_POINTS: np.float32,
+    TYPE_TRANSLATION: np.float64,
+}
+
+def quantize(data:np.ndarray, error_bound:float, centered:bool=True, dtype:Any=None) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """quantize
+
+    Convert floating point data to fixed point integers 'round((data - offset) / scale)' with 'scale = 2 * error_bound',
+    so that the error of the dequantized data is at most 'error_bound'.
+
+    Args:
+        data (np.ndarray): floating point data, e.g. shape=(N, 3) points
+        error_bound (float): maximum absolute error of the dequantized data
+        centered (bool, optional): if True, the offset is the center of the range of each column. Otherwise 0. Defaults to True.
+        dtype (Any, optional): integer dtype of the quantized data. If None, np.int16 if the values fit, otherwise np.int32. Defaults to None.
+
+    Raises:
+        ValueError: if 'error_bound' is not positive or the quantized values do not fit in the integer dtype.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, Any]]: the quantized data and the attributes 'encoding', 'scale' and 'offset'
+    """
+    if error_bound <= 0.0:
+        raise ValueError('"error_bound" must be positive.')
+    scale = 2.0 * float(error_bound)
+    values = np.asarray(data, dtype=np.float64)
+    columns = values.shape[1:] if len(values.shape) > 1 else ()
+    offset = np.zeros(columns, dtype=np.float64)
+    if centered is True and len(columns) > 0 and values.shape[0] > 0:
+        # The offset is a multiple of the scale so that the error is not increased by the offset.
+        offset = np.round((values.min(axis=0) + values.max(axis=0)) * 0.5 / scale) * scale
+    quantized = np.rint((values - offset) / scale)
+    peak = float(np.abs(quantized).max()) if quantized.size > 0 else 0.0
+    if dtype is None:
+        dtype = np.int16 if peak <= np.iinfo(np.int16).max else np.int32
+    if peak > np.iinfo(dtype).max:
+        raise ValueError('The quantized data do not fit in "{0}". Increase "error_bound".'.format(np.dtype(dtype).name))
+    return quantized.astype(dtype), {
+        H5_ATTR_ENCODING: ENCODING_QUANTIZED,
+        H5_ATTR_SCALE: scale,
+        H5_ATTR_OFFSET: offset,
+    }
+
+def dequantize(data:np.ndarray, scale:float, offset:Any, dtype:Any=np.float32) -> np.ndarray:
+    """dequantize
+
+    Inverse of 'quantize'.
+
+    Args:
+        data (np.ndarray): the quantized data
+        scale (float): the 'scale' attribute
+        offset (Any): the 'offset' attribute
+        dtype (Any, optional): floating point dtype of the result. Defaults to np.float32.
+
+    Returns:
+        np.ndarray: the dequantized data
+    """
+    values = data.astype(np.float64)
+    values *= scale
+    values += offset
+    return values.astype(dtype, copy=False)
@@ -0,0 +1,799 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Iterator, List, Tuple, Union
+import collections
+import os
+import time
+import h5py
+import numpy as np
+
+from .structure import *
+from .stacked import _is_ragged
+from .timestamp import H5TimestampIndex
+from .metatable import read_metadata_table
+from .voxel import H5VoxelGrid, create_voxel_grid, _gather_rows
+from .spatial import get_map_ranges
+from .quantize import ENCODING_QUANTIZED, DEQUANTIZED_DTYPES, dequantize
+from .image import IMAGE_ENCODINGS, decode_image, decode_images
+from .depth import DEPTH_ENCODINGS, decode_depth
+from .label import LABEL_ENCODINGS, decode_labels
+from .trajectory import H5Trajectory, read_trajectory
+from .tuning import H5FileProfile, open_h5file
+from .swmr import _get_extent, _read_rows, read_swmr_header
+
+READER_CACHE_BYTES:int = 1 << 28
+
+VOXEL_SUBTYPES:Dict[str, str] = {
+    TYPE_VOXEL_POINTS: SUBTYPE_VOXEL_POINTS,
+    TYPE_VOXEL_SEMANTIC3D: SUBTYPE_VOXEL_SEMANTIC3D,
+}
+
+class H5Item():
+    """H5Item
+
+    Data of a tag in a frame read by H5DatasetReader.
+    The arrays are read-only because they are shared with the cache.
+
+    Args:
+        type_ (str): TYPE_* constant
+        data (Any): array, scalar, dict of the members of a composite type, or H5VoxelGrid for the voxel types
+        stamp_sec (int): integer part of the timestamp [sec]
+        stamp_nsec (int): fractional part of the timestamp [nsec]
+        frame_id (str): frame id
+        child_frame_id (str): child frame id
+        attrs (Dict[str, Any]): the other attributes
+    """
+
+    def __init__(self, type_:str, data:Any, stamp_sec:int=0, stamp_nsec:int=0, frame_id:str=None, child_frame_id:str=None, attrs:Dict[str, Any]=None) -> None:
+        self.type:str = type_
+        self.data:Any = data
+        self.stamp_sec:int = stamp_sec
+        self.stamp_nsec:int = stamp_nsec
+        self.frame_id:str = frame_id
+        self.child_frame_id:str = child_frame_id
+        self.attrs:Dict[str, Any] = {} if attrs is None else attrs
+
+    def __repr__(self) -> str:
+        return 'H5Item(type={0!r}, stamp_sec={1!r}, stamp_nsec={2!r}, frame_id={3!r})'.format(self.type, self.stamp_sec, self.stamp_nsec, self.frame_id)
+
+    @property
+    def nbytes(self) -> int:
+        """nbytes
+
+        Returns:
+            int: size of the data [byte]
+        """
+        return _nbytes(self.data)
+
+def _nbytes(data:Any) -> int:
+    if isinstance(data, dict):
+        return sum(_nbytes(value) for value in data.values())
+    if isinstance(data, H5VoxelGrid):
+        return data.points.nbytes + data.offsets.nbytes + data.counts.nbytes
+    if isinstance(data, np.ndarray):
+        if data.dtype == object:
+            return data.nbytes + sum(_nbytes(value) for value in data.flat)
+        return data.nbytes
+    return 8
+
+def _freeze(data:Any) -> Any:
+    if isinstance(data, dict):
+        for value in data.values():
+            _freeze(value)
+    elif isinstance(data, H5VoxelGrid):
+        for value in (data.points, data.offsets, data.counts):
+            value.setflags(write=False)
+    elif isinstance(data, np.ndarray):
+        data.setflags(write=False)
+    return data
+
+def _to_voxel_grid(type_:str, data:Any) -> H5VoxelGrid:
+    subtype = VOXEL_SUBTYPES[type_]
+    if isinstance(data, dict):
+        return H5VoxelGrid(data[subtype], data[H5_KEY_VOXELOFFSET], data[H5_KEY_VOXELCOUNT])
+    # A file written before the CSR layout holds an array of variable-length arrays.
+    return create_voxel_grid(data, DTYPE_NUMPY[subtype])
+
+def _decode_str(value:Any) -> Any:
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+def _pop_image_attrs(attrs:Dict[str, Any]) -> None:
+    for key in (H5_ATTR_ENCODING, H5_ATTR_QUALITY, H5_ATTR_SHAPE):
+        attrs.pop(key, None)
+
+def _decode(type_:str, data:Any, attrs:Dict[str, Any], decode_image_data:bool=True) -> Any:
+    # The attributes of the encoding are removed, so the item looks the same as the data without the encoding.
+    encoding = _decode_str(attrs.get(H5_ATTR_ENCODING))
+    if encoding is None:
+        return data
+    if encoding in IMAGE_ENCODINGS:
+        # The images read by 'get_batch' are decoded later on the thread pool.
+        if decode_image_data is False:
+            return data
+        _pop_image_attrs(attrs)
+        return decode_image(data, type_)
+    attrs.pop(H5_ATTR_ENCODING)
+    if encoding in DEPTH_ENCODINGS:
+        return decode_depth(data, encoding, attrs)
+    if encoding in LABEL_ENCODINGS:
+        return decode_labels(data, encoding, attrs)
+    if encoding == ENCODING_QUANTIZED:
+        return dequantize(data, attrs.pop(H5_ATTR_SCALE), attrs.pop(H5_ATTR_OFFSET), DEQUANTIZED_DTYPES.get(type_, np.float32))
+    raise ValueError('Unknown encoding "{0}".'.format(encoding))
+
+def _split_attrs(type_:str, data:Any, attrs:Dict[str, Any]) -> H5Item:
+    attrs = {key: _decode_str(value) for key, value in attrs.items()}
+    attrs.pop(H5_ATTR_TYPE, None)
+    return H5Item(
+        type_, _freeze(data),
+        int(attrs.pop(H5_ATTR_STAMPSEC, 0)), int(attrs.pop(H5_ATTR_STAMPNSEC, 0)),
+        attrs.pop(H5_ATTR_FRAMEID, None), attrs.pop(H5_ATTR_CHILDFRAMEID, None), attrs
+    )
+
+class _H5StackedColumns():
+    """_H5StackedColumns
+
+    Columns of '/meta/[path]' of the stacked layout loaded in memory.
+
+    Args:
+        h5_meta (h5py.Group): the group '/meta/[path]'
+        rows (Dict[str, int], optional): committed rows of the datasets of a file written in SWMR mode. Defaults to None.
+    """
+
+    def __init__(self, h5_meta:h5py.Group, rows:Dict[str, int]=None) -> None:
+        self.columns:Dict[str, np.ndarray] = {}
+        for key, h5_column in h5_meta.items():
+            if isinstance(h5_column, h5py.Dataset):
+                column = _read_rows(h5_column, rows)
+                # The frame ids written in SWMR mode are fixed-length strings.
+                if column.dtype.kind == 'S':
+                    column = np.array([value.decode('utf-8') for value in column.tolist()], dtype=object)
+                self.columns[key] = column
+
+    def get_row(self, index:int) -> int:
+        indices = self.columns[H5_KEY_INDEX]
+        row = int(np.searchsorted(indices, index))
+        if row >= indices.shape[0] or indices[row] != index:
+            return -1
+        return row
+
+    def get_bounds(self, row:int, h5_dataset:h5py.Dataset, rows:Dict[str, int]=None) -> Tuple[int, int]:
+        # The rows of a frame end at the next offset, unless a merged file has gaps recorded in '/meta/[path]/end'.
+        # The frames appended after the merge have no end.
+        offsets = self.columns[H5_KEY_OFFSET]
+        ends = self.columns.get(H5_KEY_END)
+        if ends is not None and row < ends.shape[0]:
+            end = int(ends[row])
+        elif row + 1 < offsets.shape[0]:
+            end = int(offsets[row + 1])
+        else:
+            end = _get_extent(h5_dataset, rows)
+        return int(offsets[row]), end
+
+class H5DatasetReader():
+    """H5DatasetReader
+
+    Class for reading an H5Dataset in both layouts.
+    The decoded data are kept in an LRU cache of at most 'cache_bytes'.
+
+    Args:
+        path (str): path of H5Dataset
+        cache_bytes (int, optional): maximum size of the cache [byte]. 0 disables the cache. Defaults to READER_CACHE_BYTES.
+        profile (str | H5FileProfile, optional): file-level settings of HDF5, or the name of a preset, e.g. 'train-read'. Defaults to None.
+        swmr (bool, optional): If True, the file is opened while an H5Dataset with 'swmr=True' writes it.
+            The frames shown by the writer are read by 'refresh' and 'tail'. Defaults to False.
+    """
+
+    def __init__(self, path:str, cache_bytes:int=READER_CACHE_BYTES, profile:Union[str, H5FileProfile]=None, swmr:bool=False) -> None:
+        fullpath = os.path.abspath(path)
+        if os.path.isfile(fullpath) is False:
+            raise FileNotFoundError('File "{0}" not found.'.format(fullpath))
+        if cache_bytes < 0:
+            raise ValueError('"cache_bytes" must be 0 or greater.')
+
+        self.__h5file:h5py.File = open_h5file(fullpath, 'r', profile, swmr=swmr)
+        self.__layout:str = _decode_str(self.__h5file[H5_KEY_DATA].attrs.get(H5_ATTR_LAYOUT, LAYOUT_GROUP))
+        self.__metadata:str = _decode_str(self.__h5file[H5_KEY_DATA].attrs.get(H5_ATTR_METADATA, METADATA_ATTRS))
+        self.__columns:Dict[str, _H5StackedColumns] = {}
+        self.__metadata_tables:Dict[str, Dict[str, np.ndarray]] = {}
+        self.__trajectories:Dict[str, H5Trajectory] = {}
+        # The committed rows of a file written in SWMR mode. The rows after them may not be written yet.
+        # A file written with checkpoints has the same record, and the rows after it are of a writer that was not closed.
+        length, self.__rows, self.__live = read_swmr_header(self.__h5file)
+        self.__swmr:bool = swmr
+        self.__live = self.__live and swmr
+        self.__timestamps:H5TimestampIndex = H5TimestampIndex(self.__h5file, self.__rows)
+
+        h5_header_length:h5py.Dataset = self.__h5file.get(f'{H5_KEY_HEADER}/{H5_KEY_LENGTH}')
+        if length is not None:
+            self.__length:int = length
+        elif h5_header_length is not None:
+            self.__length:int = int(h5_header_length[()])
+        elif self.__layout == LAYOUT_GROUP:
+            self.__length:int = max([int(key) + 1 for key in self.__h5file[H5_KEY_DATA].keys()], default=0)
+        else:
+            self.__length:int = max([int(self.__get_columns(tag).columns[H5_KEY_INDEX][-1]) + 1 for tag in self.__get_stacked_tags()], default=0)
+
+        self.__cache_bytes:int = cache_bytes
+        self.__cache:collections.OrderedDict = collections.OrderedDict()
+        self.__cached_bytes:int = 0
+        self.__hits:int = 0
+        self.__misses:int = 0
+
+    def __enter__(self) -> 'H5DatasetReader':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.__length
+
+    @property
+    def layout(self) -> str:
+        """layout
+
+        Returns:
+            str: Layout of '/data' [LAYOUT_GROUP, LAYOUT_STACKED]
+        """
+        return self.__layout
+
+    @property
+    def file(self) -> h5py.File:
+        """file
+
+        Returns:
+            h5py.File: file of H5Dataset
+        """
+        return self.__h5file
+
+    def close(self) -> None:
+        """close
+
+        Close H5Dataset and clear the cache.
+        """
+        self.clear_cache()
+        self.__columns = {}
+        self.__metadata_tables = {}
+        self.__trajectories = {}
+        if self.__h5file is not None:
+            self.__h5file.close()
+            self.__h5file = None
+
+    @property
+    def live(self) -> bool:
+        """live
+
+        Returns:
+            bool: True while an H5Dataset with 'swmr=True' is writing the file.
+        """
+        return self.__live
+
+    def refresh(self) -> int:
+        """refresh
+
+        Read the frames shown by the SWMR writer since the last call, without reopening the file.
+        The cached frames are kept, since a shown frame does not change.
+
+        Returns:
+            int: the number of the frames.
+        """
+        if self.__rows is None or self.__swmr is False:
+            return self.__length
+        length, rows, live = read_swmr_header(self.__h5file)
+        for path in rows.keys():
+            self.__h5file[path].refresh()
+        self.__length = length
+        self.__rows = rows
+        self.__live = live
+        self.__columns = {}
+        self.__trajectories = {}
+        self.__timestamps = H5TimestampIndex(self.__h5file, self.__rows)
+        return self.__length
+
+    def tail(self, tags:List[str]=None, start:int=0, poll_interval:float=0.1, timeout:float=None) -> Iterator[Tuple[int, Dict[str, H5Item]]]:
+        """tail
+
+        Yield the frames from 'start' as the SWMR writer shows them, until the writer is closed.
+        For a file that is not being written, the frames in the file are yielded.
+
+        Args:
+            tags (List[str], optional): tags of the data. If None, all tags of each frame. Defaults to None.
+            start (int, optional): index of the first frame. Defaults to 0.
+            poll_interval (float, optional): period of 'refresh' while no new frame is shown [sec]. Defaults to 0.1.
+            timeout (float, optional): maximum time without a new frame [sec]. If None, unlimited. Defaults to None.
+
+        Yields:
+            Tuple[int, Dict[str, H5Item]]: the index and the data by tag of each frame
+        """
+        index = start
+        waited = 0.0
+        while True:
+            while index < self.__length:
+                yield index, self.get_frame(index, tags)
+                index += 1
+                waited = 0.0
+            if self.__live is False or (timeout is not None and waited >= timeout):
+                return
+            time.sleep(poll_interval)
+            waited += poll_interval
+            self.refresh()
+
+    def __get_columns(self, path:str) -> _H5StackedColumns:
+        columns = self.__columns.get(path)
+        if columns is None:
+            h5_meta:h5py.Group = self.__h5file.get(H5_KEY_META + '/' + path)
+            if h5_meta is None:
+                return None
+            columns = _H5StackedColumns(h5_meta, self.__rows)
+            self.__columns[path] = columns
+        return columns
+
+    def __get_stacked_tags(self) -> List[str]:
+        h5_meta:h5py.Group = self.__h5file.get(H5_KEY_META)
+        return [] if h5_meta is None else list(h5_meta.keys())
+
+    def __check_index(self, index:int) -> None:
+        if index < 0 or self.__length <= index:
+            raise IndexError('Out of range.')
+
+    def get_tags(self, index:int) -> List[str]:
+        """get_tags
+
+        Get the tags of a frame.
+
+        Args:
+            index (int): index in '/data'
+
+        Returns:
+            List[str]: the tags of the frame
+        """
+        self.__check_index(index)
+        if self.__layout == LAYOUT_STACKED:
+            return [tag for tag in self.__get_stacked_tags() if self.__get_columns(tag).get_row(index) >= 0]
+        h5_frame:h5py.Group = self.__h5file[H5_KEY_DATA].get(str(index))
+        return [] if h5_frame is None else list(h5_frame.keys())
+
+    def get(self, index:int, tag:str) -> H5Item:
+        """get
+
+        Get the data of a tag in a frame.
+        The composite types are decoded into a dict of the members,
+        e.g. {'translation', 'rotation'} for TYPE_POSE and {'points', 'semantic1d'} for TYPE_SEMANTIC3D.
+
+        Args:
+            index (int): index in '/data'
+            tag (str): tag of the data
+
+        Raises:
+            IndexError: if 'index' is out of range.
+            KeyError: if the frame has no data of 'tag'.
+
+        Returns:
+            H5Item: the data and the metadata
+        """
+        item = self.__get_cached(index, tag)
+        if item is None:
+            item = self.__read(index, tag, True)
+            self.__put_cached(index, tag, item)
+        return item
+
+    def get_batch(self, indices:List[int], tag:str) -> List[H5Item]:
+        """get_batch
+
+        Get the data of a tag in the frames.
+        The encoded images are read first and decoded together on a thread pool.
+
+        Args:
+            indices (List[int]): indices in '/data'
+            tag (str): tag of the data
+
+        Raises:
+            IndexError: if an index is out of range.
+            KeyError: if a frame has no data of 'tag'.
+
+        Returns:
+            List[H5Item]: the data and the metadata in the order of 'indices'
+        """
+        items:List[H5Item] = []
+        pending:List[int] = []
+        for i, index in enumerate(indices):
+            item = self.__get_cached(index, tag)
+            if item is None:
+                item = self.__read(index, tag, False)
+                if _decode_str(item.attrs.get(H5_ATTR_ENCODING)) in IMAGE_ENCODINGS:
+                    pending.append(i)
+                else:
+                    self.__put_cached(index, tag, item)
+            items.append(item)
+        images = decode_images([items[i].data for i in pending], [items[i].type for i in pending])
+        for i, image in zip(pending, images):
+            _pop_image_attrs(items[i].attrs)
+            items[i].data = _freeze(image)
+            self.__put_cached(indices[i], tag, items[i])
+        return items
+
+    def __get_cached(self, index:int, tag:str) -> H5Item:
+        key = (index, tag)
+        item:H5Item = self.__cache.get(key)
+        if item is not None:
+            self.__cache.move_to_end(key)
+            self.__hits += 1
+            return item
+        self.__misses += 1
+        return None
+
+    def __put_cached(self, index:int, tag:str, item:H5Item) -> None:
+        key = (index, tag)
+        nbytes = item.nbytes
+        if nbytes <= self.__cache_bytes and key not in self.__cache:
+            self.__cache[key] = item
+            self.__cached_bytes += nbytes
+            while self.__cached_bytes > self.__cache_bytes:
+                _, old_item = self.__cache.popitem(last=False)
+                self.__cached_bytes -= old_item.nbytes
+
+    def __read(self, index:int, tag:str, decode_image_data:bool) -> H5Item:
+        self.__check_index(index)
+        if self.__layout == LAYOUT_STACKED:
+            return self.__read_stacked(index, tag, decode_image_data)
+        return self.__read_group(index, tag, decode_image_data)
+
+    def get_frame(self, index:int, tags:List[str]=None) -> Dict[str, H5Item]:
+        """get_frame
+
+        Get the data of the tags in a frame.
+
+        Args:
+            index (int): index in '/data'
+            tags (List[str], optional): tags of the data. If None, all tags of the frame. Defaults to None.
+
+        Returns:
+            Dict[str, H5Item]: the data by tag
+        """
+        if tags is None:
+            tags = self.get_tags(index)
+        return {tag: self.get(index, tag) for tag in tags}
+
+    def get_voxel_region(self, index:int, tag:str, z:slice=slice(None), y:slice=slice(None), x:slice=slice(None)) -> np.ndarray:
+        """get_voxel_region
+
+        Get the points of the voxels in a region of a voxel type without reading the whole grid.
+        Only the offsets of the region and the rows of the points between the first and the last voxel are read.
+
+        Args:
+            index (int): index in '/data'
+            tag (str): tag of TYPE_VOXEL_POINTS or TYPE_VOXEL_SEMANTIC3D
+            z (slice, optional): range of the voxels along Z. Defaults to slice(None).
+            y (slice, optional): range of the voxels along Y. Defaults to slice(None).
+            x (slice, optional): range of the voxels along X. Defaults to slice(None).
+
+        Raises:
+            IndexError: if 'index' is out of range.
+            KeyError: if the frame has no data of 'tag'.
+            TypeError: if 'tag' is not a voxel type.
+
+        Returns:
+            np.ndarray: the points of the voxels in (Z, Y, X) order
+        """
+        self.__check_index(index)
+        item:H5Item = self.__cache.get((index, tag))
+        if item is not None:
+            return item.data.get_region(z, y, x)
+
+        if self.__layout == LAYOUT_STACKED:
+            columns = self.__get_columns(tag)
+            row = -1 if columns is None else columns.get_row(index)
+            if row < 0:
+                raise KeyError('"{0}" not found in frame {1}.'.format(tag, index))
+            h5_obj = self.__h5file[H5_KEY_DATA + '/' + tag]
+            selection = (row, z, y, x)
+        else:
+            h5_obj = self.__h5file[H5_KEY_DATA].get(str(index) + '/' + tag)
+            if h5_obj is None:
+                raise KeyError('"{0}" not found in frame {1}.'.format(tag, index))
+            selection = (z, y, x)
+        type_ = _decode_str(h5_obj.attrs.get(H5_ATTR_TYPE))
+        if type_ not in VOXEL_SUBTYPES:
+            raise TypeError('"{0}" is not a voxel type.'.format(tag))
+        if isinstance(h5_obj, h5py.Dataset):
+            return self.get(index, tag).data.get_region(z, y, x)
+
+        subtype = VOXEL_SUBTYPES[type_]
+        h5_points:h5py.Dataset = h5_obj[subtype]
+        base = 0
+        if self.__layout == LAYOUT_STACKED:
+            base = int(self.__get_columns(tag + '/' + subtype).columns[H5_KEY_OFFSET][row])
+        rows = _gather_rows(h5_obj[H5_KEY_VOXELOFFSET][selection], h5_obj[H5_KEY_VOXELCOUNT][selection])
+        if rows.shape[0] < 1:
+            return np.zeros(0, dtype=h5_points.dtype)
+        # The rows are in ascending order, so a single contiguous read covers them.
+        start = int(rows[0])
+        return h5_points[base + start:base + int(rows[-1]) + 1][rows - start]
+
+    def get_map_region(self, index:int, tag:str, box_min:Tuple[float, float, float], box_max:Tuple[float, float, float]) -> Dict[str, np.ndarray]:
+        """get_map_region
+
+        Get the points of a map of TYPE_POINTS_MAP or TYPE_SEMANTIC3D_MAP in an axis-aligned box.
+        Only the rows of the tiles that intersect the box are read.
+
+        Args:
+            index (int): index in '/data'
+            tag (str): tag of the map
+            box_min (Tuple[float, float, float]): minimum of the box (x, y, z)
+            box_max (Tuple[float, float, float]): maximum of the box (x, y, z)
+
+        Raises:
+            IndexError: if 'index' is out of range.
+            KeyError: if the frame has no data of 'tag'.
+            TypeError: if 'tag' is not a map type.
+
+        Returns:
+            Dict[str, np.ndarray]: 'points' and, for TYPE_SEMANTIC3D_MAP, 'semantic1d' of the points in the box
+        """
+        box_min = np.asarray(box_min, dtype=np.float64)
+        box_max = np.asarray(box_max, dtype=np.float64)
+        data = self.__read_map(index, tag, box_min, box_max)
+        points = data[SUBTYPE_POINTS]
+        mask = np.all((points >= box_min) & (points <= box_max), axis=1)
+        return {key: value[mask] for key, value in data.items()}
+
+    def get_map_radius(self, index:int, tag:str, center:Tuple[float, float, float], radius:float) -> Dict[str, np.ndarray]:
+        """get_map_radius
+
+        Get the points of a map of TYPE_POINTS_MAP or TYPE_SEMANTIC3D_MAP within a radius.
+        Only the rows of the tiles that intersect the bounding box of the sphere are read.
+
+        Args:
+            index (int): index in '/data'
+            tag (str): tag of the map
+            center (Tuple[float, float, float]): center of the sphere (x, y, z)
+            radius (float): radius of the sphere [m]
+
+        Raises:
+            IndexError: if 'index' is out of range.
+            KeyError: if the frame has no data of 'tag'.
+            TypeError: if 'tag' is not a map type.
+
+        Returns:
+            Dict[str, np.ndarray]: 'points' and, for TYPE_SEMANTIC3D_MAP, 'semantic1d' of the points within the radius
+        """
+        center = np.asarray(center, dtype=np.float64)
+        data = self.__read_map(index, tag, center - radius, center + radius)
+        points = data[SUBTYPE_POINTS]
+        mask = np.sum(np.square(points - center), axis=1) <= radius * radius
+        return {key: value[mask] for key, value in data.items()}
+
+    def __read_map(self, index:int, tag:str, box_min:np.ndarray, box_max:np.ndarray) -> Dict[str, np.ndarray]:
+        self.__check_index(index)
+        if self.__layout == LAYOUT_STACKED:
+            columns = self.__get_columns(tag)
+            row = -1 if columns is None else columns.get_row(index)
+            if row < 0:
+                raise KeyError('"{0}" not found in frame {1}.'.format(tag, index))
+            h5_obj = self.__h5file[H5_KEY_DATA + '/' + tag]
+        else:
+            h5_obj = self.__h5file[H5_KEY_DATA].get(str(index) + '/' + tag)
+            if h5_obj is None:
+                raise KeyError('"{0}" not found in frame {1}.'.format(tag, index))
+        type_ = _decode_str(h5_obj.attrs.get(H5_ATTR_TYPE))
+        if type_ not in (TYPE_POINTS_MAP, TYPE_SEMANTIC3D_MAP):
+            raise TypeError('"{0}" is not a map type.'.format(tag))
+        keys = [SUBTYPE_POINTS] if type_ == TYPE_POINTS_MAP else [SUBTYPE_POINTS, SUBTYPE_SEMANTIC1D]
+
+        # The rows of each member in the frame. In the stacked layout the frames are concatenated.
+        bounds = {}
+        for key in keys + [SUBTYPE_TILE_KEY, SUBTYPE_TILE_OFFSET]:
+            if self.__layout == LAYOUT_STACKED:
+                bounds[key] = self.__get_columns(tag + '/' + key).get_bounds(row, h5_obj[key], self.__rows)
+            else:
+                bounds[key] = (0, h5_obj[key].shape[0])
+        tile_key = h5_obj[SUBTYPE_TILE_KEY][bounds[SUBTYPE_TILE_KEY][0]:bounds[SUBTYPE_TILE_KEY][1]]
+        tile_offset = h5_obj[SUBTYPE_TILE_OFFSET][bounds[SUBTYPE_TILE_OFFSET][0]:bounds[SUBTYPE_TILE_OFFSET][1]]
+        start, end = bounds[SUBTYPE_POINTS]
+        ranges = get_map_ranges(tile_key, tile_offset, end - start, float(h5_obj.attrs[H5_ATTR_TILESIZE]), box_min, box_max)
+
+        data = {}
+        for key in keys:
+            h5_member:h5py.Dataset = h5_obj[key]
+            base = bounds[key][0]
+            if len(ranges) < 1:
+                data[key] = np.zeros((0,) + h5_member.shape[1:], dtype=h5_member.dtype)
+            else:
+                data[key] = np.concatenate([h5_member[base + range_start:base + range_end] for range_start, range_end in ranges])
+        return data
+
+    def get_label_config(self, tag:str) -> Dict[int, Tuple[str, Tuple[int, int, int]]]:
+        """get_label_config
+
+        Get the label settings of '/label/[tag]'.
+
+        Args:
+            tag (str): tag of the label settings
+
+        Returns:
+            Dict[int, Tuple[str, Tuple[int, int, int]]]: {index: (name, (r, g, b))}
+        """
+        h5_label:h5py.Group = self.__h5file[H5_KEY_LABEL + '/' + tag]
+        config = {}
+        for key, h5_label_index in h5_label.items():
+            b, g, r = h5_label_index[TYPE_COLOR][()].tolist()
+            config[int(key)] = (_decode_str(h5_label_index[SUBTYPE_NAME][()]), (r, g, b))
+        return config
+
+    def get_trajectory(self, path:str) -> H5Trajectory:
+        """get_trajectory
+
+        Get a trajectory of TYPE_TRAJECTORY. The trajectory is read once and kept until 'close'.
+
+        Args:
+            path (str): path of the trajectory in the file, e.g. 'trajectory/odom'
+
+        Raises:
+            KeyError: if 'path' does not exist.
+            TypeError: if 'path' is not TYPE_TRAJECTORY.
+
+        Returns:
+            H5Trajectory: the trajectory
+        """
+        trajectory = self.__trajectories.get(path)
+        if trajectory is not None:
+            return trajectory
+        h5_obj = self.__h5file.get(path)
+        if h5_obj is None:
+            raise KeyError('"{0}" not found.'.format(path))
+        if _decode_str(h5_obj.attrs.get(H5_ATTR_TYPE)) != TYPE_TRAJECTORY:
+            raise TypeError('"{0}" is not "{1}".'.format(path, TYPE_TRAJECTORY))
+        trajectory = read_trajectory(h5_obj, self.__rows)
+        self.__trajectories[path] = trajectory
+        return trajectory
+
+    def get_poses(self, path:str, stamps:np.ndarray) -> np.ndarray:
+        """get_poses
+
+        Get the poses of a trajectory at arbitrary timestamps, e.g. the timestamps of the LiDAR sweeps from 'get_metadata'.
+
+        Args:
+            path (str): path of the trajectory in the file
+            stamps (np.ndarray): shape=(M,), dtype=np.int64 timestamps [nsec]
+
+        Returns:
+            np.ndarray: shape=(M, 7), dtype=np.float64 the poses [x, y, z, qx, qy, qz, qw]. NaN for the timestamps outside the trajectory.
+        """
+        return self.get_trajectory(path).interpolate(stamps)
+
+    def get_metadata(self, tag:str) -> Dict[str, np.ndarray]:
+        """get_metadata
+
+        Get the metadata of a tag in all frames, e.g. {'index', 'stamp.sec', 'stamp.nsec', 'frame_id'}.
+        It is a single read of '/meta/[tag]' in LAYOUT_STACKED and METADATA_TABLE.
+        With METADATA_ATTRS of LAYOUT_GROUP, the attributes of all frames are read.
+
+        Args:
+            tag (str): tag of the data
+
+        Raises:
+            KeyError: if no frame has 'tag'.
+
+        Returns:
+            Dict[str, np.ndarray]: the columns of the metadata sorted by the frame index
+        """
+        if self.__layout == LAYOUT_STACKED:
+            columns = self.__get_columns(tag)
+            if columns is None:
+                raise KeyError('"{0}" not found.'.format(tag))
+            return {key: value for key, value in columns.columns.items() if key not in [H5_KEY_OFFSET, H5_KEY_END]}
+        if self.__metadata == METADATA_TABLE:
+            columns = self.__get_metadata_table(tag)
+            if columns is None:
+                raise KeyError('"{0}" not found.'.format(tag))
+            return columns
+        rows:Dict[str, List[Any]] = {H5_KEY_INDEX: []}
+        for index in range(self.__length):
+            h5_obj = self.__h5file[H5_KEY_DATA].get(str(index) + '/' + tag)
+            if h5_obj is None:
+                continue
+            rows[H5_KEY_INDEX].append(index)
+            for key, value in h5_obj.attrs.items():
+                if isinstance(value, np.ndarray) is False:
+                    rows.setdefault(key, []).append(_decode_str(value))
+        if len(rows[H5_KEY_INDEX]) < 1:
+            raise KeyError('"{0}" not found.'.format(tag))
+        return {key: np.array(values, dtype=object if isinstance(values[0], str) else None) for key, values in rows.items()}
+
+    def __get_metadata_table(self, tag:str) -> Dict[str, np.ndarray]:
+        columns = self.__metadata_tables.get(tag)
+        if columns is None:
+            h5_table:h5py.Dataset = self.__h5file.get(H5_KEY_META + '/' + tag)
+            if h5_table is None:
+                return None
+            columns = read_metadata_table(h5_table)
+            self.__metadata_tables[tag] = columns
+        return columns
+
+    def get_timestamp_index(self) -> H5TimestampIndex:
+        """get_timestamp_index
+
+        Get the table of the timestamps of each tag.
+
+        Returns:
+            H5TimestampIndex: the table of the timestamps
+        """
+        return self.__timestamps
+
+    def get_cache_info(self) -> Dict[str, int]:
+        """get_cache_info
+
+        Returns:
+            Dict[str, int]: {'hits', 'misses', 'items', 'bytes', 'max_bytes'}
+        """
+        return {
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'items': len(self.__cache),
+            'bytes': self.__cached_bytes,
+            'max_bytes': self.__cache_bytes,
+        }
+
+    def clear_cache(self) -> None:
+        """clear_cache
+
+        Clear the cache.
+        """
+        self.__cache.clear()
+        self.__cached_bytes = 0
+
+    def __read_group(self, index:int, tag:str, decode_image_data:bool=True) -> H5Item:
+        h5_obj = self.__h5file[H5_KEY_DATA].get(str(index) + '/' + tag)
+        if h5_obj is None:
+            raise KeyError('"{0}" not found in frame {1}.'.format(tag, index))
+        row_attrs = None
+        if self.__metadata == METADATA_TABLE:
+            columns = self.__get_metadata_table(tag)
+            row = -1 if columns is None else int(np.searchsorted(columns[H5_KEY_INDEX], index))
+            if row >= 0 and row < columns[H5_KEY_INDEX].shape[0] and columns[H5_KEY_INDEX][row] == index:
+                row_attrs = {key: column[row].item() if isinstance(column[row], np.generic) else column[row] for key, column in columns.items() if key != H5_KEY_INDEX}
+        return self.__read_group_obj(h5_obj, row_attrs, decode_image_data)
+
+    def __read_group_obj(self, h5_obj:Union[h5py.Group, h5py.Dataset], row_attrs:Dict[str, Any]=None, decode_image_data:bool=True) -> H5Item:
+        attrs = dict(h5_obj.attrs.items())
+        if row_attrs is not None:
+            attrs.update(row_attrs)
+        type_ = _decode_str(attrs.get(H5_ATTR_TYPE))
+        if isinstance(h5_obj, h5py.Dataset):
+            data = _decode(type_, h5_obj[()], attrs, decode_image_data)
+        else:
+            data = {}
+            for key, h5_member in h5_obj.items():
+                data[key] = self.__read_group_obj(h5_member).data
+        if type_ in VOXEL_SUBTYPES:
+            data = _to_voxel_grid(type_, data)
+        return _split_attrs(type_, data, attrs)
+
+    def __read_stacked(self, index:int, tag:str, decode_image_data:bool=True) -> H5Item:
+        columns = self.__get_columns(tag)
+        row = -1 if columns is None else columns.get_row(index)
+        if row < 0:
+            raise KeyError('"{0}" not found in frame {1}.'.format(tag, index))
+        item = self.__read_stacked_obj(tag, row, decode_image_data)
+        for key in [H5_ATTR_STAMPSEC, H5_ATTR_STAMPNSEC, H5_ATTR_FRAMEID, H5_ATTR_CHILDFRAMEID]:
+            column = columns.columns.get(key)
+            if column is not None:
+                setattr(item, key.replace('.', '_'), _decode_str(column[row]) if column.dtype == object else int(column[row]))
+        return item
+
+    def __read_stacked_obj(self, path:str, row:int, decode_image_data:bool=True) -> H5Item:
+        h5_obj = self.__h5file[H5_KEY_DATA + '/' + path]
+        attrs = dict(h5_obj.attrs.items())
+        type_ = _decode_str(attrs.get(H5_ATTR_TYPE))
+        if isinstance(h5_obj, h5py.Group):
+            data = {key: self.__read_stacked_obj(path + '/' + key, row).data for key in h5_obj.keys()}
+            if type_ in VOXEL_SUBTYPES:
+                data = _to_voxel_grid(type_, data)
+            return _split_attrs(type_, data, attrs)
+        if _is_ragged(type_, _decode_str(attrs.get(H5_ATTR_ENCODING))):
+            start, end = self.__get_columns(path).get_bounds(row, h5_obj, self.__rows)
+            return _split_attrs(type_, _decode(type_, h5_obj[start:end], attrs, decode_image_data), attrs)
+        return _split_attrs(type_, _decode(type_, h5_obj[row], attrs, decode_image_data), attrs)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+import multiprocessing
+import os
+import h5py
+import numpy as np
+
+from .structure import *
+from .codec import H5CodecPolicy
+from .stacked import _create_appendable
+from .tuning import H5FileProfile
+
+def get_shard_path(path:str, shard:int) -> str:
+    """get_shard_path
+
+    Get the path of a shard file of a master file.
+
+    Args:
+        path (str): path of the master file
+        shard (int): shard number
+
+    Returns:
+        str: the path of the shard file, '[stem].shard-[shard].[ext]'
+    """
+    stem, ext = os.path.splitext(path)
+    return '{0}.shard-{1:05d}{2}'.format(stem, shard, ext if len(ext) > 0 else '.hdf5')
+
+def _read_layout(h5_root:h5py.File) -> str:
+    layout = h5_root[H5_KEY_DATA].attrs.get(H5_ATTR_LAYOUT, LAYOUT_GROUP)
+    if isinstance(layout, bytes):
+        layout = layout.decode('utf-8')
+    return layout
+
+def _read_length(h5_root:h5py.File) -> int:
+    h5_length = h5_root.get(H5_KEY_HEADER + '/' + H5_KEY_LENGTH)
+    if h5_length is not None:
+        return int(h5_length[()])
+    return max([int(key) + 1 for key in h5_root[H5_KEY_DATA].keys()], default=0)
+
+def _copy_attrs(src:Any, dst:Any) -> None:
+    for key, value in src.attrs.items():
+        dst.attrs[key] = value
+
+def _write_appendable(h5_group:h5py.Group, tag:str, values:np.ndarray, dtype:Any=None) -> h5py.Dataset:
+    # The tables of a master file stay appendable, so that H5Dataset in 'a' mode can add frames to it.
+    values = np.asarray(values)
+    h5_dataset = _create_appendable(h5_group, tag, values.shape[1:], values.dtype if dtype is None else dtype)
+    h5_dataset.resize(values.shape[0], axis=0)
+    h5_dataset[...] = values
+    return h5_dataset
+
+def _has_virtual_dataset(h5_group:h5py.Group) -> bool:
+    return h5_group.visititems(lambda name, h5_obj: True if isinstance(h5_obj, h5py.Dataset) and h5_obj.is_virtual else None) is True
+
+def _link_group_layout(h5_master:h5py.File, shards:List[Tuple[str, h5py.File, int, int]]) -> None:
+    h5_data:h5py.Group = h5_master[H5_KEY_DATA]
+    for relpath, h5_shard, start, _ in shards:
+        for key in h5_shard[H5_KEY_DATA].keys():
+            h5_data[str(start + int(key))] = h5py.ExternalLink(relpath, '/' + H5_KEY_DATA + '/' + key)
+
+def _merge_metadata_tables(h5_master:h5py.File, shards:List[Tuple[str, h5py.File, int, int]]) -> None:
+    tables:Dict[str, List[np.ndarray]] = {}
+    dtypes:Dict[str, Any] = {}
+    for _, h5_shard, start, _ in shards:
+        h5_meta:h5py.Group = h5_shard.get(H5_KEY_META)
+        if h5_meta is None:
+            continue
+        for tag, h5_table in h5_meta.items():
+            table = h5_table[()]
+            table[H5_KEY_INDEX] += start
+            tables.setdefault(tag, []).append(table)
+            dtypes[tag] = h5_table.dtype
+    for tag, items in tables.items():
+        _write_appendable(h5_master.require_group(H5_KEY_META), tag, np.concatenate(items), dtypes[tag])
+
+def _link_stacked_layout(h5_master:h5py.File, shards:List[Tuple[str, h5py.File, int, int]]) -> None:
+    # '/data' is mapped to the shards by virtual datasets without copying.
+    # '/meta' is small, and it is copied because the frame indices and the offsets must be shifted.
+    sources:Dict[str, List[Tuple[str, h5py.File, h5py.Dataset]]] = {}
+    groups:Dict[str, h5py.Group] = {}
+
+    def visit_data(relpath:str, h5_shard:h5py.File) -> Callable[[str, Any], None]:
+        def visit(name:str, h5_obj:Any) -> None:
+            if isinstance(h5_obj, h5py.Dataset):
+                sources.setdefault(name, []).append((relpath, h5_shard, h5_obj))
+            elif name not in groups:
+                groups[name] = h5_obj
+        return visit
+
+    for relpath, h5_shard, _, _ in shards:
+        h5_shard[H5_KEY_DATA].visititems(visit_data(relpath, h5_shard))
+
+    h5_data:h5py.Group = h5_master[H5_KEY_DATA]
+    for name in sorted(groups.keys()):
+        _copy_attrs(groups[name], h5_data.create_group(name))
+    for name, items in sources.items():
+        first:h5py.Dataset = items[0][2]
+        for _, _, h5_src in items:
+            if h5_src.shape[1:] != first.shape[1:] or h5_src.dtype != first.dtype:
+                raise ValueError('"{0}" has different shapes or dtypes in the shards.'.format(name))
+        length = sum(h5_src.shape[0] for _, _, h5_src in items)
+        layout = h5py.VirtualLayout(shape=(length,) + first.shape[1:], dtype=first.dtype)
+        row = 0
+        for relpath, _, h5_src in items:
+            layout[row:row + h5_src.shape[0]] = h5py.VirtualSource(relpath, h5_src.name, shape=h5_src.shape)
+            row += h5_src.shape[0]
+        _copy_attrs(first, h5_data.create_virtual_dataset(name, layout))
+
+    columns:Dict[str, List[np.ndarray]] = {}
+    dtypes:Dict[str, Any] = {}
+    rows:Dict[str, int] = {}
+
+    def visit_meta(start:int) -> Callable[[str, Any], None]:
+        def visit(name:str, h5_obj:Any) -> None:
+            if isinstance(h5_obj, h5py.Dataset) is False:
+                return
+            path, _, key = name.rpartition('/')
+            values = h5_obj[()]
+            if key == H5_KEY_INDEX:
+                values = values + start
+            elif key == H5_KEY_OFFSET:
+                values = values + rows.get(path, 0)
+            columns.setdefault(name, []).append(values)
+            dtypes[name] = h5_obj.dtype
+        return visit
+
+    for _, h5_shard, start, _ in shards:
+        h5_meta:h5py.Group = h5_shard.get(H5_KEY_META)
+        if h5_meta is not None:
+            h5_meta.visititems(visit_meta(start))
+        for name, items in sources.items():
+            for _, h5_src_shard, h5_src in items:
+                if h5_src_shard is h5_shard:
+                    rows[name] = rows.get(name, 0) + h5_src.shape[0]
+
+    for name, values in columns.items():
+        parent, _, key = (H5_KEY_META + '/' + name).rpartition('/')
+        _write_appendable(h5_master.require_group(parent), key, np.concatenate(values), dtypes[name])
+
+def _merge_timestamps(h5_master:h5py.File, shards:List[Tuple[str, h5py.File, int, int]]) -> None:
+    tables:Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {}
+    for _, h5_shard, start, _ in shards:
+        h5_timestamp:h5py.Group = h5_shard.get(H5_KEY_TIMESTAMP)
+        if h5_timestamp is None:
+            continue
+        for tag, h5_table in h5_timestamp.items():
+            tables.setdefault(tag, []).append((h5_table[H5_KEY_STAMP][()], h5_table[H5_KEY_INDEX][()] + start))
+    for tag, items in tables.items():
+        stamps = np.concatenate([stamp for stamp, _ in items])
+        indices = np.concatenate([index for _, index in items])
+        order = np.lexsort((indices, stamps))
+        h5_table:h5py.Group = h5_master.require_group(H5_KEY_TIMESTAMP + '/' + tag)
+        _write_appendable(h5_table, H5_KEY_STAMP, stamps[order])
+        _write_appendable(h5_table, H5_KEY_INDEX, indices[order])
+
+def finalize_shards(path:str, shard_paths:Sequence[str]) -> int:
+    """finalize_shards
+
+    Create a master file that presents the shards as one H5Dataset without copying the data.
+    The frames of the shards are numbered consecutively in the order of 'shard_paths'.
+    In LAYOUT_GROUP, '/data/[index]' is an external link to the frame in the shard.
+    In LAYOUT_STACKED, '/data/[tag]' is a virtual dataset of the shards and '/meta' is copied with shifted indices.
+    A master file of LAYOUT_GROUP can be appended by H5Dataset in 'a' mode, but the virtual datasets of LAYOUT_STACKED can not.
+    '/label' and the common groups of the shards are merged, and the shards without frames are skipped.
+    The shards are referenced by the paths relative to the master file, so they must be kept next to it.
+
+    Args:
+        path (str): path of the master file
+        shard_paths (Sequence[str]): paths of the shard files
+
+    Raises:
+        ValueError: if 'shard_paths' is empty, the layouts of the shards differ, or the labels or the common groups conflict.
+
+    Returns:
+        int: the number of frames.
+    """
+    from .merge import _H5Merger
+    if len(shard_paths) < 1:
+        raise ValueError('"shard_paths" must not be empty.')
+    fullpath = os.path.abspath(path)
+    dirname = os.path.dirname(fullpath)
+
+    h5_shards:List[h5py.File] = [h5py.File(shard_path, mode='r') for shard_path in shard_paths]
+    try:
+        layout = _read_layout(h5_shards[0])
+        shards:List[Tuple[str, h5py.File, int, int]] = []
+        start = 0
+        for shard_path, h5_shard in zip(shard_paths, h5_shards):
+            if _read_layout(h5_shard) != layout:
+                raise ValueError('The layouts of the shards must be the same.')
+            length = _read_length(h5_shard)
+            if length < 1:
+                continue
+            shards.append((os.path.relpath(os.path.abspath(shard_path), dirname), h5_shard, start, length))
+            start += length
+
+        with h5py.File(fullpath, mode='w') as h5_master:
+            h5_data:h5py.Group = h5_master.create_group(H5_KEY_DATA)
+            h5_data.attrs[H5_ATTR_LAYOUT] = layout
+            h5_data.attrs[H5_ATTR_METADATA] = h5_shards[0][H5_KEY_DATA].attrs.get(H5_ATTR_METADATA, METADATA_ATTRS)
+            if layout == LAYOUT_STACKED:
+                _link_stacked_layout(h5_master, shards)
+            else:
+                _link_group_layout(h5_master, shards)
+                _merge_metadata_tables(h5_master, shards)
+            _merge_timestamps(h5_master, shards)
+            # The labels are also taken from the empty shards, and a label that differs between the shards is an error.
+            _H5Merger(h5_master, h5_shards, [0] * len(h5_shards)).merge_common()
+            h5_header:h5py.Group = h5_master.create_group(H5_KEY_HEADER)
+            h5_header.create_dataset(H5_KEY_LENGTH, data=start)
+    finally:
+        for h5_shard in h5_shards:
+            h5_shard.close()
+    return start
+
+def _write_shard(args:Tuple[str, Callable[..., Any], Any, str, Dict[str, H5CodecPolicy], str, Union[str, H5FileProfile]]) -> str:
+    from . import H5Dataset
+    shard_path, write_shard, job, layout, codec_policies, metadata, profile = args
+    h5file = H5Dataset(shard_path, mode='w', layout=layout, codec_policies=codec_policies, metadata=metadata, profile=profile)
+    try:
+        write_shard(h5file, job)
+    finally:
+        h5file.close()
+    return shard_path
+
+def create_sharded_dataset(path:str, write_shard:Callable[..., Any], jobs:Sequence[Any], processes:int=None,
+    layout:str=None, codec_policies:Dict[str, H5CodecPolicy]=None, metadata:str=None, profile:Union[str, H5FileProfile]=None) -> int:
+    """create_sharded_dataset
+
+    Create an H5Dataset with worker processes.
+    Each job is written to its own shard file by 'write_shard(h5file, job)' in a worker process,
+    and 'finalize_shards' creates the master file. The frames are numbered in the order of 'jobs'.
+    'write_shard' and the jobs must be picklable, e.g. 'write_shard' is a function defined at the top level of a module.
+
+    Args:
+        path (str): path of the master file
+        write_shard (Callable[..., Any]): function that writes the frames of a job to the H5Dataset of a shard
+        jobs (Sequence[Any]): jobs, e.g. the ranges of the source files
+        processes (int, optional): number of worker processes. If None, 'os.cpu_count()'. Defaults to None.
+        layout (str, optional): layout of the shards [LAYOUT_GROUP, LAYOUT_STACKED]. Defaults to None.
+        codec_policies (Dict[str, H5CodecPolicy], optional): chunking and compression policies of the shards. Defaults to None.
+        metadata (str, optional): storage of the metadata of the shards [METADATA_ATTRS, METADATA_TABLE]. Defaults to None.
+        profile (str | H5FileProfile, optional): file-level settings of HDF5 of the shards, e.g. 'convert'. Defaults to None.
+
+    Returns:
+        int: the number of frames.
+    """
+    fullpath = os.path.abspath(path)
+    if os.path.isdir(os.path.dirname(fullpath)) is False:
+        raise NotADirectoryError('Directory "{0}" not found.'.format(os.path.dirname(fullpath)))
+    args = [(get_shard_path(fullpath, shard), write_shard, job, layout, codec_policies, metadata, profile) for shard, job in enumerate(jobs)]
+    if processes == 1:
+        shard_paths = [_write_shard(arg) for arg in args]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            shard_paths = pool.map(_write_shard, args, chunksize=1)
+    return finalize_shards(fullpath, shard_paths)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from typing import List, Tuple
+import numpy as np
+
+from .structure import *
+
+MAP_TILE_SIZE:float = 10.0
+MORTON_BITS:int = 21
+# The tiles are aligned to the origin, and the offset makes the indices of the negative coordinates non-negative.
+MORTON_OFFSET:int = 1 << (MORTON_BITS - 1)
+
+def _spread_bits(values:np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64) & np.uint64(0x1fffff)
+    values = (values | values << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    values = (values | values << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    values = (values | values << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    values = (values | values << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    values = (values | values << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return values
+
+def _compact_bits(values:np.ndarray) -> np.ndarray:
+    values = values & np.uint64(0x1249249249249249)
+    values = (values ^ (values >> np.uint64(2))) & np.uint64(0x10c30c30c30c30c3)
+    values = (values ^ (values >> np.uint64(4))) & np.uint64(0x100f00f00f00f00f)
+    values = (values ^ (values >> np.uint64(8))) & np.uint64(0x1f0000ff0000ff)
+    values = (values ^ (values >> np.uint64(16))) & np.uint64(0x1f00000000ffff)
+    values = (values ^ (values >> np.uint64(32))) & np.uint64(0x1fffff)
+    return values.astype(np.int64)
+
+def get_morton_code(tile_indices:np.ndarray) -> np.ndarray:
+    """get_morton_code
+
+    Interleave the bits of the tile indices into Morton (Z-order) codes.
+
+    Args:
+        tile_indices (np.ndarray): shape=(N, 3) tile indices (x, y, z) in [0, 2^21) shifted by MORTON_OFFSET
+
+    Returns:
+        np.ndarray: shape=(N,), dtype=np.uint64 Morton codes
+    """
+    return _spread_bits(tile_indices[:, 0]) | (_spread_bits(tile_indices[:, 1]) << np.uint64(1)) | (_spread_bits(tile_indices[:, 2]) << np.uint64(2))
+
+def get_tile_indices(morton_codes:np.ndarray) -> np.ndarray:
+    """get_tile_indices
+
+    Inverse of 'get_morton_code'.
+
+    Args:
+        morton_codes (np.ndarray): shape=(N,), dtype=np.uint64 Morton codes
+
+    Returns:
+        np.ndarray: shape=(N, 3), dtype=np.int64 tile indices (x, y, z)
+    """
+    morton_codes = morton_codes.astype(np.uint64)
+    return np.stack([_compact_bits(morton_codes >> np.uint64(axis)) for axis in range(3)], axis=-1)
+
+def _get_tile_indices(points:np.ndarray, tile_size:float) -> np.ndarray:
+    return np.floor(np.asarray(points, dtype=np.float64) / tile_size).astype(np.int64) + MORTON_OFFSET
+
+def sort_points_map(points:np.ndarray, tile_size:float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """sort_points_map
+
+    Sort the points of a map by the Morton code of their tile.
+
+    Args:
+        points (np.ndarray): shape=(N, 3), dtype=np.float32 point cloud (x, y, z)
+        tile_size (float): size of a tile [m]
+
+    Raises:
+        ValueError: if a point is farther than 2^20 tiles from the origin.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: the order of the points, the Morton codes of the occupied tiles, and the first row of each tile
+    """
+    if tile_size <= 0.0:
+        raise ValueError('"tile_size" must be positive.')
+    tile_indices = _get_tile_indices(points, tile_size)
+    if np.any(tile_indices < 0) or np.any(tile_indices >= (1 << MORTON_BITS)):
+        raise ValueError('The points must be within {0} tiles from the origin.'.format(MORTON_OFFSET))
+    codes = get_morton_code(tile_indices)
+    order = np.argsort(codes)
+    codes = codes[order]
+    starts = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    return order, codes[starts], starts.astype(np.int64)
+
+def get_map_ranges(tile_key:np.ndarray, tile_offset:np.ndarray, num_points:int, tile_size:float, box_min:np.ndarray, box_max:np.ndarray) -> List[Tuple[int, int]]:
+    """get_map_ranges
+
+    Get the row ranges of the tiles that intersect an axis-aligned box.
+    The ranges of the consecutive tiles are merged.
+
+    Args:
+        tile_key (np.ndarray): Morton codes of the occupied tiles
+        tile_offset (np.ndarray): first row of each tile
+        num_points (int): number of the points of the map
+        tile_size (float): size of a tile [m]
+        box_min (np.ndarray): minimum of the box (x, y, z)
+        box_max (np.ndarray): maximum of the box (x, y, z)
+
+    Returns:
+        List[Tuple[int, int]]: the ranges [start, end) of the rows
+    """
+    if tile_key.shape[0] < 1:
+        return []
+    tile_min = _get_tile_indices(box_min, tile_size)
+    tile_max = _get_tile_indices(box_max, tile_size)
+    tile_indices = get_tile_indices(tile_key)
+    selected = np.flatnonzero(np.all((tile_indices >= tile_min) & (tile_indices <= tile_max), axis=1))
+    if selected.shape[0] < 1:
+        return []
+    ends = np.append(tile_offset[1:], num_points)
+    starts = tile_offset[selected]
+    ends = ends[selected]
+    # A range continues while the next selected tile is the next tile in the order.
+    breaks = np.flatnonzero(selected[1:] != selected[:-1] + 1) + 1
+    return list(zip(starts[np.concatenate([[0], breaks])].tolist(), ends[np.append(breaks - 1, selected.shape[0] - 1)].tolist()))
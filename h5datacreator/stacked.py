@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Tuple
+import h5py
+import numpy as np
+
+from .structure import *
+from .codec import H5CodecPolicy
+from .image import IMAGE_ENCODINGS
+from .depth import ENCODING_DEPTH_SPARSE
+from .label import LABEL_ENCODINGS
+
+STACK_CHUNK_BYTES:int = 1 << 18
+STACK_MAX_CHUNK_ROWS:int = 4096
+STACK_MIN_CAPACITY:int = 16
+# SWMR does not support variable-length strings, so the frame ids are stored in fixed-length strings of this size [byte].
+SWMR_STRING_BYTES:int = 64
+
+RAGGED_TYPES:Tuple[str, ...] = (TYPE_POINTS, TYPE_SEMANTIC1D, SUBTYPE_VOXEL_POINTS, SUBTYPE_VOXEL_SEMANTIC3D, SUBTYPE_TILE_KEY, SUBTYPE_TILE_OFFSET)
+
+RAGGED_ENCODINGS:Tuple[str, ...] = tuple(IMAGE_ENCODINGS.keys()) + (ENCODING_DEPTH_SPARSE,) + LABEL_ENCODINGS
+
+def _is_ragged(type_:str, encoding:str=None) -> bool:
+    # The encoded images, the sparse maps and the encoded labels have a variable length.
+    return type_ in RAGGED_TYPES or encoding in RAGGED_ENCODINGS
+
+FRAME_ATTRS:Dict[str, Any] = {
+    H5_ATTR_STAMPSEC: np.int64,
+    H5_ATTR_STAMPNSEC: np.int64,
+    H5_ATTR_FRAMEID: h5py.special_dtype(vlen=str),
+    H5_ATTR_CHILDFRAMEID: h5py.special_dtype(vlen=str),
+}
+
+class _H5Appender():
+    """_H5Appender
+
+    Dataset that grows along the first axis.
+    The capacity is over-allocated geometrically and trimmed by 'flush'.
+    In SWMR mode the capacity is exact, since shrinking a dataset frees the chunks that the readers may be reading.
+    If the chunk has more than one row, rows are buffered and written one chunk at a time.
+
+    Args:
+        h5_dataset (h5py.Dataset): resizable dataset with 'maxshape[0] == None'
+    """
+
+    def __init__(self, h5_dataset:h5py.Dataset) -> None:
+        self.dataset:h5py.Dataset = h5_dataset
+        self.length:int = h5_dataset.shape[0]
+        self.capacity:int = h5_dataset.shape[0]
+        self.__buffer_rows:int = h5_dataset.chunks[0] if h5_dataset.chunks is not None else 1
+        self.__buffer:List[Any] = []
+
+    def append(self, value:Any) -> int:
+        """append
+
+        Append a row.
+
+        Args:
+            value (Any): row to append
+
+        Returns:
+            int: the row index.
+        """
+        row = self.length
+        if self.__buffer_rows > 1:
+            self.__buffer.append(value)
+            self.length += 1
+            if len(self.__buffer) >= self.__buffer_rows:
+                self.__write_buffer()
+            return row
+        self.reserve(self.length + 1)
+        self.dataset[row] = value
+        self.length += 1
+        return row
+
+    def extend(self, values:np.ndarray) -> int:
+        """extend
+
+        Append rows.
+
+        Args:
+            values (np.ndarray): rows to append
+
+        Returns:
+            int: the row index of the first row.
+        """
+        self.__write_buffer()
+        row = self.length
+        self.reserve(self.length + len(values))
+        if len(values) > 0:
+            self.dataset[row:row + len(values)] = values
+        self.length += len(values)
+        return row
+
+    def reserve(self, length:int) -> None:
+        """reserve
+
+        Allocate at least 'length' rows.
+
+        Args:
+            length (int): number of rows
+        """
+        if length <= self.capacity:
+            return
+        if self.dataset.file.swmr_mode is True:
+            self.capacity = length
+        else:
+            self.capacity = max(length, self.capacity * 2, STACK_MIN_CAPACITY)
+        self.dataset.resize(self.capacity, axis=0)
+
+    def __write_buffer(self) -> None:
+        if len(self.__buffer) < 1:
+            return
+        row = self.length - len(self.__buffer)
+        self.reserve(self.length)
+        self.dataset[row:self.length] = np.array(self.__buffer, dtype=self.dataset.dtype)
+        self.__buffer = []
+
+    def flush(self) -> None:
+        """flush
+
+        Write the buffered rows and trim the over-allocated rows.
+        """
+        self.__write_buffer()
+        if self.capacity != self.length:
+            self.dataset.resize(self.length, axis=0)
+            self.capacity = self.length
+
+def _create_appendable(h5_group:h5py.Group, tag:str, shape:Tuple[int, ...], dtype:Any, chunk_bytes:int=STACK_CHUNK_BYTES, **kwds) -> h5py.Dataset:
+    row_nbytes = max(int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize, 1)
+    rows = min(max(chunk_bytes // row_nbytes, 1), STACK_MAX_CHUNK_ROWS)
+    kwds.setdefault('chunks', (rows,) + tuple(shape))
+    return h5_group.create_dataset(tag, shape=(0,) + tuple(shape), maxshape=(None,) + tuple(shape), dtype=dtype, **kwds)
+
+def _fixed_string(value:Any) -> bytes:
+    data = value.encode('utf-8') if isinstance(value, str) else bytes(value)
+    if len(data) > SWMR_STRING_BYTES:
+        raise ValueError('"{0}" is longer than {1} bytes in SWMR mode.'.format(value, SWMR_STRING_BYTES))
+    return data
+
+def _attr_equal(a:Any, b:Any) -> bool:
+    if isinstance(a, bytes):
+        a = a.decode('utf-8')
+    if isinstance(b, bytes):
+        b = b.decode('utf-8')
+    return bool(np.array_equal(a, b))
+
+class _H5StackedStore():
+    """_H5StackedStore
+
+    Storage of the stacked layout.
+    '/data/[tag]' holds all frames of a tag with a leading frame axis, and
+    '/meta/[tag]' holds the parallel 1-D datasets of the frame index, stamps and frame ids.
+    The types with a variable number of elements (RAGGED_TYPES and RAGGED_ENCODINGS) are concatenated along the first axis,
+    and '/meta/[tag]/offset' holds the first row of each frame.
+    A file merged by 'merge_datasets' may have gaps between the rows, and '/meta/[tag]/end' then holds the end of the rows of each frame.
+    The members of a composite type share the rows of '/meta/[tag]'.
+    When 'frozen' is True, e.g. in SWMR mode, only the existing datasets can be appended.
+
+    Args:
+        h5file (h5py.File): H5Dataset file
+        swmr (bool, optional): If True, the frame ids are stored in fixed-length strings of SWMR_STRING_BYTES. Defaults to False.
+    """
+
+    def __init__(self, h5file:h5py.File, swmr:bool=False) -> None:
+        self.file:h5py.File = h5file
+        self.frozen:bool = False
+        self.__string_dtype:Any = h5py.string_dtype('utf-8', SWMR_STRING_BYTES) if swmr is True else None
+        self.__h5file:h5py.File = h5file
+        self.__appenders:Dict[str, _H5Appender] = {}
+        self.__static_attrs:Dict[str, Dict[str, Any]] = {}
+        self.__last_index:Dict[str, int] = {}
+
+    def __check_frozen(self, path:str) -> None:
+        if self.frozen is True:
+            raise ValueError('"{0}" is not in the first frame and can not be created in SWMR mode.'.format(path))
+
+    def __appender(self, key:str) -> _H5Appender:
+        appender = self.__appenders.get(key)
+        if appender is None:
+            h5_dataset = self.__h5file.get(key)
+            if h5_dataset is None:
+                return None
+            appender = _H5Appender(h5_dataset)
+            self.__appenders[key] = appender
+        return appender
+
+    def __check_index(self, path:str, index:int) -> None:
+        last_index = self.__last_index.get(path)
+        if last_index is None:
+            appender = self.__appender(H5_KEY_META + '/' + path + '/' + H5_KEY_INDEX)
+            last_index = -1 if appender is None or appender.length < 1 else int(appender.dataset[appender.length - 1])
+        if index <= last_index:
+            if index == last_index:
+                raise ValueError('"{0}" already exists in frame {1}.'.format(path, index))
+            raise ValueError('"{0}" must be appended in index order (last: {1}, index: {2}).'.format(path, last_index, index))
+
+    def __set_static_attrs(self, path:str, h5_obj:Any, attrs:Dict[str, Any], created:bool) -> None:
+        static_attrs = self.__static_attrs.get(path)
+        if static_attrs is None:
+            static_attrs = {} if created else dict(h5_obj.attrs.items())
+            self.__static_attrs[path] = static_attrs
+        for key, value in attrs.items():
+            if key in FRAME_ATTRS:
+                continue
+            if key not in static_attrs:
+                self.__check_frozen(path + '.' + key)
+                h5_obj.attrs[key] = value
+                static_attrs[key] = value
+            elif _attr_equal(static_attrs[key], value) is False:
+                raise ValueError('"{0}" of "{1}" must be constant in the stacked layout.'.format(key, path))
+
+    def __meta_columns(self, path:str, index:Any, attrs:Dict[str, Any], offset:Any=None) -> Dict[str, Tuple[Any, Any]]:
+        columns = {}
+        if '/' not in path:
+            columns[H5_KEY_INDEX] = (index, np.int64)
+            for key, dtype in FRAME_ATTRS.items():
+                if key not in attrs:
+                    continue
+                value = attrs[key]
+                if self.__string_dtype is not None and dtype is not np.int64:
+                    dtype = self.__string_dtype
+                    value = np.array([_fixed_string(v) for v in value], dtype=dtype) if isinstance(value, np.ndarray) else _fixed_string(value)
+                columns[key] = (value, dtype)
+        if offset is not None:
+            columns[H5_KEY_OFFSET] = (offset, np.int64)
+        return columns
+
+    def __meta_appender(self, path:str, key:str, dtype:Any) -> _H5Appender:
+        meta_path = H5_KEY_META + '/' + path
+        appender = self.__appender(meta_path + '/' + key)
+        if appender is None:
+            self.__check_frozen(meta_path + '/' + key)
+            _create_appendable(self.__h5file.require_group(meta_path), key, (), dtype)
+            appender = self.__appender(meta_path + '/' + key)
+        return appender
+
+    def __append_meta(self, path:str, index:int, attrs:Dict[str, Any], offset:int=None) -> None:
+        for key, (value, dtype) in self.__meta_columns(path, index, attrs, offset).items():
+            self.__meta_appender(path, key, dtype).append(value)
+        self.__last_index[path] = index
+
+    def __extend_meta(self, path:str, indices:np.ndarray, attrs:Dict[str, Any]) -> None:
+        for key, (value, dtype) in self.__meta_columns(path, indices, attrs).items():
+            if dtype is np.int64:
+                values = np.broadcast_to(np.asarray(value, dtype=np.int64), indices.shape)
+            else:
+                values = np.empty(indices.shape, dtype=object if dtype is not self.__string_dtype else dtype)
+                values[:] = value
+            self.__meta_appender(path, key, dtype).extend(values)
+        self.__last_index[path] = int(indices[-1])
+
+    def __require_dataset(self, path:str, shape:Tuple[int, ...], dtype:Any, attrs:Dict[str, Any], ragged:bool, codec_policy:H5CodecPolicy=None) -> _H5Appender:
+        key = H5_KEY_DATA + '/' + path
+        appender = self.__appender(key)
+        created = appender is None
+        if created:
+            self.__check_frozen(path)
+            parent, _, tag = key.rpartition('/')
+            kwds = {}
+            if codec_policy is not None:
+                kwds = codec_policy.get_filter_kwds()
+                kwds['chunk_bytes'] = codec_policy.chunk_bytes
+            _create_appendable(self.__h5file.require_group(parent), tag, shape, dtype, **kwds)
+            appender = self.__appender(key)
+        elif appender.dataset.shape[1:] != shape:
+            raise ValueError('"data.shape" must be {0} in the stacked layout.'.format(((-1,) if ragged else ()) + appender.dataset.shape[1:]))
+        self.__set_static_attrs(path, appender.dataset, attrs, created)
+        return appender
+
+    def append_dataset(self, path:str, index:int, data:Any, attrs:Dict[str, Any], dtype:Any=None, codec_policy:H5CodecPolicy=None) -> h5py.Dataset:
+        """append_dataset
+
+        Append a frame to '/data/[path]'.
+
+        Args:
+            path (str): path in '/data'
+            index (int): frame index
+            data (Any): data of the frame
+            attrs (Dict[str, Any]): attributes of the frame
+            dtype (Any, optional): dtype of the data. Defaults to None.
+            codec_policy (H5CodecPolicy, optional): filters applied when the stacked dataset is created. Defaults to None.
+
+        Raises:
+            ValueError: if the frame is not appended in index order, or the shape differs from the previous frames.
+
+        Returns:
+            h5py.Dataset: the stacked dataset
+        """
+        self.__check_index(path, index)
+        data = np.asarray(data, dtype=dtype)
+        ragged = _is_ragged(attrs.get(H5_ATTR_TYPE), attrs.get(H5_ATTR_ENCODING))
+        shape = data.shape[1:] if ragged else data.shape
+        appender = self.__require_dataset(path, shape, data.dtype, attrs, ragged, codec_policy)
+        if ragged:
+            offset = appender.extend(data)
+        else:
+            offset = None
+            appender.append(data)
+        self.__append_meta(path, index, attrs, offset)
+        return appender.dataset
+
+    def extend_dataset(self, path:str, indices:np.ndarray, data:np.ndarray, attrs:Dict[str, Any], dtype:Any=None, codec_policy:H5CodecPolicy=None) -> h5py.Dataset:
+        """extend_dataset
+
+        Append consecutive frames to '/data/[path]' at once.
+        The frame attributes in 'attrs' may be arrays with one value per frame.
+
+        Args:
+            path (str): path in '/data'
+            indices (np.ndarray): increasing frame indices
+            data (np.ndarray): data of the frames with a leading frame axis
+            attrs (Dict[str, Any]): attributes of the frames
+            dtype (Any, optional): dtype of the data. Defaults to None.
+            codec_policy (H5CodecPolicy, optional): filters applied when the stacked dataset is created. Defaults to None.
+
+        Raises:
+            ValueError: if the type has a variable number of elements, the frames are not appended in index order,
+                or the shape differs from the previous frames.
+
+        Returns:
+            h5py.Dataset: the stacked dataset
+        """
+        if _is_ragged(attrs.get(H5_ATTR_TYPE), attrs.get(H5_ATTR_ENCODING)):
+            raise ValueError('"{0}" can not be appended in a batch.'.format(attrs.get(H5_ATTR_TYPE)))
+        self.__check_index(path, int(indices[0]))
+        data = np.asarray(data, dtype=dtype)
+        appender = self.__require_dataset(path, data.shape[1:], data.dtype, attrs, False, codec_policy)
+        appender.extend(data)
+        self.__extend_meta(path, indices, attrs)
+        return appender.dataset
+
+    def append_group(self, path:str, index:int, attrs:Dict[str, Any]) -> h5py.Group:
+        """append_group
+
+        Append a frame of a composite type to the group '/data/[path]'.
+
+        Args:
+            path (str): path in '/data'
+            index (int): frame index
+            attrs (Dict[str, Any]): attributes of the frame
+
+        Returns:
+            h5py.Group: the group of the composite type
+        """
+        self.__check_index(path, index)
+        key = H5_KEY_DATA + '/' + path
+        h5_group:h5py.Group = self.__h5file.get(key)
+        created = h5_group is None
+        if created:
+            self.__check_frozen(path)
+            h5_group = self.__h5file.create_group(key)
+        self.__set_static_attrs(path, h5_group, attrs, created)
+        self.__append_meta(path, index, attrs)
+        return h5_group
+
+    def extend_group(self, path:str, indices:np.ndarray, attrs:Dict[str, Any]) -> h5py.Group:
+        """extend_group
+
+        Append consecutive frames of a composite type to the group '/data/[path]' at once.
+
+        Args:
+            path (str): path in '/data'
+            indices (np.ndarray): increasing frame indices
+            attrs (Dict[str, Any]): attributes of the frames
+
+        Returns:
+            h5py.Group: the group of the composite type
+        """
+        self.__check_index(path, int(indices[0]))
+        key = H5_KEY_DATA + '/' + path
+        h5_group:h5py.Group = self.__h5file.get(key)
+        created = h5_group is None
+        if created:
+            h5_group = self.__h5file.create_group(key)
+        self.__set_static_attrs(path, h5_group, attrs, created)
+        self.__extend_meta(path, indices, attrs)
+        return h5_group
+
+    def flush(self) -> None:
+        """flush
+
+        Trim the over-allocated rows of all stacked datasets.
+        """
+        for appender in self.__appenders.values():
+            appender.flush()
+
+class H5StackedGroup():
+    """H5StackedGroup
+
+    A frame of an H5Dataset in the stacked layout.
+    It is passed to the 'set_*' functions in place of 'h5py.Group'.
+
+    Args:
+        store (_H5StackedStore): storage of the stacked layout
+        index (int): frame index
+        path (str, optional): path in '/data'. Defaults to ''.
+    """
+
+    def __init__(self, store:_H5StackedStore, index:int, path:str='') -> None:
+        self.__store:_H5StackedStore = store
+        self.__index:int = index
+        self.__path:str = path
+
+    @property
+    def index(self) -> int:
+        """index
+
+        Returns:
+            int: frame index
+        """
+        return self.__index
+
+    @property
+    def file(self) -> h5py.File:
+        """file
+
+        Returns:
+            h5py.File: file of H5Dataset
+        """
+        return self.__store.file
+
+    @property
+    def name(self) -> str:
+        """name
+
+        Returns:
+            str: path of the group
+        """
+        return '/' + H5_KEY_DATA + ('/' + self.__path if len(self.__path) > 0 else '')
+
+    def __join(self, tag:str) -> str:
+        if len(tag) < 1 or '/' in tag:
+            raise NameError('"{}" is invalid tag.'.format(tag))
+        return tag if len(self.__path) < 1 else self.__path + '/' + tag
+
+    def create_dataset(self, tag:str, data:Any, attrs:Dict[str, Any], dtype:Any=None, codec_policy:H5CodecPolicy=None) -> h5py.Dataset:
+        """create_dataset
+
+        Append the data of this frame to '/data/[tag]'.
+
+        Args:
+            tag (str): tag of the data
+            data (Any): data of this frame
+            attrs (Dict[str, Any]): attributes of the data
+            dtype (Any, optional): dtype of the data. Defaults to None.
+            codec_policy (H5CodecPolicy, optional): filters applied when the stacked dataset is created. Defaults to None.
+
+        Returns:
+            h5py.Dataset: the stacked dataset
+        """
+        return self.__store.append_dataset(self.__join(tag), self.__index, data, attrs, dtype, codec_policy)
+
+    def create_group(self, tag:str, attrs:Dict[str, Any]) -> 'H5StackedGroup':
+        """create_group
+
+        Append a composite type of this frame to '/data/[tag]'.
+
+        Args:
+            tag (str): tag of the data
+            attrs (Dict[str, Any]): attributes of the data
+
+        Returns:
+            H5StackedGroup: the group of the composite type in this frame
+        """
+        path = self.__join(tag)
+        self.__store.append_group(path, self.__index, attrs)
+        return H5StackedGroup(self.__store, self.__index, path)
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Callable, Dict, List
+import time
+
+class _H5WriteStats():
+    """_H5WriteStats
+
+    Statistics of the 'set_*' calls of an H5Dataset by tag.
+    The time of a call is split into the HDF5 calls that create the datasets and groups, the attribute writes
+    (including the metadata table and the timestamp index), and the rest, i.e. validation and conversion.
+    Only the outermost call is counted, e.g. 'set_translation' in 'set_pose' counts for the tag of the pose.
+
+    Args:
+        callback (Callable[[Dict[str, Any]], None], optional): function called with the summary every 'interval' seconds. Defaults to None.
+        interval (float, optional): period of 'callback' [sec]. If None, 'callback' is only called on close. Defaults to None.
+    """
+
+    def __init__(self, callback:Callable[[Dict[str, Any]], None]=None, interval:float=None) -> None:
+        if interval is not None and interval <= 0.0:
+            raise ValueError('"interval" must be positive.')
+        self.__callback:Callable[[Dict[str, Any]], None] = callback
+        self.__interval:float = interval
+        self.__start:float = time.perf_counter()
+        self.__last_report:float = self.__start
+        # function, calls, bytes, total, hdf5 and attrs [sec] of each tag
+        self.__tags:Dict[str, List[Any]] = {}
+        self.__active:List[Any] = None
+        self.__close_time:float = None
+
+    def begin(self, tag:str, function:str) -> bool:
+        """begin
+
+        Start a call.
+
+        Args:
+            tag (str): tag of the data
+            function (str): name of the function
+
+        Returns:
+            bool: False if the call is nested in another call and is not counted.
+        """
+        if self.__active is not None:
+            return False
+        record = self.__tags.get(tag)
+        if record is None:
+            record = [function, 0, 0, 0.0, 0.0, 0.0]
+            self.__tags[tag] = record
+        self.__active = record
+        return True
+
+    def end(self, elapsed:float) -> None:
+        """end
+
+        Finish the call started by 'begin'.
+
+        Args:
+            elapsed (float): time of the call [sec]
+        """
+        self.__active[1] += 1
+        self.__active[3] += elapsed
+        self.__active = None
+        if self.__callback is not None and self.__interval is not None:
+            now = time.perf_counter()
+            if now - self.__last_report >= self.__interval:
+                self.__last_report = now
+                self.__callback(self.get_summary())
+
+    def add_hdf5(self, elapsed:float, nbytes:int) -> None:
+        """add_hdf5
+
+        Add the time of an HDF5 call that writes data to the current call.
+
+        Args:
+            elapsed (float): time of the HDF5 call [sec]
+            nbytes (int): size of the written data [byte]
+        """
+        if self.__active is not None:
+            self.__active[2] += nbytes
+            self.__active[4] += elapsed
+
+    def add_attrs(self, elapsed:float) -> None:
+        """add_attrs
+
+        Add the time of attribute writes to the current call.
+
+        Args:
+            elapsed (float): time of the attribute writes [sec]
+        """
+        if self.__active is not None:
+            self.__active[5] += elapsed
+
+    def close(self, elapsed:float) -> Dict[str, Any]:
+        """close
+
+        Record the time of closing the H5Dataset and call the callback with the final summary.
+
+        Args:
+            elapsed (float): time to flush the buffers and close [sec]
+
+        Returns:
+            Dict[str, Any]: the summary
+        """
+        self.__close_time = elapsed
+        summary = self.get_summary()
+        if self.__callback is not None:
+            self.__callback(summary)
+        return summary
+
+    def get_summary(self) -> Dict[str, Any]:
+        """get_summary
+
+        Returns:
+            Dict[str, Any]: {'elapsed_s', 'close_s', 'calls', 'bytes', 'total_s', 'validation_s', 'hdf5_s', 'attrs_s', 'tags'}.
+                'tags' holds {'function', 'calls', 'bytes', 'total_s', 'validation_s', 'hdf5_s', 'attrs_s'} of each tag.
+                'validation_s' is the time of the calls except the HDF5 calls and the attribute writes.
+        """
+        tags = {}
+        for tag, (function, calls, nbytes, total, hdf5, attrs) in self.__tags.items():
+            tags[tag] = {
+                'function': function,
+                'calls': calls,
+                'bytes': nbytes,
+                'total_s': total,
+                'validation_s': max(total - hdf5 - attrs, 0.0),
+                'hdf5_s': hdf5,
+                'attrs_s': attrs,
+            }
+        summary = {
+            'elapsed_s': time.perf_counter() - self.__start,
+            'close_s': self.__close_time,
+        }
+        for key in ['calls', 'bytes', 'total_s', 'validation_s', 'hdf5_s', 'attrs_s']:
+            summary[key] = sum(stats[key] for stats in tags.values())
+        summary['tags'] = tags
+        return summary
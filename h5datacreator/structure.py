@@ -25,9 +25,12 @@ TYPE_SEMANTIC1D:str = 'semantic1d'
 TYPE_SEMANTIC2D:str = 'semantic2d'
 TYPE_SEMANTIC3D:str = 'semantic3d'
 TYPE_VOXEL_SEMANTIC3D:str = 'voxel-semantic3d'
+TYPE_POINTS_MAP:str = 'points-map'
+TYPE_SEMANTIC3D_MAP:str = 'semantic3d-map'
 TYPE_POSE:str = 'pose'
 TYPE_TRANSLATION:str = 'translation'
 TYPE_QUATERNION:str = 'quaternion'
+TYPE_TRAJECTORY:str = 'trajectory'
 TYPE_INTRINSIC:str = 'intrinsic'
 TYPE_COLOR:str = 'color'
 
@@ -44,6 +47,10 @@ SUBTYPE_WIDTH:str = 'width'
 SUBTYPE_NAME:str = 'name'
 SUBTYPE_VOXEL_POINTS:str = 'points-voxel'
 SUBTYPE_VOXEL_SEMANTIC3D:str = 'semantic3d-voxel'
+SUBTYPE_TILE_KEY:str = 'tile_key'
+SUBTYPE_TILE_OFFSET:str = 'tile_offset'
+SUBTYPE_POSE:str = 'pose'
+SUBTYPE_STAMP:str = 'stamp'
 
 CONFIG_TAG_MINIBATCH:str = 'mini-batch'
 CONFIG_TAG_TYPE:str = 'type'
@@ -72,9 +79,20 @@ CONFIG_TAG_LABELTAG:str = 'label-tag'
 
 H5_KEY_HEADER:str = 'header'
 H5_KEY_LENGTH:str = 'length'
+H5_KEY_ROWS:str = 'rows'
+H5_KEY_PATHS:str = 'paths'
+H5_KEY_LIVE:str = 'live'
 H5_KEY_LABEL:str = 'label'
 H5_KEY_DATA:str = 'data'
 H5_KEY_NAME:str = 'name'
+H5_KEY_META:str = 'meta'
+H5_KEY_INDEX:str = 'index'
+H5_KEY_OFFSET:str = 'offset'
+H5_KEY_END:str = 'end'
+H5_KEY_TIMESTAMP:str = 'timestamp'
+H5_KEY_STAMP:str = 'stamp'
+H5_KEY_VOXELOFFSET:str = 'voxel_offset'
+H5_KEY_VOXELCOUNT:str = 'voxel_count'
 H5_ATTR_TYPE:str = 'type'
 H5_ATTR_STAMPSEC:str = 'stamp.sec'
 H5_ATTR_STAMPNSEC:str = 'stamp.nsec'
@@ -90,6 +108,21 @@ H5_ATTR_VOXELMIN:str = 'voxel_min'
 H5_ATTR_VOXELMAX:str = 'voxel_max'
 H5_ATTR_VOXELCENTER:str = 'voxel_center'
 H5_ATTR_VOXELORIGIN:str = 'voxel_origin'
+H5_ATTR_TILESIZE:str = 'tile_size'
+H5_ATTR_ENCODING:str = 'encoding'
+H5_ATTR_SCALE:str = 'scale'
+H5_ATTR_OFFSET:str = 'offset'
+H5_ATTR_QUALITY:str = 'quality'
+H5_ATTR_SHAPE:str = 'shape'
+H5_ATTR_BITS:str = 'bits'
+H5_ATTR_LAYOUT:str = 'layout'
+H5_ATTR_METADATA:str = 'metadata'
+
+LAYOUT_GROUP:str = 'group'
+LAYOUT_STACKED:str = 'stacked'
+
+METADATA_ATTRS:str = 'attrs'
+METADATA_TABLE:str = 'table'
 
 DTYPE_NUMPY:Dict[str, np.dtype] = {
     TYPE_FLOAT16: np.float16,
@@ -109,16 +142,21 @@ DTYPE_NUMPY:Dict[str, np.dtype] = {
     TYPE_DEPTH: np.float32,
     TYPE_DISPARITY: np.float32,
     TYPE_POINTS: np.float32,
-    TYPE_VOXEL_POINTS: np.object,
+    TYPE_VOXEL_POINTS: np.dtype(object),
     SUBTYPE_VOXEL_POINTS: np.dtype([('x', np.float32), ('y', np.float32), ('z',np.float32)]),
     TYPE_SEMANTIC1D: np.uint8,
     TYPE_SEMANTIC2D: np.uint8,
     TYPE_SEMANTIC3D: None,
-    TYPE_VOXEL_SEMANTIC3D: np.object,
+    TYPE_VOXEL_SEMANTIC3D: np.dtype(object),
     SUBTYPE_VOXEL_SEMANTIC3D: np.dtype([('x', np.float32), ('y', np.float32), ('z',np.float32), ('label',np.uint8)]),
+    TYPE_POINTS_MAP: None,
+    TYPE_SEMANTIC3D_MAP: None,
+    SUBTYPE_TILE_KEY: np.uint64,
+    SUBTYPE_TILE_OFFSET: np.int64,
     TYPE_POSE: None,
     TYPE_TRANSLATION: np.float32,
     TYPE_QUATERNION: np.float32,
+    TYPE_TRAJECTORY: None,
     TYPE_INTRINSIC: np.float32,
     TYPE_COLOR: np.uint8,
 }
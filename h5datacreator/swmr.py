@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from typing import Dict, List, Tuple
+import h5py
+import numpy as np
+
+from .structure import *
+
+SWMR_LIBVER:Tuple[str, str] = ('v110', 'latest')
+
+def _get_extent(h5_dataset:h5py.Dataset, rows:Dict[str, int]=None) -> int:
+    # The rows committed by the SWMR writer. The rows after them may be allocated but not written yet.
+    if rows is None:
+        return h5_dataset.shape[0]
+    return rows.get(h5_dataset.name, h5_dataset.shape[0])
+
+def _read_rows(h5_dataset:h5py.Dataset, rows:Dict[str, int]=None) -> np.ndarray:
+    if rows is None or h5_dataset.name not in rows:
+        return h5_dataset[()]
+    return h5_dataset[:rows[h5_dataset.name]]
+
+class _H5SwmrHeader():
+    """_H5SwmrHeader
+
+    Commit record of an H5Dataset written in SWMR mode.
+    '/header/paths' lists the appendable datasets and '/header/rows' holds their committed rows.
+    '/header/length' is the number of the committed frames and '/header/live' is 1 until the writer is closed.
+    All objects are created before SWMR mode starts, because HDF5 can not show new objects to the readers.
+
+    Args:
+        h5file (h5py.File): H5Dataset file with the datasets of all tags
+    """
+
+    def __init__(self, h5file:h5py.File) -> None:
+        self.__datasets:List[h5py.Dataset] = []
+
+        def visit(name:str, h5_obj:h5py.HLObject) -> None:
+            if isinstance(h5_obj, h5py.Dataset) and h5_obj.maxshape is not None and len(h5_obj.maxshape) > 0 and h5_obj.maxshape[0] is None:
+                self.__datasets.append(h5_obj)
+        h5file.visititems(visit)
+
+        h5_header:h5py.Group = h5file.require_group(H5_KEY_HEADER)
+        for key in [H5_KEY_LENGTH, H5_KEY_ROWS, H5_KEY_PATHS, H5_KEY_LIVE]:
+            if key in h5_header:
+                del h5_header[key]
+        h5_header.create_dataset(H5_KEY_PATHS, data=[h5_dataset.name for h5_dataset in self.__datasets], dtype=h5py.string_dtype())
+        self.__rows:h5py.Dataset = h5_header.create_dataset(H5_KEY_ROWS, shape=(len(self.__datasets),), dtype=np.int64)
+        self.__length:h5py.Dataset = h5_header.create_dataset(H5_KEY_LENGTH, data=0, dtype=np.int64)
+        self.__live:h5py.Dataset = h5_header.create_dataset(H5_KEY_LIVE, data=1, dtype=np.int8)
+        h5file.swmr_mode = True
+
+    def commit(self, length:int, live:bool=True) -> None:
+        """commit
+
+        Show the frames written so far to the readers.
+        The buffered rows must be written before, so that the extents of the datasets are their rows.
+
+        Args:
+            length (int): number of the complete frames
+            live (bool, optional): False when the writer is closed. Defaults to True.
+        """
+        rows = np.array([h5_dataset.shape[0] for h5_dataset in self.__datasets], dtype=np.int64)
+        for h5_dataset in self.__datasets:
+            h5_dataset.flush()
+        # The rows are written before the length, so a reader never sees a frame without its rows.
+        self.__rows[...] = rows
+        self.__rows.flush()
+        self.__length[()] = length
+        self.__length.flush()
+        if live is False:
+            self.__live[()] = 0
+            self.__live.flush()
+
+def read_swmr_header(h5file:h5py.File) -> Tuple[int, Dict[str, int], bool]:
+    """read_swmr_header
+
+    Read the commit record of a file opened with 'swmr=True'.
+
+    Args:
+        h5file (h5py.File): H5Dataset file
+
+    Returns:
+        Tuple[int, Dict[str, int], bool]: the number of the committed frames, the committed rows by dataset path,
+            and whether the writer is still writing. (None, None, False) if the file was not written in SWMR mode.
+    """
+    h5_header:h5py.Group = h5file.get(H5_KEY_HEADER)
+    if h5_header is None or H5_KEY_ROWS not in h5_header:
+        return None, None, False
+    h5_length:h5py.Dataset = h5_header[H5_KEY_LENGTH]
+    h5_rows:h5py.Dataset = h5_header[H5_KEY_ROWS]
+    h5_live:h5py.Dataset = h5_header[H5_KEY_LIVE]
+    # The length is read before the rows, so the rows cover all committed frames.
+    for h5_dataset in [h5_live, h5_length, h5_rows]:
+        h5_dataset.refresh()
+    live = bool(h5_live[()])
+    length = int(h5_length[()])
+    rows = h5_rows[()]
+    paths = [path.decode('utf-8') if isinstance(path, bytes) else path for path in h5_header[H5_KEY_PATHS][()]]
+    return length, dict(zip(paths, rows.tolist())), live
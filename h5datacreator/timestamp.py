@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, List, Tuple, Union
+import h5py
+import numpy as np
+
+from .structure import *
+from .stacked import _H5Appender, _create_appendable
+from .swmr import _read_rows
+
+def get_stamp_ns(stamp_sec:Union[int, np.ndarray], stamp_nsec:Union[int, np.ndarray]=0) -> Union[int, np.ndarray]:
+    """get_stamp_ns
+
+    Convert a timestamp to an integer in nanoseconds.
+
+    Args:
+        stamp_sec (int | np.ndarray): integer part of the timestamp [sec]
+        stamp_nsec (int | np.ndarray, optional): fractional part of the timestamp [nsec]. Defaults to 0.
+
+    Returns:
+        int | np.ndarray: the timestamp [nsec]
+    """
+    if isinstance(stamp_sec, np.ndarray) or isinstance(stamp_nsec, np.ndarray):
+        return np.asarray(stamp_sec, dtype=np.int64) * 1000000000 + np.asarray(stamp_nsec, dtype=np.int64)
+    return int(stamp_sec) * 1000000000 + int(stamp_nsec)
+
+class H5TimestampIndex():
+    """H5TimestampIndex
+
+    Sorted table of the timestamps of each tag, '/timestamp/[tag]/stamp' [nsec] and '/timestamp/[tag]/index'.
+    H5Dataset appends a row every time a 'set_*' function writes a tag of a frame, and sorts the table on close.
+    The queries use binary search on the table and never open the frames.
+
+    Args:
+        h5file (h5py.File): H5Dataset file
+        rows (Dict[str, int], optional): committed rows of the datasets of a file written in SWMR mode. Defaults to None.
+    """
+
+    def __init__(self, h5file:h5py.File, rows:Dict[str, int]=None) -> None:
+        self.__h5file:h5py.File = h5file
+        self.__rows:Dict[str, int] = rows
+        # When True, e.g. in SWMR mode, no table can be created.
+        self.frozen:bool = False
+        self.__appenders:Dict[str, Tuple[_H5Appender, _H5Appender]] = {}
+        self.__last_stamps:Dict[str, int] = {}
+        self.__unsorted:set = set()
+        self.__tables:Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def tags(self) -> List[str]:
+        """tags
+
+        Returns:
+            List[str]: tags with a timestamp table
+        """
+        h5_timestamp:h5py.Group = self.__h5file.get(H5_KEY_TIMESTAMP)
+        return [] if h5_timestamp is None else list(h5_timestamp.keys())
+
+    def __get_appenders(self, tag:str) -> Tuple[_H5Appender, _H5Appender]:
+        appenders = self.__appenders.get(tag)
+        if appenders is None:
+            h5_table:h5py.Group = self.__h5file.require_group(H5_KEY_TIMESTAMP + '/' + tag)
+            h5_stamp:h5py.Dataset = h5_table.get(H5_KEY_STAMP)
+            h5_index:h5py.Dataset = h5_table.get(H5_KEY_INDEX)
+            if h5_stamp is None:
+                if self.frozen is True:
+                    raise ValueError('"{0}" is not in the first frame and can not be created in SWMR mode.'.format(H5_KEY_TIMESTAMP + '/' + tag))
+                h5_stamp = _create_appendable(h5_table, H5_KEY_STAMP, (), np.int64)
+                h5_index = _create_appendable(h5_table, H5_KEY_INDEX, (), np.int64)
+            elif h5_stamp.shape[0] > 0:
+                self.__last_stamps[tag] = int(h5_stamp[-1])
+            appenders = (_H5Appender(h5_stamp), _H5Appender(h5_index))
+            self.__appenders[tag] = appenders
+        return appenders
+
+    def append(self, tag:str, index:int, stamp:int) -> None:
+        """append
+
+        Append the timestamp of a tag in a frame.
+
+        Args:
+            tag (str): tag of the data
+            index (int): frame index
+            stamp (int): timestamp [nsec]
+        """
+        stamp_appender, index_appender = self.__get_appenders(tag)
+        stamp_appender.append(stamp)
+        index_appender.append(index)
+        if stamp < self.__last_stamps.get(tag, stamp):
+            self.__unsorted.add(tag)
+        self.__last_stamps[tag] = stamp
+        self.__tables.pop(tag, None)
+
+    def extend(self, tag:str, indices:np.ndarray, stamps:np.ndarray) -> None:
+        """extend
+
+        Append the timestamps of a tag in consecutive frames.
+
+        Args:
+            tag (str): tag of the data
+            indices (np.ndarray): frame indices
+            stamps (np.ndarray): timestamps [nsec]
+        """
+        stamps = np.broadcast_to(np.asarray(stamps, dtype=np.int64), indices.shape)
+        if stamps.shape[0] < 1:
+            return
+        stamp_appender, index_appender = self.__get_appenders(tag)
+        stamp_appender.extend(stamps)
+        index_appender.extend(np.asarray(indices, dtype=np.int64))
+        if stamps[0] < self.__last_stamps.get(tag, stamps[0]) or np.any(stamps[1:] < stamps[:-1]):
+            self.__unsorted.add(tag)
+        self.__last_stamps[tag] = int(stamps[-1])
+        self.__tables.pop(tag, None)
+
+    def flush(self) -> None:
+        """flush
+
+        Write the buffered rows and sort the tables.
+        """
+        for tag, (stamp_appender, index_appender) in self.__appenders.items():
+            stamp_appender.flush()
+            index_appender.flush()
+            if tag in self.__unsorted:
+                stamps = stamp_appender.dataset[()]
+                indices = index_appender.dataset[()]
+                order = np.lexsort((indices, stamps))
+                stamp_appender.dataset[...] = stamps[order]
+                index_appender.dataset[...] = indices[order]
+                self.__last_stamps[tag] = int(stamps[order[-1]])
+        self.__unsorted.clear()
+
+    def get_table(self, tag:str) -> Tuple[np.ndarray, np.ndarray]:
+        """get_table
+
+        Get the timestamp table of a tag sorted by the timestamp.
+        For a file written without the table, it is built once from '/meta' or the attributes of the frames.
+
+        Args:
+            tag (str): tag of the data
+
+        Raises:
+            KeyError: if 'tag' has no timestamp table.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: the timestamps [nsec] and the frame indices
+        """
+        table = self.__tables.get(tag)
+        if table is not None:
+            return table
+        if tag in self.__appenders:
+            self.flush()
+        h5_table:h5py.Group = self.__h5file.get(H5_KEY_TIMESTAMP + '/' + tag)
+        if h5_table is not None:
+            stamps = _read_rows(h5_table[H5_KEY_STAMP], self.__rows)
+            indices = _read_rows(h5_table[H5_KEY_INDEX], self.__rows)
+        else:
+            stamps, indices = self.__build_table(tag)
+        if stamps.shape[0] > 1 and np.any(stamps[1:] < stamps[:-1]):
+            order = np.lexsort((indices, stamps))
+            stamps, indices = stamps[order], indices[order]
+        table = (stamps, indices)
+        self.__tables[tag] = table
+        return table
+
+    def __build_table(self, tag:str) -> Tuple[np.ndarray, np.ndarray]:
+        h5_meta:h5py.Group = self.__h5file.get(H5_KEY_META + '/' + tag)
+        if h5_meta is not None:
+            indices = _read_rows(h5_meta[H5_KEY_INDEX], self.__rows)
+            stamp_sec = _read_rows(h5_meta[H5_ATTR_STAMPSEC], self.__rows) if H5_ATTR_STAMPSEC in h5_meta else np.zeros_like(indices)
+            stamp_nsec = _read_rows(h5_meta[H5_ATTR_STAMPNSEC], self.__rows) if H5_ATTR_STAMPNSEC in h5_meta else np.zeros_like(indices)
+            return get_stamp_ns(stamp_sec, stamp_nsec), indices
+        stamps = []
+        indices = []
+        for key, h5_frame in self.__h5file[H5_KEY_DATA].items():
+            h5_obj = h5_frame.get(tag) if isinstance(h5_frame, h5py.Group) else None
+            if h5_obj is None or H5_ATTR_STAMPSEC not in h5_obj.attrs:
+                continue
+            stamps.append(get_stamp_ns(h5_obj.attrs[H5_ATTR_STAMPSEC], h5_obj.attrs.get(H5_ATTR_STAMPNSEC, 0)))
+            indices.append(int(key))
+        if len(indices) < 1:
+            raise KeyError('"{0}" has no timestamp.'.format(tag))
+        return np.array(stamps, dtype=np.int64), np.array(indices, dtype=np.int64)
+
+    def get_nearest_index(self, tag:str, stamp:int, tolerance:int=None) -> int:
+        """get_nearest_index
+
+        Get the frame of a tag with the nearest timestamp.
+
+        Args:
+            tag (str): tag of the data
+            stamp (int): timestamp [nsec]
+            tolerance (int, optional): maximum difference of the timestamps [nsec]. If None, unlimited. Defaults to None.
+
+        Returns:
+            int: the frame index, or -1 if no frame is within 'tolerance'.
+        """
+        stamps, indices = self.get_table(tag)
+        if stamps.shape[0] < 1:
+            return -1
+        row = int(np.searchsorted(stamps, stamp))
+        if row >= stamps.shape[0] or (row > 0 and stamp - stamps[row - 1] <= stamps[row] - stamp):
+            row -= 1
+        if tolerance is not None and abs(int(stamps[row]) - stamp) > tolerance:
+            return -1
+        return int(indices[row])
+
+    def get_range_indices(self, tag:str, start:int, end:int) -> np.ndarray:
+        """get_range_indices
+
+        Get the frames of a tag with 'start <= timestamp < end' in the order of the timestamp.
+
+        Args:
+            tag (str): tag of the data
+            start (int): start of the range [nsec]
+            end (int): end of the range [nsec]
+
+        Returns:
+            np.ndarray: the frame indices
+        """
+        stamps, indices = self.get_table(tag)
+        return indices[np.searchsorted(stamps, start, side='left'):np.searchsorted(stamps, end, side='left')]
+
+    def get_interval_indices(self, tag:str, stamp:int) -> Tuple[int, int]:
+        """get_interval_indices
+
+        Get the frames of a tag just before and after a timestamp, e.g. for interpolation.
+
+        Args:
+            tag (str): tag of the data
+            stamp (int): timestamp [nsec]
+
+        Returns:
+            Tuple[int, int]: the frame with the last timestamp <= 'stamp' and the frame with the first timestamp >= 'stamp'.
+                -1 if there is no such frame.
+        """
+        stamps, indices = self.get_table(tag)
+        row = int(np.searchsorted(stamps, stamp, side='right'))
+        before = int(indices[row - 1]) if row > 0 else -1
+        if row > 0 and stamps[row - 1] == stamp:
+            return before, before
+        after = int(indices[row]) if row < stamps.shape[0] else -1
+        return before, after
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple
+import h5py
+import numpy as np
+
+from .structure import *
+from .codec import H5CodecPolicy
+from .stacked import _H5Appender, _create_appendable
+from .swmr import _read_rows
+
+# Below this angle [rad] between the quaternions, 'slerp' falls back to the normalized linear interpolation.
+SLERP_EPSILON:float = 1e-6
+
+def slerp(q0:np.ndarray, q1:np.ndarray, t:np.ndarray) -> np.ndarray:
+    """slerp
+
+    Spherical linear interpolation of quaternions along the shorter arc.
+
+    Args:
+        q0 (np.ndarray): shape=(M, 4) quaternions [qx, qy, qz, qw] at t=0
+        q1 (np.ndarray): shape=(M, 4) quaternions [qx, qy, qz, qw] at t=1
+        t (np.ndarray): shape=(M,) interpolation parameters in [0, 1]
+
+    Returns:
+        np.ndarray: shape=(M, 4), dtype=np.float64 the normalized quaternions
+    """
+    q0 = np.asarray(q0, dtype=np.float64)
+    q1 = np.asarray(q1, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[:, np.newaxis]
+    dot = np.sum(q0 * q1, axis=1, keepdims=True)
+    # q and -q are the same rotation, so the sign with the shorter arc is used.
+    q1 = np.where(dot < 0.0, -q1, q1)
+    dot = np.clip(np.abs(dot), 0.0, 1.0)
+    theta = np.arccos(dot)
+    sin_theta = np.sin(theta)
+    near = sin_theta < SLERP_EPSILON
+    safe = np.where(near, 1.0, sin_theta)
+    w0 = np.where(near, 1.0 - t, np.sin((1.0 - t) * theta) / safe)
+    w1 = np.where(near, t, np.sin(t * theta) / safe)
+    q = w0 * q0 + w1 * q1
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+def interpolate_poses(stamps:np.ndarray, poses:np.ndarray, query:np.ndarray) -> np.ndarray:
+    """interpolate_poses
+
+    Interpolate a trajectory at arbitrary timestamps.
+    The translations are linearly interpolated and the quaternions are interpolated by 'slerp'.
+
+    Args:
+        stamps (np.ndarray): shape=(N,), dtype=np.int64 sorted timestamps of the trajectory [nsec]
+        poses (np.ndarray): shape=(N, 7) poses [x, y, z, qx, qy, qz, qw]
+        query (np.ndarray): shape=(M,), dtype=np.int64 timestamps to interpolate [nsec]
+
+    Returns:
+        np.ndarray: shape=(M, 7), dtype=np.float64 the poses. NaN for the timestamps outside the trajectory.
+    """
+    stamps = np.asarray(stamps, dtype=np.int64)
+    poses = np.asarray(poses, dtype=np.float64)
+    query = np.asarray(query, dtype=np.int64).reshape(-1)
+    result = np.full((query.shape[0], 7), np.nan, dtype=np.float64)
+    if stamps.shape[0] < 1:
+        return result
+    valid = (query >= stamps[0]) & (query <= stamps[-1])
+    query = query[valid]
+    if stamps.shape[0] < 2:
+        result[valid] = poses[0]
+        return result
+
+    # The segment [stamps[i0], stamps[i0 + 1]] that contains each timestamp.
+    i0 = np.clip(np.searchsorted(stamps, query, side='right') - 1, 0, stamps.shape[0] - 2)
+    i1 = i0 + 1
+    dt = (stamps[i1] - stamps[i0]).astype(np.float64)
+    t = np.divide((query - stamps[i0]).astype(np.float64), dt, out=np.zeros_like(dt), where=dt > 0.0)
+    interpolated = np.empty((query.shape[0], 7), dtype=np.float64)
+    interpolated[:, :3] = poses[i0, :3] + (poses[i1, :3] - poses[i0, :3]) * t[:, np.newaxis]
+    interpolated[:, 3:] = slerp(poses[i0, 3:], poses[i1, 3:], t)
+    result[valid] = interpolated
+    return result
+
+class H5Trajectory():
+    """H5Trajectory
+
+    Pose sequence of TYPE_TRAJECTORY read by H5DatasetReader.
+
+    Args:
+        stamps (np.ndarray): shape=(N,), dtype=np.int64 sorted timestamps [nsec]
+        poses (np.ndarray): shape=(N, 7), dtype=np.float64 poses [x, y, z, qx, qy, qz, qw]
+        frame_id (str, optional): frame id. Defaults to None.
+        child_frame_id (str, optional): child frame id. Defaults to None.
+    """
+
+    def __init__(self, stamps:np.ndarray, poses:np.ndarray, frame_id:str=None, child_frame_id:str=None) -> None:
+        self.stamps:np.ndarray = stamps
+        self.poses:np.ndarray = poses
+        self.frame_id:str = frame_id
+        self.child_frame_id:str = child_frame_id
+
+    def __repr__(self) -> str:
+        return 'H5Trajectory(length={0}, frame_id={1!r}, child_frame_id={2!r})'.format(len(self), self.frame_id, self.child_frame_id)
+
+    def __len__(self) -> int:
+        return self.stamps.shape[0]
+
+    @property
+    def translations(self) -> np.ndarray:
+        """translations
+
+        Returns:
+            np.ndarray: shape=(N, 3) translation vectors [x, y, z]
+        """
+        return self.poses[:, :3]
+
+    @property
+    def quaternions(self) -> np.ndarray:
+        """quaternions
+
+        Returns:
+            np.ndarray: shape=(N, 4) quaternions [qx, qy, qz, qw]
+        """
+        return self.poses[:, 3:]
+
+    def interpolate(self, stamps:np.ndarray) -> np.ndarray:
+        """interpolate
+
+        Get the poses at arbitrary timestamps by 'interpolate_poses'.
+
+        Args:
+            stamps (np.ndarray): shape=(M,), dtype=np.int64 timestamps [nsec]
+
+        Returns:
+            np.ndarray: shape=(M, 7), dtype=np.float64 the poses. NaN for the timestamps outside the trajectory.
+        """
+        return interpolate_poses(self.stamps, self.poses, stamps)
+
+def _check_trajectory(data:np.ndarray, stamps:np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    data = np.asarray(data)
+    stamps = np.asarray(stamps)
+    if len(data.shape) != 2 or data.shape[1] != 7:
+        raise ValueError('"data.shape" must be (N, 7).')
+    if data.dtype not in [np.float32, np.float64]:
+        raise TypeError('"data.dtype" must be "np.float32" or "np.float64".')
+    if stamps.shape != (data.shape[0],):
+        raise ValueError('"stamps.shape" must be (N,).')
+    if stamps.dtype.kind not in 'iu':
+        raise TypeError('"stamps.dtype" must be an integer type.')
+    stamps = stamps.astype(np.int64, copy=False)
+    if np.any(stamps[1:] < stamps[:-1]):
+        raise ValueError('"stamps" must be sorted.')
+    return data.astype(np.float64, copy=False), stamps
+
+def _create_trajectory(h5_group:h5py.Group, tag:str, attrs:Dict[str, Any], codec_policy:H5CodecPolicy=None) -> h5py.Group:
+    h5_traj:h5py.Group = h5_group.create_group(tag)
+    for key, value in attrs.items():
+        h5_traj.attrs[key] = value
+    kwds = {}
+    if codec_policy is not None:
+        kwds = codec_policy.get_filter_kwds()
+        kwds['chunk_bytes'] = codec_policy.chunk_bytes
+    _create_appendable(h5_traj, SUBTYPE_STAMP, (), np.int64, **kwds)
+    _create_appendable(h5_traj, SUBTYPE_POSE, (7,), np.float64, **kwds)
+    return h5_traj
+
+class _H5TrajectoryWriter():
+    """_H5TrajectoryWriter
+
+    Appender of the 'stamp' and 'pose' datasets of a trajectory.
+    Single poses are buffered and written one chunk at a time.
+
+    Args:
+        h5_traj (h5py.Group): group of TYPE_TRAJECTORY
+    """
+
+    def __init__(self, h5_traj:h5py.Group) -> None:
+        self.__stamps:_H5Appender = _H5Appender(h5_traj[SUBTYPE_STAMP])
+        self.__poses:_H5Appender = _H5Appender(h5_traj[SUBTYPE_POSE])
+        self.__last_stamp:int = int(h5_traj[SUBTYPE_STAMP][-1]) if self.__stamps.length > 0 else None
+
+    def extend(self, data:np.ndarray, stamps:np.ndarray) -> None:
+        """extend
+
+        Append poses.
+
+        Args:
+            data (np.ndarray): shape=(N, 7), dtype=np.float64 poses
+            stamps (np.ndarray): shape=(N,), dtype=np.int64 sorted timestamps [nsec]
+
+        Raises:
+            ValueError: if the timestamps are before the last appended pose.
+        """
+        if stamps.shape[0] < 1:
+            return
+        if self.__last_stamp is not None and stamps[0] < self.__last_stamp:
+            raise ValueError('"stamps" must not be before the last pose {0}.'.format(self.__last_stamp))
+        if stamps.shape[0] == 1:
+            self.__stamps.append(stamps[0])
+            self.__poses.append(data[0])
+        else:
+            self.__stamps.extend(stamps)
+            self.__poses.extend(data)
+        self.__last_stamp = int(stamps[-1])
+
+    def flush(self) -> None:
+        """flush
+
+        Write the buffered poses.
+        """
+        self.__stamps.flush()
+        self.__poses.flush()
+
+def read_trajectory(h5_traj:h5py.Group, rows:Dict[str, int]=None) -> H5Trajectory:
+    """read_trajectory
+
+    Args:
+        h5_traj (h5py.Group): group of TYPE_TRAJECTORY
+        rows (Dict[str, int], optional): committed rows of the datasets of a file written in SWMR mode. Defaults to None.
+
+    Returns:
+        H5Trajectory: the trajectory
+    """
+    attrs = h5_traj.attrs
+    frame_id = attrs.get(H5_ATTR_FRAMEID)
+    child_frame_id = attrs.get(H5_ATTR_CHILDFRAMEID)
+    return H5Trajectory(
+        _read_rows(h5_traj[SUBTYPE_STAMP], rows),
+        _read_rows(h5_traj[SUBTYPE_POSE], rows),
+        frame_id.decode('utf-8') if isinstance(frame_id, bytes) else frame_id,
+        child_frame_id.decode('utf-8') if isinstance(child_frame_id, bytes) else child_frame_id,
+    )
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Dict, Tuple, Union
+import os
+import h5py
+
+FS_STRATEGIES:Tuple[str, ...] = ('fsm', 'page', 'aggregate', 'none')
+
+class H5FileProfile():
+    """H5FileProfile
+
+    File-level settings of HDF5 used to open an H5Dataset.
+    None leaves the default of HDF5.
+
+    Args:
+        libver (str | Tuple[str, str], optional): bounds of the file format version, e.g. ('v110', 'latest'). Defaults to None.
+        rdcc_nbytes (int, optional): size of the raw data chunk cache of each dataset [byte]. The default of HDF5 is 1 MiB. Defaults to None.
+        rdcc_nslots (int, optional): number of the hash slots of the chunk cache, a prime about 100 times the chunks in the cache. Defaults to None.
+        rdcc_w0 (float, optional): preemption policy of the chunk cache [0-1]. 1 evicts the fully read or written chunks first. Defaults to None.
+        meta_block_size (int, optional): minimum size of the blocks allocated for the metadata [byte]. Defaults to None.
+        fs_strategy (str, optional): file space strategy of a new file ['fsm', 'page', 'aggregate', 'none']. Defaults to None.
+        fs_page_size (int, optional): page size of a new file with 'page' strategy [byte]. Defaults to None.
+        fs_persist (bool, optional): keep the free-space tracking of a new file after close. Defaults to False.
+        page_buf_size (int, optional): size of the page buffer [byte]. Only used by the files created with 'page' strategy. Defaults to None.
+        alignment_threshold (int, optional): objects of this size or larger are aligned [byte]. Defaults to None.
+        alignment_interval (int, optional): alignment of the objects [byte], e.g. the stripe size of the file system. Defaults to None.
+    """
+
+    def __init__(self, libver:Union[str, Tuple[str, str]]=None, rdcc_nbytes:int=None, rdcc_nslots:int=None, rdcc_w0:float=None,
+        meta_block_size:int=None, fs_strategy:str=None, fs_page_size:int=None, fs_persist:bool=False, page_buf_size:int=None,
+        alignment_threshold:int=None, alignment_interval:int=None) -> None:
+        if rdcc_w0 is not None and (rdcc_w0 < 0.0 or rdcc_w0 > 1.0):
+            raise ValueError('"rdcc_w0" must be in [0, 1].')
+        if fs_strategy is not None and fs_strategy not in FS_STRATEGIES:
+            raise ValueError('"fs_strategy" must be one of {0}.'.format(', '.join(FS_STRATEGIES)))
+        if fs_page_size is not None and fs_strategy != 'page':
+            raise ValueError('"fs_page_size" is only available for "page" strategy.')
+        if page_buf_size is not None and fs_page_size is not None and page_buf_size < fs_page_size:
+            raise ValueError('"page_buf_size" must not be smaller than "fs_page_size".')
+        if (alignment_threshold is None) != (alignment_interval is None):
+            raise ValueError('"alignment_threshold" and "alignment_interval" must be given together.')
+        for name, value in [('rdcc_nbytes', rdcc_nbytes), ('rdcc_nslots', rdcc_nslots), ('meta_block_size', meta_block_size),
+            ('fs_page_size', fs_page_size), ('page_buf_size', page_buf_size), ('alignment_threshold', alignment_threshold), ('alignment_interval', alignment_interval)]:
+            if value is not None and value < 1:
+                raise ValueError('"{0}" must be greater than 0.'.format(name))
+        self.libver:Union[str, Tuple[str, str]] = libver
+        self.rdcc_nbytes:int = rdcc_nbytes
+        self.rdcc_nslots:int = rdcc_nslots
+        self.rdcc_w0:float = rdcc_w0
+        self.meta_block_size:int = meta_block_size
+        self.fs_strategy:str = fs_strategy
+        self.fs_page_size:int = fs_page_size
+        self.fs_persist:bool = fs_persist
+        self.page_buf_size:int = page_buf_size
+        self.alignment_threshold:int = alignment_threshold
+        self.alignment_interval:int = alignment_interval
+
+    def __repr__(self) -> str:
+        return 'H5FileProfile({0})'.format(', '.join('{0}={1!r}'.format(key, value) for key, value in self.get_kwds(True).items()))
+
+    def get_kwds(self, create:bool=False) -> Dict[str, Any]:
+        """get_kwds
+
+        Get the arguments of 'h5py.File'.
+        The file space settings are only applied when a file is created, and the page buffer only to the files with 'page' strategy.
+
+        Args:
+            create (bool, optional): If True, the arguments create a new file. Defaults to False.
+
+        Returns:
+            Dict[str, Any]: the arguments
+        """
+        kwds = {}
+        for key in ['libver', 'rdcc_nbytes', 'rdcc_nslots', 'rdcc_w0', 'meta_block_size', 'fs_strategy', 'fs_page_size', 'page_buf_size',
+            'alignment_threshold', 'alignment_interval']:
+            value = getattr(self, key)
+            if value is not None:
+                kwds[key] = value
+        if self.fs_persist is True:
+            kwds['fs_persist'] = True
+        if create is False:
+            # The file space strategy is fixed when the file is created.
+            for key in ['fs_strategy', 'fs_page_size', 'fs_persist']:
+                kwds.pop(key, None)
+        elif self.fs_strategy != 'page':
+            # HDF5 refuses to create a file with a page buffer but without 'page' strategy.
+            kwds.pop('page_buf_size', None)
+        return kwds
+
+PROFILE_DEFAULT:H5FileProfile = H5FileProfile()
+# Recording appends each chunk once, so the written chunks are evicted first.
+# The format of HDF5 1.10 stores the many groups of LAYOUT_GROUP in indexed link storage and is required by SWMR.
+PROFILE_RECORD:H5FileProfile = H5FileProfile(libver=('v110', 'latest'), rdcc_nbytes=1 << 24, rdcc_nslots=4093, rdcc_w0=1.0,
+    meta_block_size=1 << 20)
+# Conversion writes the final file for training, so the metadata and the small data are packed into 1 MiB pages
+# and the large objects are aligned to the stripes of the parallel file system.
+PROFILE_CONVERT:H5FileProfile = H5FileProfile(libver=('v110', 'latest'), rdcc_nbytes=1 << 26, rdcc_nslots=16411, rdcc_w0=1.0,
+    meta_block_size=1 << 22, fs_strategy='page', fs_page_size=1 << 20, alignment_threshold=1 << 20, alignment_interval=1 << 20)
+# Training reads random frames repeatedly, so the chunks are kept in a large cache and the pages of a converted file are buffered.
+PROFILE_TRAIN_READ:H5FileProfile = H5FileProfile(rdcc_nbytes=1 << 26, rdcc_nslots=16411, rdcc_w0=0.75, page_buf_size=1 << 24)
+
+FILE_PROFILES:Dict[str, H5FileProfile] = {
+    'default': PROFILE_DEFAULT,
+    'record': PROFILE_RECORD,
+    'convert': PROFILE_CONVERT,
+    'train-read': PROFILE_TRAIN_READ,
+}
+
+def get_file_profile(profile:Union[str, H5FileProfile]) -> H5FileProfile:
+    """get_file_profile
+
+    Args:
+        profile (str | H5FileProfile): name of a preset ['default', 'record', 'convert', 'train-read'], a profile or None
+
+    Raises:
+        ValueError: if the name is unknown.
+
+    Returns:
+        H5FileProfile: the profile. PROFILE_DEFAULT for None.
+    """
+    if profile is None:
+        return PROFILE_DEFAULT
+    if isinstance(profile, H5FileProfile):
+        return profile
+    if profile not in FILE_PROFILES:
+        raise ValueError('"profile" must be one of {0}.'.format(', '.join(FILE_PROFILES.keys())))
+    return FILE_PROFILES[profile]
+
+def open_h5file(path:str, mode:str, profile:Union[str, H5FileProfile]=None, swmr:bool=False) -> h5py.File:
+    """open_h5file
+
+    Open an HDF5 file with a profile.
+
+    Args:
+        path (str): path of the file
+        mode (str): file mode of 'h5py.File'
+        profile (str | H5FileProfile, optional): the profile or the name of a preset. Defaults to None.
+        swmr (bool, optional): open a file for reading while it is written in SWMR mode. Defaults to False.
+
+    Returns:
+        h5py.File: the file
+    """
+    create = mode in ['w', 'w-', 'x'] or (mode == 'a' and os.path.exists(path) is False)
+    kwds = get_file_profile(profile).get_kwds(create)
+    if swmr is True:
+        kwds['swmr'] = True
+    return h5py.File(path, mode=mode, **kwds)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+from typing import Any, Tuple
+import numpy as np
+
+from .structure import *
+
+class H5VoxelGrid():
+    """H5VoxelGrid
+
+    VoxelGridMap in the CSR layout.
+    'points' is a flat compound array of the points sorted by voxel in (Z, Y, X) order,
+    and the points of voxel (z, y, x) are 'points[offsets[z, y, x]:offsets[z, y, x] + counts[z, y, x]]'.
+
+    Args:
+        points (np.ndarray): shape=(M,), compound array of the points sorted by voxel
+        offsets (np.ndarray): shape=(Z, Y, X), dtype=np.int64 first row of each voxel in 'points'
+        counts (np.ndarray): shape=(Z, Y, X), dtype=np.uint32 number of points of each voxel
+    """
+
+    def __init__(self, points:np.ndarray, offsets:np.ndarray, counts:np.ndarray) -> None:
+        if len(offsets.shape) != 3 or offsets.shape != counts.shape:
+            raise ValueError('"offsets.shape" and "counts.shape" must be the same (Z, Y, X).')
+        if len(points.shape) != 1:
+            raise ValueError('"points.shape" must be (M,).')
+        self.points:np.ndarray = points
+        self.offsets:np.ndarray = np.asarray(offsets, dtype=np.int64)
+        self.counts:np.ndarray = np.asarray(counts, dtype=np.uint32)
+
+    def __repr__(self) -> str:
+        return 'H5VoxelGrid(shape={0}, points={1})'.format(self.shape, self.points.shape[0])
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """shape
+
+        Returns:
+            Tuple[int, int, int]: shape of the grid (Z, Y, X)
+        """
+        return self.offsets.shape
+
+    def get_voxel(self, z:int, y:int, x:int) -> np.ndarray:
+        """get_voxel
+
+        Get the points of a voxel.
+
+        Args:
+            z (int): index of the voxel along Z
+            y (int): index of the voxel along Y
+            x (int): index of the voxel along X
+
+        Returns:
+            np.ndarray: the points of the voxel
+        """
+        start = int(self.offsets[z, y, x])
+        return self.points[start:start + int(self.counts[z, y, x])]
+
+    def get_region(self, z:slice=slice(None), y:slice=slice(None), x:slice=slice(None)) -> np.ndarray:
+        """get_region
+
+        Get the points of the voxels in a region.
+
+        Args:
+            z (slice, optional): range of the voxels along Z. Defaults to slice(None).
+            y (slice, optional): range of the voxels along Y. Defaults to slice(None).
+            x (slice, optional): range of the voxels along X. Defaults to slice(None).
+
+        Returns:
+            np.ndarray: the points of the voxels in (Z, Y, X) order
+        """
+        return self.points[_gather_rows(self.offsets[z, y, x], self.counts[z, y, x])]
+
+    def to_object_array(self) -> np.ndarray:
+        """to_object_array
+
+        Convert to the object array (Z, Y, X) of the points of each voxel.
+
+        Returns:
+            np.ndarray: the object array
+        """
+        data = np.empty(self.shape, dtype=object)
+        flat = data.reshape(-1)
+        for i, (start, count) in enumerate(zip(self.offsets.reshape(-1).tolist(), self.counts.reshape(-1).tolist())):
+            flat[i] = self.points[start:start + count]
+        return data
+
+def _gather_rows(offsets:np.ndarray, counts:np.ndarray) -> np.ndarray:
+    offsets = offsets.reshape(-1)
+    counts = counts.reshape(-1).astype(np.int64)
+    total = int(counts.sum())
+    if total < 1:
+        return np.zeros(0, dtype=np.int64)
+    # The index of each point is the first row of its voxel plus its position in the voxel.
+    ends = np.cumsum(counts)
+    return np.repeat(offsets - (ends - counts), counts) + np.arange(total, dtype=np.int64)
+
+def create_voxel_grid(data:np.ndarray, dtype:Any) -> H5VoxelGrid:
+    """create_voxel_grid
+
+    Convert an object array (Z, Y, X) of the points of each voxel to H5VoxelGrid.
+
+    Args:
+        data (np.ndarray): object array of the compound arrays of the points of each voxel
+        dtype (Any): compound dtype of the points
+
+    Returns:
+        H5VoxelGrid: the voxel grid in the CSR layout
+    """
+    if len(data.shape) != 3:
+        raise ValueError('"data.shape" must be (Z, Y, X).')
+    voxels = [np.zeros(0, dtype=dtype) if voxel is None else np.asarray(voxel, dtype=dtype).reshape(-1) for voxel in data.reshape(-1)]
+    counts = np.fromiter((voxel.shape[0] for voxel in voxels), dtype=np.int64, count=len(voxels))
+    offsets = np.cumsum(counts) - counts
+    points = np.concatenate(voxels) if len(voxels) > 0 else np.zeros(0, dtype=dtype)
+    return H5VoxelGrid(points, offsets.reshape(data.shape), counts.reshape(data.shape))
+
+def voxelize(points:np.ndarray, voxel_size:float, voxels_min:Tuple[float, float, float]=None, voxels_max:Tuple[float, float, float]=None,
+    semantic1d:np.ndarray=None) -> Tuple[H5VoxelGrid, Tuple[float, float, float], Tuple[float, float, float]]:
+    """voxelize
+
+    Group a point cloud into the voxels of a VoxelGridMap by sorting the flat voxel indices.
+    The points outside the range are dropped.
+
+    Args:
+        points (np.ndarray): shape=(N, 3), dtype=np.float32 point cloud (x, y, z)
+        voxel_size (float): size of a voxel [m]
+        voxels_min (Tuple[float, float, float], optional): minimum of the range (z_min, y_min, x_min). If None, the minimum of the points. Defaults to None.
+        voxels_max (Tuple[float, float, float], optional): maximum of the range (z_max, y_max, x_max). If None, the range covers all points. Defaults to None.
+        semantic1d (np.ndarray, optional): shape=(N,), dtype=np.uint8 labels of the points. If not None, the points are SUBTYPE_VOXEL_SEMANTIC3D. Defaults to None.
+
+    Returns:
+        Tuple[H5VoxelGrid, Tuple[float, float, float], Tuple[float, float, float]]: the voxel grid and its range (voxels_min, voxels_max)
+    """
+    if voxel_size <= 0.0:
+        raise ValueError('"voxel_size" must be positive.')
+    num = points.shape[0]
+    # The columns of the points are (x, y, z) and the axes of the grid are (z, y, x).
+    columns = [points[:, 2], points[:, 1], points[:, 0]]
+    if voxels_min is None:
+        voxels_min = [float(column.min()) if num > 0 else 0.0 for column in columns]
+    voxels_min = np.asarray(voxels_min, dtype=np.float64)
+    if voxels_max is None:
+        extent = np.array([float(column.max()) if num > 0 else 0.0 for column in columns]) - voxels_min
+        voxels_max = voxels_min + (np.floor(extent / voxel_size) + 1.0) * voxel_size
+    voxels_max = np.asarray(voxels_max, dtype=np.float64)
+    shape = np.maximum(np.ceil(np.round((voxels_max - voxels_min) / voxel_size, 6)), 1).astype(np.int64)
+    size = int(np.prod(shape))
+
+    valid = None
+    flat = None
+    scale = points.dtype.type(1.0 / voxel_size)
+    for axis, column in enumerate(columns):
+        position = (column - column.dtype.type(voxels_min[axis])) * scale
+        inside = (position >= 0.0) & (position < float(shape[axis]))
+        valid = inside if valid is None else valid & inside
+        index = position.astype(np.int64)
+        flat = index if flat is None else flat * int(shape[axis]) + index
+    rows = None
+    if np.all(valid) == False:
+        rows = np.flatnonzero(valid)
+        flat = flat[rows]
+
+    # Sorting the flat indices groups the points by voxel in (Z, Y, X) order.
+    if size <= 0xffffffff and num <= 0xffffffff:
+        # Sorting the voxel and the row packed in a key is faster than argsort, and it keeps the order of the points in a voxel.
+        key = (flat.astype(np.uint64) << np.uint64(32)) | np.arange(flat.shape[0], dtype=np.uint64)
+        key.sort()
+        order = (key & np.uint64(0xffffffff)).astype(np.intp)
+    else:
+        order = np.argsort(flat, kind='stable')
+    if rows is not None:
+        order = rows[order]
+    counts = np.bincount(flat, minlength=size)
+    offsets = np.cumsum(counts) - counts
+
+    xyz = np.take(points, order, axis=0)
+    if semantic1d is None:
+        voxel_points = xyz.astype(np.float32, copy=False).view(DTYPE_NUMPY[SUBTYPE_VOXEL_POINTS]).reshape(-1)
+    else:
+        voxel_points = np.empty(order.shape[0], dtype=DTYPE_NUMPY[SUBTYPE_VOXEL_SEMANTIC3D])
+        for axis, name in enumerate(('x', 'y', 'z')):
+            voxel_points[name] = xyz[:, axis]
+        voxel_points['label'] = semantic1d[order]
+
+    grid = H5VoxelGrid(voxel_points, offsets.reshape(shape), counts.reshape(shape))
+    return grid, tuple(voxels_min.tolist()), tuple(voxels_max.tolist())
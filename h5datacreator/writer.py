@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+
+from typing import TYPE_CHECKING, Any, Callable, Deque, Tuple
+import collections
+import queue
+import threading
+
+if TYPE_CHECKING:
+    from . import H5Dataset
+
+BACKPRESSURE_BLOCK:str = 'block'
+BACKPRESSURE_DROP_OLDEST:str = 'drop-oldest'
+BACKPRESSURE_ERROR:str = 'error'
+
+class H5AsyncWriter():
+    """H5AsyncWriter
+
+    Write frames of an H5Dataset on a dedicated thread.
+    'put' only enqueues a frame, and the writer thread calls 'get_next_data_group' and the function of the frame.
+    After the writer is created, the H5Dataset must be used only through the writer.
+    The arrays passed to 'put' must not be modified until they are written.
+    If writing a frame fails, the writer stops: the queued frames are discarded and 'put' raises 'RuntimeError'.
+    The index of the failed frame, which may be partially written, is kept in 'failed_index'.
+
+    Args:
+        h5file (H5Dataset): H5Dataset to write
+        maxsize (int, optional): maximum number of queued frames. Defaults to 64.
+        backpressure (str, optional): behavior when the queue is full.
+            BACKPRESSURE_BLOCK waits for a free slot, BACKPRESSURE_DROP_OLDEST discards the oldest queued frame
+            and BACKPRESSURE_ERROR raises 'queue.Full'. Defaults to BACKPRESSURE_BLOCK.
+    """
+
+    def __init__(self, h5file:'H5Dataset', maxsize:int=64, backpressure:str=BACKPRESSURE_BLOCK) -> None:
+        if maxsize < 1:
+            raise ValueError('"maxsize" must be greater than 0.')
+        if backpressure not in [BACKPRESSURE_BLOCK, BACKPRESSURE_DROP_OLDEST, BACKPRESSURE_ERROR]:
+            raise ValueError('"backpressure" must be "{0}", "{1}" or "{2}".'.format(BACKPRESSURE_BLOCK, BACKPRESSURE_DROP_OLDEST, BACKPRESSURE_ERROR))
+
+        self.__h5file:'H5Dataset' = h5file
+        self.__maxsize:int = maxsize
+        self.__backpressure:str = backpressure
+        self.__frames:Deque[Tuple[Callable[..., Any], tuple, dict]] = collections.deque()
+        self.__condition:threading.Condition = threading.Condition()
+        self.__writing:bool = False
+        self.__closed:bool = False
+        self.__error:BaseException = None
+        self.__failure:BaseException = None
+        self.__failed_index:int = None
+        self.__written:int = 0
+        self.__dropped:int = 0
+
+        self.__thread:threading.Thread = threading.Thread(target=self.__run, name='H5AsyncWriter', daemon=True)
+        self.__thread.start()
+
+    def __enter__(self) -> 'H5AsyncWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def written(self) -> int:
+        """written
+
+        Returns:
+            int: number of written frames
+        """
+        return self.__written
+
+    @property
+    def dropped(self) -> int:
+        """dropped
+
+        Returns:
+            int: number of frames discarded by BACKPRESSURE_DROP_OLDEST or after a failed frame
+        """
+        return self.__dropped
+
+    @property
+    def failed_index(self) -> int:
+        """failed_index
+
+        Returns:
+            int: index in '/data' of the frame whose writing failed, or None
+        """
+        return self.__failed_index
+
+    @property
+    def pending(self) -> int:
+        """pending
+
+        Returns:
+            int: number of queued frames
+        """
+        with self.__condition:
+            return len(self.__frames)
+
+    def __raise_error(self) -> None:
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise RuntimeError('Writing a frame failed.') from error
+
+    def put(self, write_frame:Callable[..., Any], *args, **kwds) -> None:
+        """put
+
+        Enqueue a frame. The writer thread calls 'write_frame(h5_group, *args, **kwds)'
+        with the group of the next index in '/data'.
+
+        Args:
+            write_frame (Callable[..., Any]): function that writes a frame with the 'set_*' functions
+
+        Raises:
+            queue.Full: if the queue is full with BACKPRESSURE_ERROR.
+            RuntimeError: if the writer is closed, or writing a previous frame failed.
+        """
+        with self.__condition:
+            self.__raise_error()
+            if self.__failure is not None:
+                raise RuntimeError('H5AsyncWriter stopped after writing frame {0} failed.'.format(self.__failed_index)) from self.__failure
+            if self.__closed is True:
+                raise RuntimeError('H5AsyncWriter is closed.')
+            if len(self.__frames) >= self.__maxsize:
+                if self.__backpressure == BACKPRESSURE_ERROR:
+                    raise queue.Full('The queue of H5AsyncWriter is full.')
+                elif self.__backpressure == BACKPRESSURE_DROP_OLDEST:
+                    self.__frames.popleft()
+                    self.__dropped += 1
+                else:
+                    while len(self.__frames) >= self.__maxsize and self.__error is None:
+                        self.__condition.wait()
+                    self.__raise_error()
+            self.__frames.append((write_frame, args, kwds))
+            self.__condition.notify_all()
+
+    def flush(self) -> None:
+        """flush
+
+        Wait until all queued frames are written.
+
+        Raises:
+            RuntimeError: if writing a frame failed.
+        """
+        with self.__condition:
+            while (len(self.__frames) > 0 or self.__writing is True) and self.__error is None:
+                self.__condition.wait()
+            self.__raise_error()
+
+    def close(self) -> None:
+        """close
+
+        Write all queued frames, stop the writer thread and close the H5Dataset.
+
+        Raises:
+            RuntimeError: if writing a frame failed.
+        """
+        with self.__condition:
+            if self.__closed is True:
+                return
+            self.__closed = True
+            self.__condition.notify_all()
+        self.__thread.join()
+        self.__h5file.close()
+        with self.__condition:
+            self.__raise_error()
+
+    def __run(self) -> None:
+        while True:
+            with self.__condition:
+                while len(self.__frames) < 1 and self.__closed is False:
+                    self.__condition.wait()
+                if len(self.__frames) < 1:
+                    return
+                write_frame, args, kwds = self.__frames.popleft()
+                self.__writing = True
+                self.__condition.notify_all()
+            index = None
+            try:
+                h5_group = self.__h5file.get_next_data_group()
+                index = self.__h5file.get_current_data_index()
+                write_frame(h5_group, *args, **kwds)
+            except BaseException as error:
+                # The frames after a failed one would be written at the wrong indices, so the writer stops for good.
+                with self.__condition:
+                    self.__error = error
+                    self.__failure = error
+                    self.__failed_index = index
+                    self.__dropped += len(self.__frames)
+                    self.__frames.clear()
+                    self.__writing = False
+                    self.__condition.notify_all()
+                return
+            with self.__condition:
+                self.__writing = False
+                self.__written += 1
+                self.__condition.notify_all()